@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Local ingest sink that records what the live pusher sends.
+
+ffmpeg pushes the same FLV it would send over RTMP to ``tcp://`` when given
+``sink.url`` as the output URL, so the stream command under test is unchanged
+apart from the destination. The sink parses the FLV tag stream as it
+arrives and records bytes, audio/video tag counts, keyframes and the media
+timestamps against wall-clock arrival, which gives the stream's realtime
+factor (media seconds delivered per wall second) and time to first frame.
+"""
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+FLV_HEADER_BYTES = 9
+TAG_HEADER_BYTES = 11
+AUDIO_TAG, VIDEO_TAG = 8, 9
+
+
+class FlvSink:
+    def __init__(self, record_path: Optional[str] = None) -> None:
+        self.record_path = record_path
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(4)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.sessions: List[Dict[str, float]] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self._sock.getsockname()
+        return f"tcp://{host}:{port}"
+
+    def __enter__(self) -> "FlvSink":
+        self._thread = threading.Thread(target=self._accept, name="flv-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._sock.close()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._session, args=(conn,), daemon=True).start()
+
+    def _session(self, conn: socket.socket) -> None:
+        session = {
+            "connected": time.monotonic(), "first_tag": 0.0, "last_tag": 0.0,
+            "bytes": 0, "video_tags": 0, "audio_tags": 0, "keyframes": 0,
+            "first_ts_ms": -1, "last_ts_ms": 0,
+        }
+        with self._lock:
+            self.sessions.append(session)
+        record = open(self.record_path, "ab") if self.record_path else None
+        buffer = b""
+        header_done = False
+        try:
+            while True:
+                data = conn.recv(256 * 1024)
+                if not data:
+                    break
+                session["bytes"] += len(data)
+                if record:
+                    record.write(data)
+                buffer += data
+                if not header_done:
+                    if len(buffer) < FLV_HEADER_BYTES + 4:
+                        continue
+                    buffer = buffer[FLV_HEADER_BYTES + 4:]
+                    header_done = True
+                buffer = self._parse_tags(buffer, session)
+        finally:
+            conn.close()
+            if record:
+                record.close()
+
+    @staticmethod
+    def _parse_tags(buffer: bytes, session: Dict[str, float]) -> bytes:
+        offset = 0
+        while len(buffer) - offset >= TAG_HEADER_BYTES:
+            tag_type = buffer[offset] & 0x1F
+            size = struct.unpack(">I", b"\x00" + buffer[offset + 1:offset + 4])[0]
+            total = TAG_HEADER_BYTES + size + 4  # + PreviousTagSize
+            if len(buffer) - offset < total:
+                break
+            ts = struct.unpack(">I", buffer[offset + 7:offset + 8] + buffer[offset + 4:offset + 7])[0]
+            now = time.monotonic()
+            if tag_type in (AUDIO_TAG, VIDEO_TAG):
+                if session["first_ts_ms"] < 0:
+                    session["first_ts_ms"] = ts
+                    session["first_tag"] = now
+                session["last_ts_ms"] = max(session["last_ts_ms"], ts)
+                session["last_tag"] = now
+            if tag_type == VIDEO_TAG:
+                session["video_tags"] += 1
+                if size and buffer[offset + TAG_HEADER_BYTES] >> 4 == 1:
+                    session["keyframes"] += 1
+            elif tag_type == AUDIO_TAG:
+                session["audio_tags"] += 1
+            offset += total
+        return buffer[offset:]
+
+    def result(self) -> Dict[str, float]:
+        """Summary over all sessions (each reconnect is a new session)."""
+        with self._lock:
+            sessions = [dict(s) for s in self.sessions if s["first_ts_ms"] >= 0]
+        if not sessions:
+            return {"sessions": len(self.sessions), "media_seconds": 0.0}
+        media = sum((s["last_ts_ms"] - s["first_ts_ms"]) / 1000 for s in sessions)
+        wall = sum(s["last_tag"] - s["first_tag"] for s in sessions)
+        return {
+            "sessions": len(sessions),
+            "bytes": sum(s["bytes"] for s in sessions),
+            "video_tags": sum(s["video_tags"] for s in sessions),
+            "audio_tags": sum(s["audio_tags"] for s in sessions),
+            "keyframes": sum(s["keyframes"] for s in sessions),
+            "media_seconds": media,
+            "wall_seconds": wall,
+            "realtime_factor": media / wall if wall > 0 else 0.0,
+            "time_to_first_frame_s": sessions[0]["first_tag"] - sessions[0]["connected"],
+        }
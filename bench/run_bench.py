@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the asset, encode and streaming scripts.
+
+The parent starts the HTTP stand-ins (standins.py) and runs every scenario
+in its own child process pointed at them, so nothing touches the network and
+peak RSS is per scenario. Each child prints one JSON line of metrics,
+including its own ``peak_rss_mb`` (VmHWM, which unlike ``ru_maxrss`` is not
+inherited from the forking parent) and that of any ffmpeg it ran; the parent
+compares everything against ``bench/baselines.json``.
+
+Metrics ending in ``_mbps``, ``_fps`` or ``realtime_factor`` are better when
+higher; ``_s`` and ``_mb`` metrics are better when lower. A change beyond
+``--tolerance`` in the wrong direction is reported as a regression (exit
+code 1 with ``--check``), and so is a scenario with no stored baseline or
+one that raised an error, so ``--check`` cannot pass just because nothing
+was compared. Scenarios whose tools are missing (ffmpeg, Google client
+libraries) are reported as skipped.
+
+Usage:
+  python bench/run_bench.py [scenario ...] [--latency S] [--bandwidth MBPS]
+      [--failure-rate F] [--drop-rate F] [--video-mb N] [--check] [--update-baselines]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(os.path.dirname(BENCH_DIR), "scripts")
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from flv_sink import FlvSink  # noqa: E402
+from standins import Conditions, Standins  # noqa: E402
+
+BASELINES_PATH = os.path.join(BENCH_DIR, "baselines.json")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results", "latest.json")
+ENTRY_POINTS = [
+    "fetch_stock_video", "generate_ai_image", "generate_ai_video_pollinations",
+    "prefetch", "stream_to_youtube_live", "upload_to_youtube",
+]
+HEAVY_MODULES = ["httpx", "googleapiclient", "google.oauth2", "gradio_client", "huggingface_hub"]
+
+Metrics = Dict[str, float]
+
+
+class Skip(Exception):
+    pass
+
+
+def _require_ffmpeg() -> None:
+    if not shutil.which("ffmpeg"):
+        raise Skip("ffmpeg not installed")
+
+
+def _timed(fn: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+# -- scenarios (run in the child) ------------------------------------------------
+
+def bench_download(work: str) -> Metrics:
+    from downloader import download_sync
+
+    dest = os.path.join(work, "download.mp4")
+    url = os.environ["PEXELS_API_URL"].rsplit("/videos/", 1)[0] + "/media/bench-hd.mp4"
+    seconds = _timed(lambda: download_sync(url, dest, segmented=True))
+    size = os.path.getsize(dest)
+    return {"seconds_s": seconds, "throughput_mbps": size * 8 / 1e6 / seconds}
+
+
+def bench_stock(work: str) -> Metrics:
+    from fetch_stock_video import search_pexels_video
+
+    dest = os.path.join(work, "stock.mp4")
+    ok = {}
+    seconds = _timed(lambda: ok.setdefault("ok", asyncio.run(search_pexels_video("cozy rain", dest, seed=1))))
+    if not ok["ok"]:
+        raise RuntimeError("search_pexels_video failed")
+    return {"seconds_s": seconds, "throughput_mbps": os.path.getsize(dest) * 8 / 1e6 / seconds}
+
+
+def bench_image(work: str) -> Metrics:
+    from generate_ai_image import generate_image
+
+    dest = os.path.join(work, "image.jpg")
+    ok = {}
+    seconds = _timed(lambda: ok.setdefault("ok", asyncio.run(generate_image("cozy cabin", dest, seed=1))))
+    if not ok["ok"]:
+        raise RuntimeError("generate_image failed")
+    return {"seconds_s": seconds}
+
+
+def bench_pollinations_video(work: str) -> Metrics:
+    from generate_ai_video_pollinations import generate_video
+
+    dest = os.path.join(work, "ai.mp4")
+    ok = {}
+    seconds = _timed(lambda: ok.setdefault("ok", generate_video("cozy fire", dest)))
+    if not ok["ok"]:
+        raise RuntimeError("generate_video failed")
+    return {"seconds_s": seconds}
+
+
+def bench_startup(work: str) -> Metrics:
+    metrics = {}
+    for module in ENTRY_POINTS:
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", f"import {module}"], cwd=SCRIPTS_DIR, capture_output=True
+        )
+        if result.returncode == 0:
+            metrics[f"import_{module}_s"] = time.perf_counter() - started
+    if not metrics:
+        raise Skip("no entry point importable")
+
+    # The unified CLI must not pay for any of that before a subcommand runs.
+    cli = os.path.join(SCRIPTS_DIR, "ty1.py")
+    probe = (
+        "import sys, ty1\n"
+        "ty1.script_argv(ty1.build_parser().parse_args(['upload', 'x.mp4']))\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    loaded = subprocess.run([sys.executable, "-c", probe], cwd=SCRIPTS_DIR, capture_output=True, text=True)
+    if loaded.stdout.strip():
+        raise RuntimeError(f"ty1.py imports {loaded.stdout.strip()} before running a subcommand")
+    metrics["cli_help_s"] = _timed(lambda: subprocess.run([sys.executable, cli, "--help"], capture_output=True))
+    metrics["cli_prompt_s"] = _timed(lambda: subprocess.run([sys.executable, cli, "prompt", "1"], capture_output=True))
+
+    # The same job through a warm daemon.
+    env = dict(os.environ, TY1_SOCKET=os.path.join(work, "ty1.sock"), TY1_DAEMON="1")
+    daemon = subprocess.Popen([sys.executable, cli, "daemon"], env=env, stdout=subprocess.PIPE, text=True)
+    try:
+        for line in daemon.stdout:
+            if "Daemon ready" in line:
+                break
+        def job() -> None:
+            subprocess.run([sys.executable, cli, "prompt", "1"], env=env, capture_output=True, check=True)
+
+        job()  # first fork pays for page faults
+        metrics["daemon_prompt_s"] = _timed(job)
+    finally:
+        daemon.terminate()
+        daemon.wait()
+    return metrics
+
+
+def bench_golive(work: str) -> Metrics:
+    _require_ffmpeg()
+    from live_startup import FAST_START_CONTENT_DETAILS, LiveStartup
+    from standins import FakeYouTubeLive
+
+    clip = _test_clip(work, 6)
+    latency = float(os.getenv("BENCH_API_LATENCY", "0.3"))
+
+    def resolve_ingest(youtube) -> Dict[str, str]:
+        stream = youtube.liveStreams().list(part="id,cdn", id=FakeYouTubeLive.STREAM_ID).execute()["items"][0]
+        return {"id": stream["id"], "rtmp_url": stream["cdn"]["ingestionInfo"]["ingestionAddress"]}
+
+    metrics = {}
+    for mode in ("blind", "fast"):
+        with FlvSink() as sink:
+            api = FakeYouTubeLive(
+                sink.url,
+                lambda: any(s["first_tag"] for s in sink.sessions),
+                latency=latency,
+                auto_start_seconds=float(os.environ["BENCH_AUTOSTART_SECONDS"]) if "BENCH_AUTOSTART_SECONDS" in os.environ else None,
+            )
+            details = {"enableAutoStart": True} if mode == "blind" else FAST_START_CONTENT_DETAILS
+            body = {"snippet": {"title": "bench"}, "contentDetails": dict(details)}
+            push_cmd = ["ffmpeg", "-v", "error", "-re", "-stream_loop", "-1", "-i", clip, "-c", "copy", "-f", "flv"]
+            if mode == "blind":
+                # What stream_to_youtube_live does by default: one call after another, then rely on auto-start.
+                started = time.monotonic()
+                ingest = resolve_ingest(api)
+                broadcast_id = api.liveBroadcasts().insert(part="snippet,status,contentDetails", body=body).execute()["id"]
+                api.liveBroadcasts().bind(part="id,contentDetails", id=broadcast_id, streamId=ingest["id"]).execute()
+                first_push = time.monotonic() - started
+                pusher = subprocess.Popen(push_cmd + [ingest["rtmp_url"]])
+                deadline = started + 60
+                while LiveStartup._lifecycle(api, broadcast_id) != "live":
+                    if time.monotonic() > deadline:
+                        raise RuntimeError("blind startup never went live")
+                    time.sleep(0.25)
+            else:
+                startup = LiveStartup(lambda: api, os.path.join(work, "metrics"), timeout=60)
+                started = startup.started
+                ingest = startup.prepare(resolve_ingest, body)
+                first_push = time.monotonic() - started
+                pusher = subprocess.Popen(push_cmd + [ingest["rtmp_url"]])
+                startup.go_live(ingest["id"])
+                startup.wait()
+                if startup.error:
+                    raise RuntimeError(f"fast startup failed: {startup.error}")
+                broadcast_id = startup.broadcast_id()
+            # When the fake broadcast actually went live, not when a poll noticed.
+            live = api.broadcasts[broadcast_id]["live_at"] - started
+            pusher.terminate()
+            pusher.wait()
+        metrics[f"{mode}_first_push_s"] = first_push
+        metrics[f"{mode}_time_to_live_s"] = live
+    return metrics
+
+
+def bench_validate(work: str) -> Metrics:
+    _require_ffmpeg()
+    if not shutil.which("ffprobe"):
+        raise Skip("ffprobe not installed")
+    from media_validate import ValidationError, validate, validate_many
+
+    os.environ.update(MEDIA_VALIDATE="full", ASSET_CACHE_DISABLE="", ASSET_CACHE_DIR=os.path.join(work, "cache"))
+    clip = _test_clip(work, 6)
+    html = os.path.join(work, "error.mp4")
+    with open(html, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html><html><body>502 Bad Gateway</body></html>" * 20)
+    truncated = os.path.join(work, "truncated.mp4")
+    with open(clip, "rb") as src, open(truncated, "wb") as dst:
+        dst.write(src.read(os.path.getsize(clip) // 2))
+
+    def rejects(path: str) -> float:
+        started = time.perf_counter()
+        try:
+            validate(path)
+        except ValidationError:
+            return time.perf_counter() - started
+        raise RuntimeError(f"{os.path.basename(path)} passed validation")
+
+    metrics = {
+        "reject_html_s": rejects(html),
+        "reject_truncated_s": rejects(truncated),
+        "probe_cold_s": _timed(lambda: validate(clip)),
+        "probe_cached_s": _timed(lambda: validate(clip)),
+    }
+    batch = []
+    for index in range(8):
+        copy = os.path.join(work, f"batch{index}.mp4")
+        shutil.copyfile(clip, copy)
+        batch.append(copy)
+    metrics["batch_of_8_s"] = _timed(lambda: validate_many(batch))
+    return metrics
+
+
+def _stream_cmd_builder() -> Callable:
+    try:
+        from stream_to_youtube_live import build_ffmpeg_cmd
+    except ImportError as e:  # the module pulls in the Google client libraries
+        raise Skip(f"stream_to_youtube_live not importable: {e}")
+    return build_ffmpeg_cmd
+
+
+def _test_clip(work: str, seconds: int) -> str:
+    clip = os.path.join(work, "clip.mp4")
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size=1920x1080:rate=30:duration={seconds}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-g", "60", "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-shortest", clip,
+        ],
+        check=True,
+    )
+    return clip
+
+
+def bench_encode(work: str) -> Metrics:
+    _require_ffmpeg()
+    from ffmpeg_runner import run_ffmpeg
+    from render_chunks import VIDEO_ARGS
+
+    clip = _test_clip(work, 10)
+    snapshots = []
+    cmd = ["ffmpeg", "-y", "-i", clip, *VIDEO_ARGS, "-c:a", "aac", os.path.join(work, "encoded.mp4")]
+    seconds = _timed(lambda: run_ffmpeg(cmd, progress=snapshots.append, tag="bench-encode"))
+    frames = snapshots[-1]["frame"] if snapshots else 0
+    return {"seconds_s": seconds, "encode_fps": frames / seconds}
+
+
+def bench_stream(work: str) -> Metrics:
+    _require_ffmpeg()
+    from ffmpeg_runner import run_ffmpeg
+
+    build_ffmpeg_cmd = _stream_cmd_builder()
+    clip = _test_clip(work, 6)
+    metrics = {}
+    for mode, copy in (("reencode", False), ("copy", True)):
+        with FlvSink() as sink:
+            started = time.perf_counter()
+            run_ffmpeg(build_ffmpeg_cmd(clip, 12, sink.url, copy=copy), progress=lambda s: None, tag=f"bench-{mode}")
+            wall = time.perf_counter() - started
+            result = sink.result()
+        if not result.get("media_seconds"):
+            raise RuntimeError(f"sink received no media in {mode} mode")
+        metrics[f"{mode}_realtime_factor"] = result["realtime_factor"]
+        metrics[f"{mode}_first_frame_s"] = result["time_to_first_frame_s"]
+        metrics[f"{mode}_wall_s"] = wall
+    return metrics
+
+
+def bench_fanout(work: str) -> Metrics:
+    _require_ffmpeg()
+    from fanout_relay import FanoutRelay
+    from ffmpeg_runner import run_ffmpeg
+
+    build_ffmpeg_cmd = _stream_cmd_builder()
+    clip = _test_clip(work, 6)
+    with FlvSink() as primary, FlvSink() as backup:
+        relay = FanoutRelay({"primary": primary.url, "backup": backup.url}, os.path.join(work, "metrics"))
+        with relay:
+            run_ffmpeg(build_ffmpeg_cmd(clip, 12, relay.url), progress=lambda s: None, tag="bench-fanout")
+            time.sleep(1)  # let the pushers drain
+        results = [primary.result(), backup.result()]
+    if not all(r.get("media_seconds") for r in results):
+        raise RuntimeError("a fan-out destination received no media")
+    return {
+        "min_realtime_factor": min(r["realtime_factor"] for r in results),
+        "max_first_frame_s": max(r["time_to_first_frame_s"] for r in results),
+        "media_lost_s": max(0.0, 12 - min(r["media_seconds"] for r in results)),
+    }
+
+
+SCENARIOS: Dict[str, Callable[[str], Metrics]] = {
+    "download": bench_download,
+    "stock": bench_stock,
+    "image": bench_image,
+    "pollinations_video": bench_pollinations_video,
+    "startup": bench_startup,
+    "validate": bench_validate,
+    "encode": bench_encode,
+    "stream": bench_stream,
+    "fanout": bench_fanout,
+    "golive": bench_golive,
+}
+
+
+def peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(name: str) -> None:
+    work = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    try:
+        metrics = SCENARIOS[name](work)
+        metrics["peak_rss_mb"] = peak_rss_mb()
+        if name in ("encode", "stream", "fanout"):
+            metrics["ffmpeg_peak_rss_mb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        print(json.dumps({"metrics": metrics}))
+    except Skip as e:
+        print(json.dumps({"skipped": str(e)}))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+# -- parent ----------------------------------------------------------------------
+
+def run_scenario(name: str, env: Dict[str, str]) -> Dict:
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--child", name],
+        cwd=SCRIPTS_DIR, env=env, stdout=subprocess.PIPE, text=True,
+    )
+    output, _ = process.communicate()
+    lines = [line for line in output.splitlines() if line.startswith("{")]
+    if process.returncode != 0 or not lines:
+        return {"error": f"exit code {process.returncode}", "output": output[-2000:]}
+    return json.loads(lines[-1])
+
+
+def better_when_higher(metric: str) -> Optional[bool]:
+    if metric.endswith(("_mbps", "_fps", "realtime_factor")):
+        return True
+    if metric.endswith(("_s", "_mb")):
+        return False
+    return None
+
+
+def compare(results: Dict[str, Dict], baselines: Dict[str, Metrics], tolerance: float) -> List[str]:
+    regressions = []
+    print(f"\n{'scenario':<20} {'metric':<34} {'value':>10} {'baseline':>10} {'change':>8}")
+    for name, result in results.items():
+        if "metrics" not in result:
+            print(f"{name:<20} {result.get('skipped') or result.get('error')}")
+            continue
+        for metric, value in sorted(result["metrics"].items()):
+            base = baselines.get(name, {}).get(metric)
+            if base is None or not base:
+                print(f"{name:<20} {metric:<34} {value:>10.3f} {'-':>10} {'':>8}")
+                continue
+            change = (value - base) / base
+            higher = better_when_higher(metric)
+            worse = higher is not None and (change < -tolerance if higher else change > tolerance)
+            flag = "  REGRESSION" if worse else ""
+            print(f"{name:<20} {metric:<34} {value:>10.3f} {base:>10.3f} {change:>+7.1%}{flag}")
+            if worse:
+                regressions.append(f"{name}.{metric}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help=f"subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before each response")
+    parser.add_argument("--bandwidth", type=float, default=200.0, help="Mbit/s per response (0 = unlimited)")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--video-mb", type=int, default=48, help="stock video payload size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=float(os.getenv("BENCH_TOLERANCE", "0.10")))
+    parser.add_argument("--check", action="store_true", help="exit 1 on regressions")
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    conditions = Conditions(
+        latency=args.latency,
+        bandwidth=args.bandwidth * 1e6 / 8,
+        failure_rate=args.failure_rate,
+        drop_rate=args.drop_rate,
+        seed=args.seed,
+    )
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    results: Dict[str, Dict] = {}
+    with Standins(conditions, video_bytes=args.video_mb * 1024 * 1024) as standins:
+        # The stand-in payloads only carry the right magic bytes, so the
+        # fetch scenarios validate headers; `validate` measures ffprobe checks.
+        env = dict(
+            os.environ, **standins.env(), ASSET_CACHE_DISABLE="1", MEDIA_VALIDATE="sniff", PYTHONUNBUFFERED="1"
+        )
+        for name in names:
+            print(f"[run_bench] {name}...", flush=True)
+            results[name] = run_scenario(name, env)
+        served = dict(standins.stats)
+
+    try:
+        with open(BASELINES_PATH, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    except (OSError, ValueError):
+        baselines = {}
+    regressions = compare(results, baselines, args.tolerance)
+    missing = [name for name, result in results.items() if "metrics" in result and name not in baselines]
+    errored = [name for name, result in results.items() if "error" in result]
+    print(f"\n[run_bench] stand-ins: {served}")
+
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+        json.dump({"time": time.time(), "conditions": vars(conditions), "results": results}, f, indent=2)
+
+    if args.update_baselines:
+        for name, result in results.items():
+            if "metrics" in result:
+                baselines[name] = result["metrics"]
+        with open(BASELINES_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"[run_bench] Baselines written to {BASELINES_PATH}")
+
+    if missing and not args.update_baselines:
+        print(f"[run_bench] No baseline for: {', '.join(missing)} (record one with --update-baselines)")
+    if regressions:
+        print(f"[run_bench] {len(regressions)} regression(s): {', '.join(regressions)}")
+    if errored:
+        print(f"[run_bench] {len(errored)} scenario(s) failed: {', '.join(errored)}")
+    if args.check and (regressions or errored or (missing and not args.update_baselines)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
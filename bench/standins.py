@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Local HTTP stand-ins for the Pexels, Pollinations and Hugging Face APIs, and
+an in-process stand-in for the YouTube Live API (``FakeYouTubeLive``).
+
+One threaded server answers every route the asset scripts use:
+
+  GET  /videos/search        Pexels search JSON; file links point back here
+  GET  /media/<name>         stock video bytes (HEAD and Range supported)
+  GET  /prompt/<prompt>      Pollinations image (JPEG)
+  GET  /image/<prompt>       Pollinations video (MP4)
+  POST /<anything>           Hugging Face text-to-video (MP4)
+
+``Conditions`` controls the network: time to first byte, per-response
+bandwidth, the fraction of requests answered ``503`` with ``Retry-After``,
+and the fraction of bodies cut off half-way. Failures are drawn from a
+seeded RNG, so a run is reproducible.
+
+Point the scripts at it with PEXELS_API_URL, POLLINATIONS_IMAGE_URL,
+POLLINATIONS_VIDEO_URL and HF_INFERENCE_URL (see ``Standins.env()``).
+"""
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+WRITE_BLOCK = 64 * 1024
+
+MP4_HEADER = b"\x00\x00\x00\x18ftypisom\x00\x00\x02\x00isomiso2"
+JPEG_HEADER = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+JPEG_TRAILER = b"\xff\xd9"
+
+
+@dataclass
+class Conditions:
+    latency: float = 0.05  # seconds before the response starts
+    bandwidth: float = 0.0  # bytes/s per response; 0 = unlimited
+    failure_rate: float = 0.0  # fraction answered 503 + Retry-After
+    drop_rate: float = 0.0  # fraction of bodies cut off half-way
+    seed: int = 0
+
+
+def fake_payload(kind: str, size: int, seed: int = 0) -> bytes:
+    """Bytes with the right magic for ``kind`` ("mp4" or "jpeg") and incompressible filler."""
+    body = random.Random(seed).randbytes(size)
+    if kind == "jpeg":
+        return JPEG_HEADER + body[len(JPEG_HEADER):size - len(JPEG_TRAILER)] + JPEG_TRAILER
+    return MP4_HEADER + body[len(MP4_HEADER):]
+
+
+def pexels_search_payload(base_url: str, query: str, page: int, per_page: int) -> Dict:
+    videos = []
+    for i in range(per_page):
+        video_id = page * 1000 + i
+        videos.append(
+            {
+                "id": video_id,
+                "width": 1920,
+                "height": 1080,
+                "duration": 20,
+                "url": f"https://www.pexels.com/video/{video_id}/",
+                "image": f"{base_url}/media/{video_id}.jpg",
+                "user": {"id": 1, "name": "Bench", "url": "https://www.pexels.com/@bench"},
+                "video_files": [
+                    {"id": video_id * 10 + 1, "quality": "sd", "file_type": "video/mp4",
+                     "width": 960, "height": 540, "fps": 25, "link": f"{base_url}/media/{video_id}-sd.mp4"},
+                    {"id": video_id * 10 + 2, "quality": "hd", "file_type": "video/mp4",
+                     "width": 1920, "height": 1080, "fps": 25, "link": f"{base_url}/media/{video_id}-hd.mp4"},
+                ],
+                "video_pictures": [],
+            }
+        )
+    return {
+        "page": page,
+        "per_page": per_page,
+        "total_results": per_page * 3,
+        "url": f"https://www.pexels.com/search/videos/{query}/",
+        "videos": videos,
+    }
+
+
+class Standins:
+    def __init__(
+        self,
+        conditions: Optional[Conditions] = None,
+        video_bytes: int = 48 * 1024 * 1024,
+        image_bytes: int = 400 * 1024,
+        ai_video_bytes: int = 2 * 1024 * 1024,
+    ) -> None:
+        self.conditions = conditions or Conditions()
+        self.payloads = {
+            "video": fake_payload("mp4", video_bytes, 1),
+            "image": fake_payload("jpeg", image_bytes, 2),
+            "ai_video": fake_payload("mp4", ai_video_bytes, 3),
+        }
+        self.stats = {"requests": 0, "failures_injected": 0, "drops_injected": 0, "bytes_served": 0}
+        self._rng = random.Random(self.conditions.seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        return {
+            "PEXELS_API_URL": f"{self.url}/videos/search",
+            "PEXELS_API_KEY": "bench",
+            "POLLINATIONS_IMAGE_URL": self.url,
+            "POLLINATIONS_VIDEO_URL": self.url,
+            "HF_INFERENCE_URL": f"{self.url}/models/text-to-video",
+            "HF_TOKEN": "bench",
+        }
+
+    def __enter__(self) -> "Standins":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="standins", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _draw(self) -> Tuple[bool, bool]:
+        with self._lock:
+            self.stats["requests"] += 1
+            fail = self._rng.random() < self.conditions.failure_rate
+            drop = not fail and self._rng.random() < self.conditions.drop_rate
+            self.stats["failures_injected"] += fail
+            self.stats["drops_injected"] += drop
+            return fail, drop
+
+    def _handler_class(self):
+        standins = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _route(self) -> Tuple[Optional[bytes], str]:
+                path, _, query = self.path.partition("?")
+                if path == "/videos/search":
+                    params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+                    payload = pexels_search_payload(
+                        standins.url, params.get("query", ""), int(params.get("page", 1)), int(params.get("per_page", 15))
+                    )
+                    return json.dumps(payload).encode("utf-8"), "application/json"
+                if path.startswith("/media/"):
+                    return standins.payloads["video"], "video/mp4"
+                if path.startswith("/prompt/"):
+                    return standins.payloads["image"], "image/jpeg"
+                if path.startswith("/image/"):
+                    return standins.payloads["ai_video"], "video/mp4"
+                return None, "text/plain"
+
+            def _respond(self, send_body: bool) -> None:
+                conditions = standins.conditions
+                if conditions.latency:
+                    time.sleep(conditions.latency)
+                fail, drop = standins._draw()
+                if fail:
+                    self.send_response(503)
+                    self.send_header("Retry-After", "1")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body, content_type = self._route()
+                if self.command == "POST":
+                    length = int(self.headers.get("Content-Length") or 0)
+                    self.rfile.read(length)
+                    body, content_type = standins.payloads["ai_video"], "video/mp4"
+                if body is None:
+                    self.send_error(404)
+                    return
+
+                start, end = 0, len(body) - 1
+                match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+                if match:
+                    start = int(match.group(1))
+                    end = min(end, int(match.group(2))) if match.group(2) else end
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+                else:
+                    self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(end - start + 1))
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("X-Ratelimit-Remaining", "20000")
+                self.end_headers()
+                if send_body:
+                    self._send(memoryview(body)[start:end + 1], drop)
+
+            def _send(self, view: memoryview, drop: bool) -> None:
+                limit = len(view) // 2 if drop else len(view)
+                bandwidth = standins.conditions.bandwidth
+                started = time.monotonic()
+                sent = 0
+                while sent < limit:
+                    block = view[sent:min(limit, sent + WRITE_BLOCK)]
+                    self.wfile.write(block)
+                    sent += len(block)
+                    if bandwidth:
+                        ahead = sent / bandwidth - (time.monotonic() - started)
+                        if ahead > 0:
+                            time.sleep(ahead)
+                with standins._lock:
+                    standins.stats["bytes_served"] += sent
+                if drop:
+                    self.close_connection = True
+                    self.wfile.flush()
+                    self.connection.shutdown(2)
+
+            def do_HEAD(self) -> None:
+                self._respond(send_body=False)
+
+            def do_GET(self) -> None:
+                try:
+                    self._respond(send_body=True)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up; fine for a stand-in
+
+            def do_POST(self) -> None:
+                self.do_GET()
+
+        return Handler
+
+
+class FakeApiError(Exception):
+    pass
+
+
+class _Request:
+    """What a googleapiclient method returns: nothing happens until ``execute``."""
+
+    def __init__(self, api: "FakeYouTubeLive", name: str, call: Callable[[], Dict]) -> None:
+        self.api, self.name, self.call = api, name, call
+
+    def execute(self) -> Dict:
+        started = time.monotonic()
+        time.sleep(self.api.latency)
+        with self.api.lock:
+            self.api.calls += 1
+            try:
+                return self.call()
+            finally:
+                self.api.log.append((self.name, started, time.monotonic()))
+
+
+class FakeYouTubeLive:
+    """In-process stand-in for the liveStreams / liveBroadcasts resources.
+
+    Every call takes ``latency`` seconds and is appended to ``log`` as
+    ``(method, started, finished)``. The ingest stream is ``active`` once
+    ``receiving()`` is true (e.g. an FlvSink got its first tag). Each explicit
+    transition takes ``transition_seconds``; ``ready`` -> ``live`` is allowed
+    only when the broadcast was created with the monitor stream disabled.
+    With ``enableAutoStart`` the broadcast goes live ``auto_start_seconds``
+    after the stream turns active; the default, one transition, is the same
+    wait the explicit path sees. Each broadcast records ``live_at``, the
+    moment it actually went live.
+    """
+
+    STREAM_ID = "bench-stream"
+
+    def __init__(
+        self,
+        ingest_url: str,
+        receiving: Callable[[], bool],
+        latency: float = 0.3,
+        transition_seconds: float = 1.0,
+        auto_start_seconds: Optional[float] = None,
+    ) -> None:
+        self.ingest_url = ingest_url
+        self.receiving = receiving
+        self.latency = latency
+        self.transition_seconds = transition_seconds
+        self.auto_start_seconds = transition_seconds if auto_start_seconds is None else auto_start_seconds
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.log: List[Tuple[str, float, float]] = []
+        self.broadcasts: Dict[str, Dict] = {}
+        self._active_since: Optional[float] = None
+
+    def _stream_active(self) -> bool:
+        if self._active_since is None and self.receiving():
+            self._active_since = time.monotonic()
+        return self._active_since is not None
+
+    def _lifecycle(self, broadcast: Dict) -> str:
+        now = time.monotonic()
+        pending = broadcast.get("pending")
+        if pending and now >= pending[1]:
+            broadcast["status"], broadcast["pending"] = pending[0], None
+            if pending[0] == "live":
+                broadcast["live_at"] = pending[1]
+        if (
+            broadcast["status"] == "ready"
+            and broadcast["auto_start"]
+            and self._stream_active()
+            and now >= self._active_since + self.auto_start_seconds
+        ):
+            broadcast["status"] = "live"
+            broadcast["live_at"] = self._active_since + self.auto_start_seconds
+        return broadcast["status"]
+
+    def liveStreams(self) -> "FakeYouTubeLive":
+        return self
+
+    def liveBroadcasts(self) -> "_FakeBroadcasts":
+        return _FakeBroadcasts(self)
+
+    # liveStreams().list / insert
+    def list(self, part: str, id: Optional[str] = None, **kwargs) -> _Request:
+        def call() -> Dict:
+            status = "active" if self._stream_active() else "ready"
+            return {"items": [{
+                "id": self.STREAM_ID,
+                "status": {"streamStatus": status},
+                "cdn": {"ingestionInfo": {"ingestionAddress": self.ingest_url, "streamName": ""}},
+            }]}
+        return _Request(self, "liveStreams.list", call)
+
+
+class _FakeBroadcasts:
+    def __init__(self, api: FakeYouTubeLive) -> None:
+        self.api = api
+
+    def insert(self, part: str, body: Dict) -> _Request:
+        def call() -> Dict:
+            broadcast_id = f"bench-broadcast-{len(self.api.broadcasts) + 1}"
+            details = body.get("contentDetails", {})
+            self.api.broadcasts[broadcast_id] = {
+                "status": "created",
+                "auto_start": details.get("enableAutoStart", False),
+                "monitor": details.get("monitorStream", {}).get("enableMonitorStream", True),
+                "pending": None,
+                "live_at": None,
+            }
+            return {"id": broadcast_id}
+        return _Request(self.api, "liveBroadcasts.insert", call)
+
+    def bind(self, part: str, id: str, streamId: str) -> _Request:
+        def call() -> Dict:
+            self.api.broadcasts[id]["status"] = "ready"
+            return {"id": id}
+        return _Request(self.api, "liveBroadcasts.bind", call)
+
+    def transition(self, broadcastStatus: str, id: str, part: str) -> _Request:
+        def call() -> Dict:
+            broadcast = self.api.broadcasts[id]
+            current = self.api._lifecycle(broadcast)
+            allowed = {"testing": ("ready", "testStarting"), "live": ("testing", "liveStarting")}[broadcastStatus]
+            if broadcastStatus == "live" and not broadcast["monitor"]:
+                allowed += ("ready",)
+            if current == broadcastStatus:
+                raise FakeApiError("redundantTransition")
+            if current not in allowed or not self.api._stream_active():
+                raise FakeApiError(f"invalidTransition from {current}")
+            starting = "testStarting" if broadcastStatus == "testing" else "liveStarting"
+            broadcast["status"] = starting
+            broadcast["pending"] = (broadcastStatus, time.monotonic() + self.api.transition_seconds)
+            return {"id": id, "status": {"lifeCycleStatus": starting}}
+        return _Request(self.api, "liveBroadcasts.transition", call)
+
+    def list(self, part: str, id: str) -> _Request:
+        def call() -> Dict:
+            return {"items": [{"id": id, "status": {"lifeCycleStatus": self.api._lifecycle(self.api.broadcasts[id])}}]}
+        return _Request(self.api, "liveBroadcasts.list", call)
+
+
+if __name__ == "__main__":
+    with Standins() as servers:
+        print(f"[standins] Serving on {servers.url}")
+        for name, value in servers.env().items():
+            print(f"export {name}='{value}'")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
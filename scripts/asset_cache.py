@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+On-disk asset cache keyed by provider plus request identity.
+
+Blobs live under ``<root>/blobs/<key[:2]>/<key>`` where ``key`` is the
+SHA-256 of the provider name and a canonical JSON encoding of the request
+identity (e.g. Pexels video id + file id, or prompt + seed + resolution).
+JSON API responses are stored the same way under ``<root>/json`` and expire
+after a TTL. Every write goes through a temp file and ``os.replace``; the
+total blob size is kept under a byte budget by evicting the least recently
+used entries (access time is tracked with ``os.utime`` on every hit).
+
+Configuration:
+  ASSET_CACHE_DIR        cache root (default: cache)
+  ASSET_CACHE_MAX_BYTES  blob budget in bytes (default: 5 GiB)
+  ASSET_CACHE_DISABLE    set to 1 to bypass the cache entirely
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_ROOT = "cache"
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+
+
+def cache_key(provider: str, identity: Dict[str, Any]) -> str:
+    canonical = json.dumps(identity, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{provider}\0{canonical}".encode("utf-8")).hexdigest()
+
+
+class AssetCache:
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None) -> None:
+        self.root = root or os.getenv("ASSET_CACHE_DIR", DEFAULT_ROOT)
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.getenv("ASSET_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+        )
+        self.enabled = os.getenv("ASSET_CACHE_DISABLE", "") not in {"1", "true", "yes"}
+        self.blob_dir = os.path.join(self.root, "blobs")
+        self.json_dir = os.path.join(self.root, "json")
+        self.stats_path = os.path.join(self.root, "stats.json")
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "bytes_evicted": 0}
+
+    def _path(self, base: str, key: str, suffix: str = "") -> str:
+        return os.path.join(base, key[:2], key + suffix)
+
+    def _write_atomic(self, path: str, write) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _record(self, event: str) -> None:
+        self.stats[event] += 1
+
+    # -- blobs ---------------------------------------------------------------
+
+    def lookup(self, provider: str, identity: Dict[str, Any]) -> Optional[str]:
+        if not self.enabled:
+            return None
+        path = self._path(self.blob_dir, cache_key(provider, identity))
+        if not os.path.isfile(path):
+            self._record("misses")
+            return None
+        os.utime(path)
+        self._record("hits")
+        return path
+
+    def fetch(self, provider: str, identity: Dict[str, Any], dest: str) -> bool:
+        """Materialize a cached blob at ``dest``; returns False on a miss."""
+        path = self.lookup(provider, identity)
+        if path is None:
+            return False
+        # Copy rather than hardlink: downstream ffmpeg -y rewrites outputs in
+        # place and would corrupt a shared inode.
+        tmp = f"{dest}.part"
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, dest)
+        return True
+
+    def store(self, provider: str, identity: Dict[str, Any], src: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        path = self._path(self.blob_dir, cache_key(provider, identity))
+
+        def copy(f) -> None:
+            with open(src, "rb") as source:
+                shutil.copyfileobj(source, f, 1024 * 1024)
+
+        self._write_atomic(path, copy)
+        self._record("stores")
+        self.evict()
+        return path
+
+    def evict(self) -> int:
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.blob_dir):
+            for name in filenames:
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_atime, st.st_size, path))
+                total += st.st_size
+
+        freed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total - freed <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            freed += size
+            self._record("evictions")
+            self.stats["bytes_evicted"] += size
+        return freed
+
+    # -- JSON responses ------------------------------------------------------
+
+    def get_json(self, provider: str, identity: Dict[str, Any], ttl: Optional[float] = None) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        path = self._path(self.json_dir, cache_key(provider, identity), ".json")
+        try:
+            age = time.time() - os.stat(path).st_mtime
+            if ttl is not None and age > ttl:
+                self._record("misses")
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._record("misses")
+            return None
+        self._record("hits")
+        return value
+
+    def put_json(self, provider: str, identity: Dict[str, Any], value: Any) -> None:
+        if not self.enabled:
+            return
+        path = self._path(self.json_dir, cache_key(provider, identity), ".json")
+        self._write_atomic(path, lambda f: f.write(json.dumps(value).encode("utf-8")))
+        self._record("stores")
+
+    # -- statistics ----------------------------------------------------------
+
+    def flush_stats(self) -> Dict[str, int]:
+        """Fold this process's counters into the persisted totals."""
+        if not self.enabled:
+            return dict(self.stats)
+        totals = {key: 0 for key in self.stats}
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                totals.update(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        for key, value in self.stats.items():
+            totals[key] = totals.get(key, 0) + value
+        self._write_atomic(self.stats_path, lambda f: f.write(json.dumps(totals, indent=2).encode("utf-8")))
+        self.stats = {key: 0 for key in self.stats}
+        return totals
+
+
+if __name__ == "__main__":
+    cache = AssetCache()
+    if len(sys.argv) > 1 and sys.argv[1] == "evict":
+        freed = cache.evict()
+        print(f"[asset_cache] Evicted {freed} bytes")
+    print(json.dumps(cache.flush_stats(), indent=2))
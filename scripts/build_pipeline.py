@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Incremental build of the stream video as a DAG of content-hashed stages.
+
+    prompt ─┬─ image ─┬─ visuals ─┬─ mux ── loop ── publish
+            ├─ stock ─┘           │
+            └─ audio ─────────────┘
+
+Each stage runs the same scripts as create_base_video.sh / loop_video.sh.
+Its key is a hash of the stage's parameters (including the environment
+variables that change its output), the scripts it runs, and the content
+hashes of its inputs. A stage whose key already has an artifact under
+PIPELINE_DIR is skipped, and so is everything downstream whose inputs come
+out identical. Changing only the upload title reruns only ``publish``; a new
+audio file reruns ``audio``, ``mux``, ``loop`` and ``publish`` and reuses
+the visuals. Stages whose inputs are ready run concurrently (image, stock and
+audio all start as soon as the prompt exists).
+
+``image`` and ``stock`` may fail (network, quota); failures are not cached,
+and downstream stages fall back exactly like the shell scripts do. Streaming
+is never cached; uploads are cached per video and metadata.
+
+Usage: build_pipeline.py [total_hours] [--publish none|upload|stream] [--force STAGE ...] [--dry-run]
+
+Configuration:
+  PIPELINE_SEED        prompt seed; fix it to rebuild incrementally (default: random per run)
+  PIPELINE_DIR         artifact store (default: output/build)
+  PIPELINE_AUDIO_FILE  use this audio file instead of synthesizing a soundscape
+  PIPELINE_KEEP        artifacts kept per stage (default: 2)
+  BASE_VIDEO_DURATION_SECONDS, STREAM_DURATION_HOURS and the stage scripts' own variables
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from generate_unique_prompt import generate_prompt
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_VERSION = 1
+HASH_BLOCK = 4 * 1024 * 1024
+
+
+@dataclass
+class Context:
+    seed: int
+    total_hours: float
+    base_seconds: int
+    publish: str
+    store: str
+    # (path, size, mtime_ns) -> sha256, persisted so big artifacts are hashed once
+    hashes: Dict[str, List] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+@dataclass
+class Stage:
+    name: str
+    deps: List[str]
+    run: Callable[[Context, Dict[str, Optional[str]], str], Optional[bool]]
+    ext: str
+    scripts: List[str] = field(default_factory=list)
+    env: List[str] = field(default_factory=list)  # variables that change the output
+    params: Callable[[Context], Dict] = lambda ctx: {}
+    optional: bool = False  # failure yields no artifact instead of stopping the build
+    always: Callable[[Context], bool] = lambda ctx: False  # side effect; never skipped
+
+
+def file_sha256(ctx: Context, path: str) -> str:
+    st = os.stat(path)
+    with ctx.lock:
+        cached = ctx.hashes.get(path)
+    if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    with ctx.lock:
+        ctx.hashes[path] = [st.st_size, st.st_mtime_ns, digest.hexdigest()]
+    return digest.hexdigest()
+
+
+def run(cmd: List[str], env: Optional[Dict[str, str]] = None) -> bool:
+    return subprocess.run(cmd, env=dict(os.environ, **(env or {}))).returncode == 0
+
+
+def script(name: str) -> str:
+    return os.path.join(SCRIPTS_DIR, name)
+
+
+def load_prompt(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def theme_env(params: Dict, ctx: Context) -> Dict[str, str]:
+    return {
+        "DURATION_SECONDS": str(ctx.base_seconds),
+        "RAIN_INTENSITY": str(params["rain_intensity"]),
+        "WIND_SPEED": str(params["wind_speed"]),
+        "COLOR_SHIFT": params["color_shift"],
+    }
+
+
+# -- stages ----------------------------------------------------------------------
+
+def build_prompt(ctx: Context, inputs: Dict[str, Optional[str]], out: str) -> bool:
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(generate_prompt(ctx.seed), f)
+    return True
+
+
+def build_image(ctx: Context, inputs: Dict[str, Optional[str]], out: str) -> bool:
+    prompt = load_prompt(inputs["prompt"])["prompt"]
+    return run([sys.executable, script("generate_ai_image.py"), prompt, out]) and os.path.exists(out)
+
+
+def build_stock(ctx: Context, inputs: Dict[str, Optional[str]], out: str) -> bool:
+    prompt = load_prompt(inputs["prompt"])["prompt"]
+    return run([sys.executable, script("fetch_stock_video.py"), prompt, out]) and os.path.exists(out)
+
+
+def build_audio(ctx: Context, inputs: Dict[str, Optional[str]], out: str) -> bool:
+    supplied = os.getenv("PIPELINE_AUDIO_FILE", "")
+    if supplied:
+        shutil.copyfile(supplied, out)
+        return True
+    params = load_prompt(inputs["prompt"])
+    return run([script("generate_soundscape.sh"), out, params["ffmpeg_theme"]], theme_env(params, ctx))
+
+
+def audio_params(ctx: Context) -> Dict:
+    supplied = os.getenv("PIPELINE_AUDIO_FILE", "")
+    return {"audio_file": file_sha256(ctx, supplied) if supplied else None, "seconds": ctx.base_seconds}
+
+
+def still_fast_path(inputs: Dict[str, Optional[str]]) -> bool:
+    return os.getenv("STILL_RENDER", "0") == "1" and not inputs["stock"] and bool(inputs["image"])
+
+
+def build_visuals(ctx: Context, inputs: Dict[str, Optional[str]], out: str) -> Optional[bool]:
+    if still_fast_path(inputs):
+        return None  # mux renders straight from the image
+    params = load_prompt(inputs["prompt"])
+    theme = params["ffmpeg_theme"]
+    env = theme_env(params, ctx)
+    if inputs["stock"]:
+        master = f"{out}.master.mp4"
+        try:
+            ok = run([script("make_seamless_loop.sh"), inputs["stock"], master, "60"], env)
+            return ok and run([script("generate_video_theme.sh"), out, theme, master], env)
+        finally:
+            if os.path.exists(master):
+                os.remove(master)
+    if os.getenv("VISUALS_ENGINE", "ffmpeg") == "python":
+        return run(
+            [sys.executable, script("procedural_visuals.py"), out, theme, str(ctx.base_seconds), inputs["image"] or ""],
+            env,
+        )
+    return run([script("generate_video_theme.sh"), out, theme, inputs["image"] or ""], env)
+
+
+def build_mux(ctx: Context, inputs: Dict[str, Optional[str]], out: str) -> bool:
+    if still_fast_path(inputs):
+        return run(
+            [sys.executable, script("still_render.py"), inputs["image"], inputs["audio"], out, str(ctx.base_seconds)]
+        )
+    # Same as step 3 of create_base_video.sh
+    return run(
+        [
+            "ffmpeg", "-y", "-v", "error", "-nostdin",
+            "-stream_loop", "-1", "-i", inputs["visuals"],
+            "-i", inputs["audio"],
+            "-c:v", "libx264", "-preset", "ultrafast", "-crf", "22",
+            "-vf", "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2,format=yuv420p",
+            "-c:a", "aac", "-b:a", "128k",
+            "-t", str(ctx.base_seconds),
+            out,
+        ]
+    )
+
+
+def build_loop(ctx: Context, inputs: Dict[str, Optional[str]], out: str) -> bool:
+    env = {
+        "BASE_VIDEO": inputs["mux"],
+        "LOOP_OUTPUT_FILE": out,
+        "BASE_VIDEO_DURATION_SECONDS": str(ctx.base_seconds),
+    }
+    return run([script("loop_video.sh"), str(ctx.total_hours)], env)
+
+
+def build_publish(ctx: Context, inputs: Dict[str, Optional[str]], out: str) -> Optional[bool]:
+    if ctx.publish == "none":
+        return None
+    if ctx.publish == "stream":
+        hours = os.getenv("STREAM_DURATION_HOURS", "6")
+        return run([sys.executable, script("stream_to_youtube_live.py"), inputs["loop"], hours])
+    if not run([sys.executable, script("upload_to_youtube.py"), inputs["loop"]]):
+        return False
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"uploaded": time.time(), "video": inputs["loop"]}, f)
+    return True
+
+
+STAGES = [
+    Stage("prompt", [], build_prompt, ".json", ["generate_unique_prompt.py"], params=lambda ctx: {"seed": ctx.seed}),
+    Stage("image", ["prompt"], build_image, ".jpg", ["generate_ai_image.py"], optional=True),
+    Stage("stock", ["prompt"], build_stock, ".mp4", ["fetch_stock_video.py"], optional=True),
+    Stage(
+        "audio", ["prompt"], build_audio, ".mp3", ["generate_soundscape.sh", "soundscape_synth.py"],
+        env=["SOUNDSCAPE_ENGINE", "SOUNDSCAPE_CYCLE_SECONDS"], params=audio_params,
+    ),
+    Stage(
+        "visuals", ["prompt", "image", "stock"], build_visuals, ".mp4",
+        ["make_seamless_loop.sh", "generate_video_theme.sh", "procedural_visuals.py", "loop_point.py"],
+        env=["VISUALS_ENGINE", "VISUALS_CYCLE_SECONDS", "LOOP_METHOD", "LOOP_MIN_SECONDS", "LOOP_MAX_SCORE",
+             "LOOP_CROSSFADE", "STILL_RENDER"],
+        params=lambda ctx: {"seconds": ctx.base_seconds},
+    ),
+    Stage(
+        "mux", ["visuals", "audio", "image", "stock"], build_mux, ".mp4", ["still_render.py"],
+        env=["STILL_RENDER", "STILL_SEGMENT_SECONDS", "STILL_GOP_SECONDS", "STILL_MOTION"],
+        params=lambda ctx: {"seconds": ctx.base_seconds},
+    ),
+    Stage(
+        "loop", ["mux"], build_loop, ".mp4", ["loop_video.sh", "render_chunks.py", "mp4_assemble.py"],
+        env=["CONTAINER_LOOP", "PARALLEL_RENDER", "RENDER_CHUNK_SECONDS"],
+        params=lambda ctx: {"hours": ctx.total_hours},
+    ),
+    Stage(
+        "publish", ["loop"], build_publish, ".json", ["upload_to_youtube.py", "upload_manager.py"],
+        env=["YT_TITLE_TEMPLATE", "YT_DESCRIPTION", "YT_TAGS", "YT_PRIVACY_STATUS", "STREAM_DURATION_HOURS"],
+        params=lambda ctx: {"mode": ctx.publish},
+        always=lambda ctx: ctx.publish == "stream",
+    ),
+]
+
+
+# -- engine ----------------------------------------------------------------------
+
+class Pipeline:
+    def __init__(self, ctx: Context, stages: List[Stage], force: Optional[List[str]] = None) -> None:
+        self.ctx = ctx
+        self.stages = {stage.name: stage for stage in stages}
+        self.force = set(force or [])
+        self.outputs: Dict[str, Optional[str]] = {}
+        self.status: Dict[str, str] = {}
+        self.state_path = os.path.join(ctx.store, "hashes.json")
+        os.makedirs(ctx.store, exist_ok=True)
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                ctx.hashes.update(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    def key(self, stage: Stage) -> str:
+        ctx = self.ctx
+        material = {
+            "version": PIPELINE_VERSION,
+            "stage": stage.name,
+            "params": stage.params(ctx),
+            "env": {name: os.getenv(name) for name in stage.env},
+            "scripts": {name: file_sha256(ctx, script(name)) for name in stage.scripts if os.path.exists(script(name))},
+            "inputs": {dep: file_sha256(ctx, self.outputs[dep]) if self.outputs[dep] else None for dep in stage.deps},
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+
+    def _paths(self, stage: Stage, key: str):
+        base = os.path.join(self.ctx.store, f"{stage.name}-{key}")
+        return base + stage.ext, base + ".done"
+
+    def cached(self, stage: Stage, key: str) -> Optional[Dict]:
+        if stage.always(self.ctx) or stage.name in self.force:
+            return None
+        artifact, marker = self._paths(stage, key)
+        try:
+            with open(marker, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if record["output"] and not os.path.exists(artifact):
+            return None
+        return record
+
+    def execute(self, stage: Stage, key: str) -> Optional[str]:
+        artifact, marker = self._paths(stage, key)
+        tmp = f"{artifact}.part{stage.ext}"
+        started = time.monotonic()
+        print(f"[build_pipeline] {stage.name}: building ({key})", flush=True)
+        inputs = {dep: self.outputs[dep] for dep in stage.deps}
+        try:
+            ok = stage.run(self.ctx, inputs, tmp)
+        except Exception as e:  # a failing stage should report, not kill sibling threads
+            print(f"[build_pipeline] {stage.name}: {type(e).__name__}: {e}", flush=True)
+            ok = False
+        if ok is False:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            if stage.optional:
+                print(f"[build_pipeline] {stage.name}: failed; continuing without it", flush=True)
+                self.status[stage.name] = "failed (optional)"
+                return None
+            self.status[stage.name] = "failed"
+            raise RuntimeError(f"stage {stage.name} failed")
+
+        output = None
+        if ok and os.path.exists(tmp):
+            os.replace(tmp, artifact)
+            output = artifact
+        if not stage.always(self.ctx):
+            with open(marker, "w", encoding="utf-8") as f:
+                json.dump({"output": output, "built": time.time()}, f)
+        self.status[stage.name] = f"built in {time.monotonic() - started:.1f}s" if output else "not applicable"
+        self.prune(stage)
+        return output
+
+    def prune(self, stage: Stage) -> None:
+        keep = int(os.getenv("PIPELINE_KEEP", "2"))
+        markers = sorted(
+            (entry for entry in os.scandir(self.ctx.store) if entry.name.startswith(f"{stage.name}-") and entry.name.endswith(".done")),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True,
+        )
+        for entry in markers[keep:]:
+            base = entry.path[: -len(".done")]
+            for path in (entry.path, base + stage.ext):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def run(self, dry_run: bool = False) -> Dict[str, Optional[str]]:
+        pending = dict(self.stages)
+        running: Dict[Future, Stage] = {}
+        with ThreadPoolExecutor(max_workers=len(self.stages)) as pool:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if not all(dep in self.outputs for dep in stage.deps):
+                        continue
+                    del pending[name]
+                    key = self.key(stage)
+                    record = self.cached(stage, key)
+                    if record is not None:
+                        self.outputs[name] = record["output"] and self._paths(stage, key)[0]
+                        self.status[name] = "cached"
+                        print(f"[build_pipeline] {name}: up to date ({key})", flush=True)
+                    elif dry_run:
+                        # Downstream keys are unknown until this stage really runs.
+                        self.status[name] = "would build"
+                        print(f"[build_pipeline] {name}: would build ({key})", flush=True)
+                        for other in pending:
+                            self.status[other] = "would build"
+                        return self.outputs
+                    else:
+                        running[pool.submit(self.execute, stage, key)] = stage
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    self.outputs[stage.name] = future.result()
+        return self.outputs
+
+    def save(self) -> None:
+        tmp = f"{self.state_path}.tmp"
+        with self.ctx.lock:
+            live = {path: entry for path, entry in self.ctx.hashes.items() if os.path.exists(path)}
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(live, f)
+        os.replace(tmp, self.state_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incremental build of the stream video.")
+    parser.add_argument("total_hours", nargs="?", type=float, default=0.25)
+    parser.add_argument("--publish", choices=["none", "upload", "stream"], default="none")
+    parser.add_argument("--force", nargs="*", default=[], help="stages to rebuild even if cached")
+    parser.add_argument("--dry-run", action="store_true", help="show what would be rebuilt")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.force if name not in {stage.name for stage in STAGES}]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    seed = os.getenv("PIPELINE_SEED")
+    if not seed:  # the workflow passes an empty seed input through as ""
+        seed = str(random.randint(0, 2 ** 31))
+        print(f"[build_pipeline] Prompt seed {seed} (set PIPELINE_SEED={seed} to rebuild incrementally)")
+    ctx = Context(
+        seed=int(seed),
+        total_hours=args.total_hours,
+        base_seconds=int(os.getenv("BASE_VIDEO_DURATION_SECONDS", "30")),
+        publish=args.publish,
+        store=os.getenv("PIPELINE_DIR", os.path.join("output", "build")),
+    )
+    pipeline = Pipeline(ctx, STAGES, force=args.force)
+    started = time.monotonic()
+    failure = None
+    try:
+        outputs = pipeline.run(dry_run=args.dry_run)
+    except RuntimeError as e:
+        failure, outputs = e, {}
+    finally:
+        pipeline.save()
+
+    print(f"[build_pipeline] Summary ({time.monotonic() - started:.1f}s):")
+    for stage in STAGES:
+        print(f"  {stage.name:<8} {pipeline.status.get(stage.name, 'not reached')}")
+    if failure:
+        raise SystemExit(f"[build_pipeline] Error: {failure}")
+    final = outputs.get("loop")
+    if final and not args.dry_run:
+        # Also publish under the name loop_video.sh uses.
+        hours = f"{args.total_hours:g}".replace(".", "_")
+        link = os.path.join("output", f"cozy_{hours}_hour_stream.mp4")
+        if os.path.lexists(link):
+            os.remove(link)
+        try:
+            os.link(final, link)
+        except OSError:
+            shutil.copyfile(final, link)
+        print(f"[build_pipeline] Final video: {link}")
+
+
+if __name__ == "__main__":
+    main()
@@ -107,9 +107,20 @@ if [[ "${VIDEO_SUCCESS}" == "true" ]]; then
     VIDEO_SUCCESS="true"
 else
     echo "[create_base_video] Falling back to AI Image + Synthetic Effects."
-    chmod +x "./scripts/generate_video_theme.sh"
     export DURATION_SECONDS="${BASE_DURATION_SECONDS}"
-    ./scripts/generate_video_theme.sh "${OUTPUT_DIR}/generated_video_theme.mp4" "${ACTUAL_THEME}" "${TARGET_BG_IMAGE}"
+    if [[ "${STILL_RENDER:-0}" == "1" && -n "${TARGET_BG_IMAGE}" ]]; then
+        # Encode one segment of the still and repeat it by stream copy
+        ./venv/bin/python3 ./scripts/still_render.py "${TARGET_BG_IMAGE}" "${GENERATED_AUDIO}" "${BASE_VIDEO}" "${BASE_DURATION_SECONDS}"
+        echo "[create_base_video] Done. Base video created at: ${BASE_VIDEO}"
+        exit 0
+    fi
+    if [[ "${VISUALS_ENGINE:-ffmpeg}" == "python" ]]; then
+        # NumPy particle renderer: draws one seamless cycle and loops it
+        ./venv/bin/python3 ./scripts/procedural_visuals.py "${OUTPUT_DIR}/generated_video_theme.mp4" "${ACTUAL_THEME}" "${BASE_DURATION_SECONDS}" "${TARGET_BG_IMAGE}"
+    else
+        chmod +x "./scripts/generate_video_theme.sh"
+        ./scripts/generate_video_theme.sh "${OUTPUT_DIR}/generated_video_theme.mp4" "${ACTUAL_THEME}" "${TARGET_BG_IMAGE}"
+    fi
     VIDEO_SUCCESS="true"
 fi
 
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Streaming, resumable, segmented HTTP downloader shared by the asset fetchers.
+
+Bodies are streamed to ``<dest>.part`` in fixed-size chunks and renamed into
+place only once complete, so a partially written file never appears under the
+final name. A dropped connection resumes with an HTTP ``Range`` request from
+the last byte on disk, and large files on servers that advertise
+``Accept-Ranges: bytes`` are fetched as parallel byte ranges.
+
+With ``expect`` ("video" or "image") the first bytes of the body are checked
+against known media signatures (media_validate.check_head) before anything
+is written, so an error page served with status 200 fails the download at
+once instead of ending up on disk under a media file name.
+"""
+import asyncio
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from http_client import RETRY_STATUSES, retry_after_seconds
+from media_validate import SNIFF_BYTES, ValidationError, check_head
+
+CHUNK_SIZE = 1024 * 1024
+SEGMENT_MIN_BYTES = 32 * 1024 * 1024
+SEGMENTS = 4
+MAX_RETRIES = 5
+RETRY_BACKOFF = 1.0
+
+RETRYABLE_ERRORS = (httpx.TransportError,)
+
+
+class DownloadError(Exception):
+    pass
+
+
+def part_path(dest: str) -> str:
+    return f"{dest}.part"
+
+
+def save_bytes_atomic(data: bytes, dest: str) -> int:
+    # For SDKs that only hand back a bytes object (e.g. InferenceClient):
+    # at least never leave a truncated file under the final name.
+    tmp = part_path(dest)
+    with open(tmp, "wb") as f:
+        for start in range(0, len(data), CHUNK_SIZE):
+            f.write(data[start:start + CHUNK_SIZE])
+    os.replace(tmp, dest)
+    return len(data)
+
+
+def _check_head(head: bytes, expect: str, url: str) -> None:
+    try:
+        check_head(head, expect)
+    except ValidationError as e:
+        raise DownloadError(f"Not a valid {expect} at {url}: {e}") from e
+
+
+def _content_range_start(response: httpx.Response) -> Optional[int]:
+    # "bytes 100-199/1000" -> 100
+    value = response.headers.get("Content-Range", "")
+    if not value.startswith("bytes "):
+        return None
+    try:
+        return int(value[6:].split("-", 1)[0])
+    except ValueError:
+        return None
+
+
+async def _probe(client: httpx.AsyncClient, url: str, headers: Dict[str, str]) -> Tuple[Optional[int], bool]:
+    try:
+        response = await client.head(url, headers=headers, follow_redirects=True)
+    except httpx.HTTPError:
+        return None, False
+    if response.status_code != 200:
+        return None, False
+    length = response.headers.get("Content-Length")
+    ranged = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+    return (int(length) if length and length.isdigit() else None), ranged
+
+
+async def _stream_single(
+    client: httpx.AsyncClient,
+    url: str,
+    tmp: str,
+    headers: Dict[str, str],
+    chunk_size: int,
+    retries: int,
+    expect: Optional[str] = None,
+) -> int:
+    written = 0
+    attempt = 0
+    with open(tmp, "wb") as f:
+        while True:
+            request_headers = dict(headers)
+            if written:
+                request_headers["Range"] = f"bytes={written}-"
+            try:
+                async with client.stream("GET", url, headers=request_headers, follow_redirects=True) as response:
+                    if written and response.status_code == 206 and _content_range_start(response) == written:
+                        pass  # resuming where we left off
+                    elif response.status_code == 200:
+                        if written:
+                            print(f"[downloader] Server ignored Range, restarting {url}")
+                            f.seek(0)
+                            f.truncate()
+                            written = 0
+                    elif response.status_code in RETRY_STATUSES and attempt < retries:
+                        attempt += 1
+                        delay = retry_after_seconds(response) or RETRY_BACKOFF * (2 ** (attempt - 1))
+                        print(f"[downloader] HTTP {response.status_code} for {url}; retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                        continue
+                    else:
+                        raise DownloadError(f"HTTP {response.status_code} for {url}")
+
+                    # Hold back the first bytes of a fresh body until they are sniffed.
+                    head = b"" if expect and not written else None
+                    async for chunk in response.aiter_bytes(chunk_size):
+                        if head is not None:
+                            head += chunk
+                            if len(head) < SNIFF_BYTES:
+                                continue
+                            _check_head(head, expect, url)
+                            chunk, head = head, None
+                        f.write(chunk)
+                        written += len(chunk)
+                    if head is not None:  # body shorter than SNIFF_BYTES
+                        _check_head(head, expect, url)
+                        f.write(head)
+                        written += len(head)
+                return written
+            except RETRYABLE_ERRORS as e:
+                attempt += 1
+                if attempt > retries:
+                    raise DownloadError(f"Giving up on {url} after {retries} retries: {e}") from e
+                delay = RETRY_BACKOFF * (2 ** (attempt - 1))
+                print(f"[downloader] Connection dropped at {written} bytes ({e}); resuming in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+
+async def _fetch_range(
+    client: httpx.AsyncClient,
+    url: str,
+    tmp: str,
+    headers: Dict[str, str],
+    start: int,
+    end: int,
+    chunk_size: int,
+    retries: int,
+    expect: Optional[str] = None,
+) -> None:
+    position = start
+    attempt = 0
+    with open(tmp, "r+b") as f:
+        while position <= end:
+            request_headers = dict(headers)
+            request_headers["Range"] = f"bytes={position}-{end}"
+            try:
+                async with client.stream("GET", url, headers=request_headers, follow_redirects=True) as response:
+                    if response.status_code != 206 or _content_range_start(response) != position:
+                        raise DownloadError(f"Range request rejected ({response.status_code}) for {url}")
+                    f.seek(position)
+                    async for chunk in response.aiter_bytes(chunk_size):
+                        if expect and position == 0:
+                            _check_head(chunk[:SNIFF_BYTES], expect, url)
+                        chunk = chunk[: end + 1 - position]
+                        f.write(chunk)
+                        position += len(chunk)
+                        if position > end:
+                            break
+                if position <= end:
+                    raise httpx.RemoteProtocolError("Range body ended early")
+            except RETRYABLE_ERRORS as e:
+                attempt += 1
+                if attempt > retries:
+                    raise DownloadError(f"Giving up on bytes {position}-{end} of {url}: {e}") from e
+                await asyncio.sleep(RETRY_BACKOFF * (2 ** (attempt - 1)))
+
+
+async def _stream_segmented(
+    client: httpx.AsyncClient,
+    url: str,
+    tmp: str,
+    headers: Dict[str, str],
+    length: int,
+    segments: int,
+    chunk_size: int,
+    retries: int,
+    expect: Optional[str] = None,
+) -> int:
+    with open(tmp, "wb") as f:
+        f.truncate(length)
+
+    step = -(-length // segments)
+    ranges: List[Tuple[int, int]] = [
+        (start, min(start + step, length) - 1) for start in range(0, length, step)
+    ]
+    print(f"[downloader] Fetching {length} bytes as {len(ranges)} parallel ranges")
+    await asyncio.gather(
+        *(_fetch_range(client, url, tmp, headers, start, end, chunk_size, retries, expect) for start, end in ranges)
+    )
+    return length
+
+
+async def download(
+    url: str,
+    dest: str,
+    client: Optional[httpx.AsyncClient] = None,
+    headers: Optional[Dict[str, str]] = None,
+    segmented: bool = False,
+    segments: int = SEGMENTS,
+    chunk_size: int = CHUNK_SIZE,
+    retries: int = MAX_RETRIES,
+    timeout: float = 60.0,
+    expect: Optional[str] = None,
+) -> int:
+    """Download ``url`` to ``dest`` and return the number of bytes written.
+
+    ``segmented`` issues a HEAD first and, when the server reports a length of
+    at least ``SEGMENT_MIN_BYTES`` and byte-range support, splits the body into
+    ``segments`` concurrent range requests. Leave it off for endpoints where a
+    HEAD would trigger a second generation (e.g. Pollinations). ``expect``
+    ("video" or "image") rejects bodies that do not start like that media.
+    """
+    headers = dict(headers or {})
+    own_client = client is None
+    if own_client:
+        client = httpx.AsyncClient(timeout=timeout)
+
+    tmp = part_path(dest)
+    try:
+        length, ranged = (None, False)
+        if segmented and segments > 1:
+            length, ranged = await _probe(client, url, headers)
+
+        if length is not None and ranged and length >= SEGMENT_MIN_BYTES:
+            written = await _stream_segmented(
+                client, url, tmp, headers, length, segments, chunk_size, retries, expect
+            )
+        else:
+            written = await _stream_single(client, url, tmp, headers, chunk_size, retries, expect)
+
+        os.replace(tmp, dest)
+        return written
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    finally:
+        if own_client:
+            await client.aclose()
+
+
+def download_sync(url: str, dest: str, **kwargs) -> int:
+    return asyncio.run(download(url, dest, **kwargs))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: downloader.py <url> <output_path>")
+        sys.exit(1)
+
+    try:
+        size = download_sync(sys.argv[1], sys.argv[2], segmented=True)
+    except (DownloadError, httpx.HTTPError) as e:
+        print(f"[downloader] Error: {e}")
+        sys.exit(1)
+    print(f"[downloader] Saved {size} bytes to: {sys.argv[2]}")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Render the looped output and upload it to YouTube at the same time.
+
+ffmpeg writes a fragmented MP4 (``empty_moov`` + one fragment per keyframe)
+to stdout, so the file is only ever appended to and every byte is final as
+soon as it is written. A spool thread appends ffmpeg's output to
+``<output_mp4>`` and advances a write frontier; ``GrowingFileUpload`` hands
+completed byte ranges to the resumable upload session and blocks at the
+frontier until the encoder has produced the next chunk. The total size is
+reported only once encoding finishes, which is when the upload is finalised.
+Build-to-published time is roughly the longer of encode and upload rather
+than their sum.
+
+Usage: encode_and_upload.py <base_video> <total_hours> [output_mp4]
+
+Metadata and credentials come from the same environment variables as
+upload_to_youtube.py; the chunk size from YT_UPLOAD_CHUNK_MB.
+"""
+import os
+import subprocess
+import sys
+import threading
+from typing import BinaryIO, List, Optional
+
+from googleapiclient.http import MediaUpload
+
+from render_chunks import FPS, VIDEO_ARGS
+from upload_manager import chunk_size_from_env, upload_video
+from upload_to_youtube import service_factory, video_bodies
+
+SPOOL_BLOCK = 1024 * 1024
+
+
+class GrowingFileUpload(MediaUpload):
+    """Resumable media backed by a file that is still being appended to."""
+
+    def __init__(self, path: str, chunksize: int, mimetype: str = "video/mp4") -> None:
+        super().__init__()
+        self._path = path
+        self._chunksize = chunksize
+        self._mimetype = mimetype
+        self._written = 0
+        self._finished = False
+        self._failed = False
+        self._cond = threading.Condition()
+        self._fd: Optional[BinaryIO] = None
+
+    # -- producer side ---------------------------------------------------------
+
+    def advance(self, written: int) -> None:
+        with self._cond:
+            self._written = written
+            self._cond.notify_all()
+
+    def finish(self, ok: bool = True) -> None:
+        with self._cond:
+            self._finished = True
+            self._failed = not ok
+            self._cond.notify_all()
+
+    # -- MediaUpload interface -------------------------------------------------
+
+    def chunksize(self) -> int:
+        return self._chunksize
+
+    def mimetype(self) -> str:
+        return self._mimetype
+
+    def size(self) -> Optional[int]:
+        # Unknown until the encoder is done; the client then sends "bytes a-b/*".
+        with self._cond:
+            return self._written if self._finished else None
+
+    def resumable(self) -> bool:
+        return True
+
+    def has_stream(self) -> bool:
+        return False
+
+    def getbytes(self, begin: int, length: int) -> bytes:
+        """Blocks until ``[begin, begin + length)`` is on disk or encoding ends.
+
+        A short read tells the client this is the last chunk.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._finished or self._written >= begin + length)
+            if self._failed:
+                raise RuntimeError("encoder failed; not finalising the upload")
+        if self._fd is None:
+            self._fd = open(self._path, "rb")
+        self._fd.seek(begin)
+        return self._fd.read(length)
+
+    def to_json(self) -> str:
+        raise NotImplementedError("GrowingFileUpload cannot be serialised")
+
+
+def build_encode_cmd(base_video: str, total_seconds: float) -> List[str]:
+    return [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-stream_loop", "-1", "-i", base_video,
+        "-t", f"{total_seconds:.3f}",
+        *VIDEO_ARGS,
+        "-c:a", "aac", "-b:a", "128k",
+        # Append-only layout: no moov rewrite at the end, unlike +faststart.
+        "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+        "-f", "mp4",
+        "pipe:1",
+    ]
+
+
+def spool(process: subprocess.Popen, output_file: str, media: GrowingFileUpload) -> None:
+    written = 0
+    ok = False
+    try:
+        with open(output_file, "wb") as f:
+            while True:
+                block = process.stdout.read(SPOOL_BLOCK)
+                if not block:
+                    break
+                f.write(block)
+                f.flush()
+                written += len(block)
+                media.advance(written)
+        ok = process.wait() == 0
+    finally:
+        media.finish(ok)
+
+
+def encode_and_upload(base_video: str, total_seconds: float, output_file: str) -> Optional[str]:
+    make_service = service_factory()
+    body = video_bodies()[0]
+    media = GrowingFileUpload(output_file, chunk_size_from_env())
+
+    cmd = build_encode_cmd(base_video, total_seconds)
+    print(f"[encode_and_upload] Encoding {total_seconds:.0f}s at {FPS} fps while uploading '{body['snippet']['title']}'")
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    spooler = threading.Thread(target=spool, args=(process, output_file, media), name="spool", daemon=True)
+    spooler.start()
+
+    try:
+        result = upload_video(make_service(), output_file, body, media=media)
+    except BaseException:
+        if process.poll() is None:
+            process.kill()
+        raise
+    finally:
+        spooler.join()
+
+    if process.returncode != 0:
+        print(f"[encode_and_upload] ffmpeg exited with code {process.returncode}")
+        return None
+    print(f"[encode_and_upload] Upload complete. Video ID: {result.video_id}")
+    return result.video_id
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: encode_and_upload.py <base_video> <total_hours> [output_mp4]")
+        sys.exit(1)
+
+    hours = float(sys.argv[2])
+    output = sys.argv[3] if len(sys.argv) > 3 else os.path.join("output", f"cozy_{sys.argv[2]}_hour_stream.mp4")
+    video_id = encode_and_upload(sys.argv[1], hours * 3600, output)
+    sys.exit(0 if video_id else 1)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Pre-flight calibration of the live x264 settings for this host.
+
+A few seconds of the actual input are encoded with the live encode arguments
+at each candidate ``-preset`` (fastest first) and thread count, as fast as
+possible into the null muxer. The realtime factor is media seconds per wall
+second. The slowest (best quality) preset that still reaches ``margin`` x
+realtime with its best thread count wins; since presets are tried in order of
+cost, the search stops at the first one that misses the margin.
+
+The choice is cached (AssetCache JSON, "encoder-autotune") per host
+fingerprint (CPU model, usable cores, CPU quota, memory, ffmpeg version) and
+input resolution and frame rate, so later runs on the same kind of runner
+skip the calibration.
+
+Usage: encoder_autotune.py <input_video>
+
+Configuration:
+  AUTOTUNE_SECONDS   media seconds encoded per candidate (default: 6)
+  AUTOTUNE_MARGIN    realtime factor the choice must sustain (default: 1.3)
+  AUTOTUNE_PRESETS   candidates, fastest first (default: ultrafast,superfast,veryfast,faster,fast,medium)
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from asset_cache import AssetCache
+from media_probe import ProbeError, first_stream, parse_rate, probe
+
+DEFAULT_PRESETS = "ultrafast,superfast,veryfast,faster,fast,medium"
+CALIBRATION_VERSION = 1
+
+
+def _read_first(path: str, prefix: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(prefix):
+                    return line.split(":", 1)[-1].strip()
+    except OSError:
+        pass
+    return ""
+
+
+def usable_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def host_fingerprint() -> Dict[str, Any]:
+    try:
+        with open("/sys/fs/cgroup/cpu.max", "r", encoding="utf-8") as f:
+            cpu_quota = f.read().strip()
+    except OSError:
+        cpu_quota = ""
+    try:
+        ffmpeg = subprocess.run(["ffmpeg", "-version"], stdout=subprocess.PIPE, text=True).stdout.split("\n", 1)[0]
+    except OSError:
+        ffmpeg = ""
+    return {
+        "machine": platform.machine(),
+        "cpu": _read_first("/proc/cpuinfo", "model name") or platform.processor(),
+        "cores": usable_cores(),
+        "cpu_quota": cpu_quota,
+        "mem_total": _read_first("/proc/meminfo", "MemTotal"),
+        "ffmpeg": ffmpeg,
+    }
+
+
+def input_signature(path: str) -> Dict[str, Any]:
+    try:
+        stream = first_stream(probe(path), "video") or {}
+    except ProbeError:
+        stream = {}
+    return {
+        "width": stream.get("width"),
+        "height": stream.get("height"),
+        "fps": round(parse_rate(stream.get("avg_frame_rate")), 3),
+    }
+
+
+def with_settings(encode_args: Sequence[str], preset: str, threads: int) -> List[str]:
+    """``encode_args`` with the preset replaced and an explicit x264 thread count."""
+    args = list(encode_args)
+    if "-preset" in args:
+        args[args.index("-preset") + 1] = preset
+    else:
+        args[args.index("-c:v") + 2:args.index("-c:v") + 2] = ["-preset", preset]
+    if "-threads" in args:
+        args[args.index("-threads") + 1] = str(threads)
+    else:
+        at = args.index("-preset") + 2
+        args[at:at] = ["-threads", str(threads)]
+    return args
+
+
+def measure(path: str, args: Sequence[str], seconds: float) -> float:
+    """Realtime factor of encoding ``seconds`` of ``path`` with ``args``."""
+    cmd = [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-stream_loop", "-1", "-i", path,
+        "-t", f"{seconds:.3f}",
+        *args,
+        "-f", "null", "-",
+    ]
+    started = time.monotonic()
+    subprocess.run(cmd, check=True)
+    return seconds / max(time.monotonic() - started, 1e-6)
+
+
+def calibrate(path: str, encode_args: Sequence[str], presets: Sequence[str], seconds: float, margin: float) -> Dict[str, Any]:
+    cores = usable_cores()
+    thread_counts = [0] if cores == 1 else [0, cores]  # 0 = x264's own choice
+    measurements = []
+    best: Optional[Dict[str, Any]] = None
+    for preset in presets:
+        speeds = {threads: measure(path, with_settings(encode_args, preset, threads), seconds) for threads in thread_counts}
+        threads = max(speeds, key=speeds.get)
+        result = {"preset": preset, "threads": threads, "realtime_factor": round(speeds[threads], 3)}
+        measurements.append(dict(result, speeds={str(t): round(s, 3) for t, s in speeds.items()}))
+        print(f"[encoder_autotune] {preset}: {speeds[threads]:.2f}x realtime (threads={threads or 'auto'})", flush=True)
+        if speeds[threads] < margin:
+            break  # slower presets will only be slower
+        best = result
+    if best is None:
+        first = measurements[0]
+        print(f"[encoder_autotune] Warning: even {first['preset']} stays below {margin}x on this host", flush=True)
+        best = {key: first[key] for key in ("preset", "threads", "realtime_factor")}
+    return dict(best, margin=margin, measurements=measurements)
+
+
+def tune(path: str, encode_args: Sequence[str], cache: Optional[AssetCache] = None) -> List[str]:
+    """The live encode arguments with the preset and thread count calibrated for this host."""
+    cache = cache or AssetCache()
+    presets = [p.strip() for p in os.getenv("AUTOTUNE_PRESETS", DEFAULT_PRESETS).split(",") if p.strip()]
+    seconds = float(os.getenv("AUTOTUNE_SECONDS", "6"))
+    margin = float(os.getenv("AUTOTUNE_MARGIN", "1.3"))
+    identity = {
+        "version": CALIBRATION_VERSION,
+        "host": host_fingerprint(),
+        "input": input_signature(path),
+        "encode_args": list(encode_args),
+        "presets": presets,
+        "margin": margin,
+    }
+    choice = cache.get_json("encoder-autotune", identity)
+    if choice is None:
+        print(f"[encoder_autotune] Calibrating on {seconds:.0f}s of {os.path.basename(path)}...", flush=True)
+        try:
+            choice = calibrate(path, encode_args, presets, seconds, margin)
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"[encoder_autotune] Calibration failed ({e}); keeping the default settings", flush=True)
+            return list(encode_args)
+        cache.put_json("encoder-autotune", identity, choice)
+    else:
+        print("[encoder_autotune] Using cached calibration for this host and input", flush=True)
+    cache.flush_stats()
+    print(
+        f"[encoder_autotune] Selected -preset {choice['preset']} -threads {choice['threads']} "
+        f"({choice['realtime_factor']}x realtime)",
+        flush=True,
+    )
+    return with_settings(encode_args, choice["preset"], choice["threads"])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: encoder_autotune.py <input_video>")
+        sys.exit(1)
+
+    from stream_to_youtube_live import ENCODE_ARGS
+
+    print(json.dumps(tune(sys.argv[1], ENCODE_ARGS)))
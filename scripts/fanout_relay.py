@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Encode once, push to several RTMP ingests.
+
+The encoder writes FLV to ``relay.url`` (a local ``tcp://`` listener) instead
+of an RTMP URL. The relay splits the stream into FLV tags and offers each tag
+to every destination's queue; each destination has its own ``ffmpeg -c copy``
+pusher fed from that queue. Unlike ffmpeg's tee muxer, where a slow ingest
+blocks the encoder and a failed one is dropped for good, destinations are
+isolated:
+
+- a destination more than ``buffer_seconds`` behind loses its queue and
+  resumes at the next video keyframe, without slowing anyone else;
+- a pusher that exits or stops making progress is restarted with backoff and
+  starts again from the cached FLV header, metadata and codec sequence
+  headers followed by the next keyframe.
+
+When the encoder is restarted (stream_supervisor) it reconnects to the same
+listener; its timestamps are shifted to continue the relay's timeline, so the
+pushers never see time go backwards.
+
+Every destination publishes its own metrics through a ProgressReporter named
+``relay_<name>`` (``relay_<name>.prom``, ``relay_<name>_progress.jsonl``):
+ffmpeg's progress fields plus bytes sent, dropped tags and restarts.
+"""
+import socket
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import BinaryIO, Deque, Dict, List, Optional
+
+from ffmpeg_progress import ProgressParser, ProgressReporter, Snapshot
+from ffmpeg_runner import run_ffmpeg
+
+FLV_HEADER_BYTES = 9
+TAG_HEADER_BYTES = 11
+AUDIO_TAG, VIDEO_TAG, SCRIPT_TAG = 8, 9, 18
+FRAME_GAP_MS = 33  # spacing inserted where an encoder restart is spliced in
+
+
+@dataclass
+class Tag:
+    kind: int
+    timestamp: int  # milliseconds, on the relay's timeline
+    data: bytes  # tag header + body + PreviousTagSize
+
+    @property
+    def body(self) -> bytes:
+        return self.data[TAG_HEADER_BYTES:-4]
+
+    @property
+    def keyframe(self) -> bool:
+        return self.kind == VIDEO_TAG and bool(self.body) and self.body[0] >> 4 == 1
+
+    @property
+    def sequence_header(self) -> bool:
+        """AVC decoder configuration or AAC AudioSpecificConfig."""
+        body = self.body
+        if self.kind == VIDEO_TAG:
+            return len(body) > 1 and body[0] & 0x0F == 7 and body[1] == 0
+        if self.kind == AUDIO_TAG:
+            return len(body) > 1 and body[0] >> 4 == 10 and body[1] == 0
+        return False
+
+    def retimed(self, timestamp: int) -> "Tag":
+        timestamp = max(0, timestamp)
+        stamp = bytes([(timestamp >> 16) & 0xFF, (timestamp >> 8) & 0xFF, timestamp & 0xFF, (timestamp >> 24) & 0xFF])
+        return Tag(self.kind, timestamp, self.data[:4] + stamp + self.data[8:])
+
+
+def read_tag(stream: BinaryIO) -> Optional[Tag]:
+    header = stream.read(TAG_HEADER_BYTES)
+    if len(header) < TAG_HEADER_BYTES:
+        return None
+    size = int.from_bytes(header[1:4], "big")
+    rest = stream.read(size + 4)
+    if len(rest) < size + 4:
+        return None
+    timestamp = int.from_bytes(header[4:7], "big") | (header[7] << 24)
+    return Tag(header[0] & 0x1F, timestamp, header + rest)
+
+
+def pusher_cmd(url: str) -> List[str]:
+    return [
+        "ffmpeg", "-hide_banner",
+        "-f", "flv", "-i", "pipe:0",
+        "-map", "0", "-c", "copy",
+        "-f", "flv", "-flvflags", "no_duration_filesize",
+        url,
+    ]
+
+
+class Destination:
+    def __init__(self, relay: "FanoutRelay", name: str, url: str, reporter: ProgressReporter) -> None:
+        self.relay = relay
+        self.name = name
+        self.url = url
+        self.reporter = reporter
+        self._queue: Deque[Tag] = deque()
+        self._cond = threading.Condition()
+        self._need_keyframe = True
+        self._process: Optional[subprocess.Popen] = None
+        self._last_advance = time.monotonic()
+        self._out_time = 0.0
+        self.bytes_sent = 0
+        self.tags_sent = 0
+        self.dropped_tags = 0
+        self.restarts = 0
+        self.thread = threading.Thread(target=self._run, name=f"relay-{name}", daemon=True)
+
+    # -- relay side (never blocks) ----------------------------------------------
+
+    def offer(self, tag: Tag) -> None:
+        with self._cond:
+            if self._queue and tag.timestamp - self._queue[0].timestamp > self.relay.buffer_seconds * 1000:
+                # Too far behind: drop the backlog and rejoin at the next keyframe.
+                self.dropped_tags += len(self._queue)
+                self._queue.clear()
+                self._need_keyframe = True
+                if self._process is not None:
+                    print(f"[fanout_relay] {self.name}: fell {self.relay.buffer_seconds:.0f}s behind; skipping ahead", flush=True)
+            if self._need_keyframe and not tag.sequence_header:
+                if not tag.keyframe:
+                    self.dropped_tags += 1
+                    return
+                self._need_keyframe = False
+            self._queue.append(tag)
+            self._cond.notify()
+
+    # -- pusher side ----------------------------------------------------------------
+
+    def _next(self, process: subprocess.Popen, timeout: float) -> Optional[Tag]:
+        with self._cond:
+            if not self._queue:
+                self._cond.wait(timeout)
+            if self._process is not process:
+                return None  # a replacement pusher owns the queue now
+            return self._queue.popleft() if self._queue else None
+
+    def _feed(self, stdin: BinaryIO) -> None:
+        # on_start runs before the feeder starts, so this is our own pusher. A
+        # feeder that outlives it must not take tags meant for the next one
+        # (above all the keyframe it resumes on).
+        with self._cond:
+            process = self._process
+            self._queue.clear()
+            self._need_keyframe = True
+        started = False
+        while not self.relay.stopping.is_set() and self._process is process and process.poll() is None:
+            tag = self._next(process, timeout=1.0)
+            if tag is None:
+                continue
+            if not started:
+                stdin.write(self.relay.preamble(tag.timestamp))
+                started = True
+            stdin.write(tag.data)
+            self.bytes_sent += len(tag.data)
+            self.tags_sent += 1
+
+    def _on_progress(self, snapshot: Snapshot) -> None:
+        if snapshot["out_time_seconds"] > self._out_time:
+            self._out_time = snapshot["out_time_seconds"]
+            self._last_advance = time.monotonic()
+        self.reporter.extra.update(
+            {
+                "relay_bytes_sent": self.bytes_sent,
+                "relay_tags_sent": self.tags_sent,
+                "relay_dropped_tags": self.dropped_tags,
+                "relay_restarts_total": self.restarts,
+                "relay_queue_tags": len(self._queue),
+                "relay_connected": 1,
+            }
+        )
+        self.reporter(snapshot)
+
+    def check_stall(self, timeout: float) -> None:
+        process = self._process
+        if process is None or process.poll() is not None or not self.relay.receiving:
+            return
+        if time.monotonic() - self._last_advance > timeout:
+            print(f"[fanout_relay] {self.name}: no progress for {timeout:.0f}s; restarting pusher", flush=True)
+            process.kill()
+
+    def _set_process(self, process: subprocess.Popen) -> None:
+        self._out_time = 0.0
+        self._last_advance = time.monotonic()
+        with self._cond:
+            self._process = process
+
+    def _run(self) -> None:
+        failures = 0
+        while not self.relay.stopping.is_set():
+            started = time.monotonic()
+            returncode = run_ffmpeg(
+                pusher_cmd(self.url),
+                feeder=self._feed,
+                progress=self._on_progress,
+                tag=f"relay-{self.name}",
+                on_start=self._set_process,
+            )
+            with self._cond:
+                self._process = None
+            if self.relay.stopping.is_set():
+                break
+            failures = 1 if time.monotonic() - started > 300 else failures + 1
+            delay = min(60.0, 2.0 ** (failures - 1))
+            self.restarts += 1
+            # Publish the outage even if this pusher never got far enough to report progress.
+            self.reporter.extra.update(
+                {"relay_restarts_total": self.restarts, "relay_connected": 0, "relay_dropped_tags": self.dropped_tags}
+            )
+            self.reporter(ProgressParser().feed("progress=end"))
+            print(
+                f"[fanout_relay] {self.name}: pusher exited with code {returncode}; "
+                f"restart {self.restarts} in {delay:.0f}s",
+                flush=True,
+            )
+            self.relay.stopping.wait(delay)
+        self.reporter.flush()
+
+
+class FanoutRelay:
+    def __init__(
+        self,
+        destinations: Dict[str, str],
+        metrics_dir: str,
+        buffer_seconds: float = 10.0,
+        stall_timeout: float = 30.0,
+        interval: float = 10.0,
+    ) -> None:
+        self.buffer_seconds = buffer_seconds
+        self.stall_timeout = stall_timeout
+        self.stopping = threading.Event()
+        self.receiving = False
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(("127.0.0.1", 0))
+        self._listener.listen(4)
+        self._header = b""
+        self._init_tags: Dict[str, Tag] = {}
+        self._lock = threading.Lock()
+        self._last_ts = -1
+        self.destinations = [
+            Destination(self, name, url, ProgressReporter(metrics_dir, name=f"relay_{name}", interval=interval))
+            for name, url in destinations.items()
+        ]
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self._listener.getsockname()
+        return f"tcp://{host}:{port}"
+
+    def __enter__(self) -> "FanoutRelay":
+        for destination in self.destinations:
+            destination.thread.start()
+        for target, name in ((self._accept, "relay-ingest"), (self._watchdog, "relay-watchdog")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(
+            f"[fanout_relay] Relaying {self.url} to {len(self.destinations)} destination(s): "
+            f"{', '.join(d.name for d in self.destinations)}",
+            flush=True,
+        )
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stopping.set()
+        self._listener.close()
+        for destination in self.destinations:
+            with destination._cond:
+                destination._cond.notify_all()
+            destination.thread.join(timeout=10)
+        for thread in self._threads:
+            thread.join(timeout=2)
+
+    def preamble(self, timestamp: int) -> bytes:
+        """FLV header, metadata and sequence headers for a pusher starting at ``timestamp``."""
+        with self._lock:
+            tags = [self._init_tags[key] for key in ("meta", "video", "audio") if key in self._init_tags]
+            return self._header + b"".join(tag.retimed(timestamp).data for tag in tags)
+
+    def _watchdog(self) -> None:
+        while not self.stopping.wait(1.0):
+            for destination in self.destinations:
+                destination.check_stall(self.stall_timeout)
+
+    def _accept(self) -> None:
+        # One encoder at a time; a restarted encoder connects after the old one is gone.
+        while not self.stopping.is_set():
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            try:
+                self._ingest(conn.makefile("rb", buffering=256 * 1024))
+            finally:
+                self.receiving = False
+                conn.close()
+
+    def _ingest(self, stream: BinaryIO) -> None:
+        header = stream.read(FLV_HEADER_BYTES + 4)
+        if len(header) < FLV_HEADER_BYTES + 4 or header[:3] != b"FLV":
+            print("[fanout_relay] Encoder connection did not start with an FLV header; ignored", flush=True)
+            return
+        with self._lock:
+            self._header = self._header or header
+        shift: Optional[int] = None
+        self.receiving = True
+        while True:
+            tag = read_tag(stream)
+            if tag is None:
+                return
+            if tag.kind not in (AUDIO_TAG, VIDEO_TAG, SCRIPT_TAG):
+                continue
+            if shift is None and tag.kind != SCRIPT_TAG:
+                # Continue the timeline across encoder restarts.
+                shift = 0 if self._last_ts < 0 else self._last_ts + FRAME_GAP_MS - tag.timestamp
+            tag = tag.retimed(tag.timestamp + (shift or 0))
+            if tag.kind != SCRIPT_TAG:
+                self._last_ts = max(self._last_ts, tag.timestamp)
+            if tag.kind == SCRIPT_TAG or tag.sequence_header:
+                with self._lock:
+                    self._init_tags["meta" if tag.kind == SCRIPT_TAG else "video" if tag.kind == VIDEO_TAG else "audio"] = tag
+                if tag.kind == SCRIPT_TAG:
+                    continue  # only sent in the preamble; pushers write their own metadata
+            for destination in self.destinations:
+                destination.offer(tag)
+
+
+def destination_urls(primary: str, backup: str = "", extra: str = "") -> Dict[str, str]:
+    """``{"primary": url, "backup": url, "extra1": url, ...}``; ``extra`` is comma-separated."""
+    destinations = {"primary": primary}
+    if backup:
+        destinations["backup"] = backup
+    for i, url in enumerate((u.strip() for u in extra.split(",")), start=1):
+        if url:
+            destinations[f"extra{i}"] = url
+    return destinations
@@ -1,25 +1,42 @@
 #!/usr/bin/env python3
 import sys
 import os
-import httpx
 import asyncio
 import random
 from pathlib import Path
 
+from asset_cache import AssetCache
+from downloader import DownloadError, download
+from http_client import borrowed_client, request_with_retry
+from media_validate import ValidationError, validate
+
 # PEXELS_API_KEY should be set in environment
 PEXELS_KEY = os.environ.get("PEXELS_API_KEY")
 
-async def search_pexels_video(query: str, output_path: str) -> bool:
+# Search responses are reused for this long before hitting the API again
+SEARCH_TTL_SECONDS = int(os.environ.get("PEXELS_SEARCH_TTL", 24 * 3600))
+
+# Overridable so the benchmark stand-ins can replace the real API
+PEXELS_API_URL = os.environ.get("PEXELS_API_URL", "https://api.pexels.com/videos/search")
+
+async def search_pexels_video(query: str, output_path: str, seed=None, client=None, gate=None) -> bool:
     if not PEXELS_KEY:
         print("[stock] ERROR: PEXELS_API_KEY not set.")
         return False
     
-    url = "https://api.pexels.com/videos/search"
+    # A fixed seed (PROMPT_SEED from generate_unique_prompt) picks the same
+    # page and clip again, so repeat builds are served from the cache.
+    if seed is None:
+        seed = os.environ.get("PROMPT_SEED")
+    rng = random.Random(seed) if seed is not None else random.Random()
+    cache = AssetCache()
+    
+    url = PEXELS_API_URL
     headers = {"Authorization": PEXELS_KEY}
     params = {
         "query": query,
         "per_page": 15,
-        "page": random.randint(1, 3),
+        "page": rng.randint(1, 3),
         "orientation": "landscape",
         "min_width": 1280
     }
@@ -27,52 +44,70 @@ async def search_pexels_video(query: str, output_path: str) -> bool:
     print(f"[stock] Searching Pexels for: {query}")
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, headers=headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                videos = data.get('videos', [])
-                if not videos:
-                    print(f"[stock] No videos found for query: {query}")
-                    return False
-                
-                # Pick a random video
-                video = random.choice(videos)
-                files = video.get('video_files', [])
-                
-                hd_file = None
-                # Prioritize 1920x1080
-                for f in files:
-                    if f.get('width') == 1920 and f.get('height') == 1080:
-                        hd_file = f
-                        break
-                
-                if not hd_file:
-                    # Fallback to any HD
-                    hd_file = next((f for f in files if f.get('quality') == 'hd'), None)
-                
-                if not hd_file and files:
-                    # Fallback to first available
-                    hd_file = files[0]
-                
-                if hd_file:
-                    video_url = hd_file['link']
-                    print(f"[stock] Downloading video ({hd_file.get('width')}x{hd_file.get('height')}): {video_url}")
-                    
-                    video_resp = await client.get(video_url, follow_redirects=True)
-                    if video_resp.status_code == 200:
-                        with open(output_path, "wb") as f:
-                            f.write(video_resp.content)
-                        print(f"[stock] Saved video to: {output_path}")
-                        return True
+        async with borrowed_client(client, 30.0) as client:
+            data = cache.get_json("pexels-search", params, ttl=SEARCH_TTL_SECONDS)
+            if data is not None:
+                print(f"[stock] Using cached search results (page {params['page']})")
             else:
-                print(f"[stock] API Error: {response.status_code}")
+                response = await request_with_retry(client, "GET", url, gate=gate, headers=headers, params=params)
+                if response.status_code != 200:
+                    print(f"[stock] API Error: {response.status_code}")
+                    return False
+                data = response.json()
+                cache.put_json("pexels-search", params, data)
+            
+            videos = data.get('videos', [])
+            if not videos:
+                print(f"[stock] No videos found for query: {query}")
                 return False
+            
+            # Pick a random video
+            video = rng.choice(videos)
+            files = video.get('video_files', [])
+            
+            hd_file = None
+            # Prioritize 1920x1080
+            for f in files:
+                if f.get('width') == 1920 and f.get('height') == 1080:
+                    hd_file = f
+                    break
+            
+            if not hd_file:
+                # Fallback to any HD
+                hd_file = next((f for f in files if f.get('quality') == 'hd'), None)
+            
+            if not hd_file and files:
+                # Fallback to first available
+                hd_file = files[0]
+            
+            if hd_file:
+                identity = {"video_id": video.get('id'), "file_id": hd_file.get('id')}
+                if cache.fetch("pexels-video", identity, output_path):
+                    print(f"[stock] Cache hit for video {identity['video_id']}; saved to: {output_path}")
+                    return True
+                
+                video_url = hd_file['link']
+                print(f"[stock] Downloading video ({hd_file.get('width')}x{hd_file.get('height')}): {video_url}")
                 
+                try:
+                    await download(video_url, output_path, client=client, segmented=True, expect="video")
+                    await asyncio.to_thread(validate, output_path, "video", cache)
+                except DownloadError as e:
+                    print(f"[stock] Download failed: {e}")
+                    return False
+                except ValidationError as e:
+                    print(f"[stock] Downloaded file is not usable: {e}")
+                    os.remove(output_path)
+                    return False
+                cache.store("pexels-video", identity, output_path)
+                print(f"[stock] Saved video to: {output_path}")
+                return True
+            
     except Exception as e:
         print(f"[stock] Exception during Pexels search: {e}")
         return False
+    finally:
+        cache.flush_stats()
     
     return False
 
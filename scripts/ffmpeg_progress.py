@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Structured telemetry from ffmpeg's ``-progress`` key/value output.
+
+ffmpeg emits a block of ``key=value`` lines ending in ``progress=continue``
+(or ``progress=end``) roughly every 0.5s. ``ProgressParser`` turns each block
+into a snapshot; ``ProgressReporter`` keeps the latest one, appends it to a
+JSON-lines log and rewrites a Prometheus textfile at a fixed interval, and
+raises an alert when the output has advanced slower than realtime for a
+sustained window, i.e. when the ingest is starving.
+"""
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+PROGRESS_ARGS = ["-progress", "pipe:1", "-nostats", "-loglevel", "warning"]
+
+Snapshot = Dict[str, Any]
+
+
+def _number(value: str) -> Optional[float]:
+    value = value.strip().rstrip("x").replace("kbits/s", "")
+    if not value or value == "N/A":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class ProgressParser:
+    def __init__(self) -> None:
+        self._block: Dict[str, str] = {}
+
+    def feed(self, line: str) -> Optional[Snapshot]:
+        """Consume one line; returns a snapshot when a block completes."""
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            return None
+        self._block[key] = value
+        if key != "progress":
+            return None
+
+        block, self._block = self._block, {}
+        out_time_us = _number(block.get("out_time_us", "") or block.get("out_time_ms", ""))
+        return {
+            "time": time.time(),
+            "frame": int(_number(block.get("frame", "")) or 0),
+            "fps": _number(block.get("fps", "")) or 0.0,
+            "bitrate_kbps": _number(block.get("bitrate", "")) or 0.0,
+            "total_size": int(_number(block.get("total_size", "")) or 0),
+            "out_time_seconds": (out_time_us or 0.0) / 1_000_000,
+            "speed": _number(block.get("speed", "")),
+            "drop_frames": int(_number(block.get("drop_frames", "")) or 0),
+            "dup_frames": int(_number(block.get("dup_frames", "")) or 0),
+            "ended": value == "end",
+        }
+
+
+class ProgressReporter:
+    """Consumes snapshots and publishes them as JSON lines and Prometheus metrics.
+
+    ``speed_alert`` is the realtime factor below which the encoder is falling
+    behind; an alert fires once the rate has stayed below it for
+    ``alert_window`` seconds and re-arms when it recovers. The rate is the
+    out_time advanced per wall-clock second since the previous snapshot, not
+    ffmpeg's cumulative ``speed``: on a ``-re`` push the startup (probe, RTMP
+    handshake) keeps that just under 1.0x for the whole run.
+    """
+
+    def __init__(
+        self,
+        metrics_dir: str,
+        name: str = "stream",
+        interval: float = 10.0,
+        speed_alert: float = 0.9,
+        alert_window: float = 30.0,
+        on_alert: Optional[Callable[[Snapshot], None]] = None,
+    ) -> None:
+        os.makedirs(metrics_dir, exist_ok=True)
+        self.jsonl_path = os.path.join(metrics_dir, f"{name}_progress.jsonl")
+        self.prom_path = os.path.join(metrics_dir, f"{name}.prom")
+        self.name = name
+        self.interval = interval
+        self.speed_alert = speed_alert
+        self.alert_window = alert_window
+        self.on_alert = on_alert
+        self.latest: Optional[Snapshot] = None
+        self.alerts = 0
+        self.extra: Dict[str, float] = {}
+        self._slow_since: Optional[float] = None
+        self._previous: Optional[Snapshot] = None
+        self._alerting = False
+        self._last_flush = 0.0
+
+    def __call__(self, snapshot: Snapshot) -> None:
+        self.latest = snapshot
+        self._check_speed(snapshot)
+        if snapshot["ended"] or snapshot["time"] - self._last_flush >= self.interval:
+            self.flush()
+
+    def _rate(self, snapshot: Snapshot) -> Optional[float]:
+        previous, self._previous = self._previous, snapshot
+        if previous is None:
+            return None
+        elapsed = snapshot["time"] - previous["time"]
+        advanced = snapshot["out_time_seconds"] - previous["out_time_seconds"]
+        if elapsed <= 0 or advanced < 0:  # same instant, or a restarted ffmpeg
+            return None
+        return advanced / elapsed
+
+    def _check_speed(self, snapshot: Snapshot) -> None:
+        rate = self._rate(snapshot)
+        if rate is None:
+            return
+        speed = round(rate, 2)
+        if speed >= self.speed_alert:
+            self._slow_since = None
+            if self._alerting:
+                print(f"[ffmpeg_progress] Encoder back at realtime (speed={speed}x)", flush=True)
+            self._alerting = False
+            return
+        if self._slow_since is None:
+            self._slow_since = snapshot["time"]
+        if not self._alerting and snapshot["time"] - self._slow_since >= self.alert_window:
+            self._alerting = True
+            self.alerts += 1
+            print(
+                f"[ffmpeg_progress] ALERT: encoder below realtime for {self.alert_window:.0f}s "
+                f"(speed={speed}x, fps={snapshot['fps']}); ingest is starving",
+                flush=True,
+            )
+            if self.on_alert:
+                self.on_alert(snapshot)
+
+    def flush(self) -> None:
+        snapshot = self.latest
+        if snapshot is None:
+            return
+        self._last_flush = snapshot["time"]
+        record = dict(snapshot, alerts=self.alerts, **self.extra)
+        with open(self.jsonl_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+        metrics = {
+            "frame": snapshot["frame"],
+            "fps": snapshot["fps"],
+            "bitrate_kbps": snapshot["bitrate_kbps"],
+            "output_bytes": snapshot["total_size"],
+            "out_time_seconds": snapshot["out_time_seconds"],
+            "speed": snapshot["speed"] if snapshot["speed"] is not None else float("nan"),
+            "dropped_frames": snapshot["drop_frames"],
+            "duplicated_frames": snapshot["dup_frames"],
+            "realtime_alerts": self.alerts,
+            "below_realtime": 1 if self._alerting else 0,
+            "last_update_timestamp": snapshot["time"],
+            **self.extra,
+        }
+        lines = [f'ffmpeg_{key}{{job="{self.name}"}} {value}' for key, value in metrics.items()]
+        tmp = f"{self.prom_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.prom_path)
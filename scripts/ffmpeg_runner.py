@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Run a long-lived ffmpeg process, forwarding its log output and optionally
+feeding its stdin from a background thread.
+
+With a ``progress`` callback, ffmpeg is started with ``-progress pipe:1
+-nostats -loglevel warning``: stdout then carries only the machine-readable
+progress blocks, which are parsed into snapshots, and stderr carries only
+warnings and errors, which are still echoed.
+"""
+import io
+import subprocess
+import threading
+from typing import BinaryIO, Callable, List, Optional
+
+from ffmpeg_progress import PROGRESS_ARGS, ProgressParser, Snapshot
+
+Feeder = Callable[[BinaryIO], None]
+ProgressCallback = Callable[[Snapshot], None]
+
+
+def _terminate(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        process.terminate()
+        process.wait()
+
+
+def _lines(stream: BinaryIO) -> io.TextIOWrapper:
+    # Universal newlines so "\r" progress updates arrive as separate lines.
+    return io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline=None)
+
+
+def with_progress_args(cmd: List[str]) -> List[str]:
+    return [cmd[0], *PROGRESS_ARGS, *cmd[1:]]
+
+
+def run_ffmpeg(
+    cmd: List[str],
+    feeder: Optional[Feeder] = None,
+    progress: Optional[ProgressCallback] = None,
+    tag: str = "ffmpeg",
+    on_start: Optional[Callable[[subprocess.Popen], None]] = None,
+) -> int:
+    """Run ``cmd`` to completion and return its exit code.
+
+    When ``feeder`` is given, ffmpeg's stdin is a pipe that ``feeder`` writes
+    to from its own thread; the pipe is closed once ``feeder`` returns.
+    ``on_start`` receives the Popen object, e.g. so a watchdog can stop it.
+    """
+    if progress:
+        cmd = with_progress_args(cmd)
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE if feeder else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE if progress else subprocess.STDOUT,
+    )
+    if on_start:
+        on_start(process)
+
+    threads = []
+    if feeder:
+        def feed() -> None:
+            try:
+                feeder(process.stdin)
+            except (BrokenPipeError, ValueError):
+                pass  # ffmpeg exited or stdin was closed under us
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+        threads.append(threading.Thread(target=feed, name=f"{tag}-feeder", daemon=True))
+
+    if progress:
+        def echo_stderr() -> None:
+            for line in _lines(process.stderr):
+                print(f"[{tag}] {line.rstrip()}", flush=True)
+
+        threads.append(threading.Thread(target=echo_stderr, name=f"{tag}-stderr", daemon=True))
+
+    for thread in threads:
+        thread.start()
+
+    try:
+        if progress:
+            parser = ProgressParser()
+            for line in _lines(process.stdout):
+                snapshot = parser.feed(line)
+                if snapshot is not None:
+                    progress(snapshot)
+        else:
+            # Monitor FFmpeg output
+            for line in _lines(process.stdout):
+                print(f"[{tag}] {line.rstrip()}", flush=True)
+        process.wait()
+    except BaseException:
+        _terminate(process)
+        raise
+    finally:
+        for thread in threads:
+            thread.join(timeout=5)
+
+    return process.returncode
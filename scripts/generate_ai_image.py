@@ -1,32 +1,57 @@
 #!/usr/bin/env python3
 import sys
 import os
-import httpx
 import asyncio
 import time
 
-async def generate_image(prompt, output_file):
-    encoded_prompt = prompt.replace(" ", "%20")
-    # Using a slightly different seed to avoid cache
-    url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=1920&height=1080&nologo=true&seed={int(time.time())}"
-    
-    print(f"[generate_ai_image] Requesting image from: {url}")
+from asset_cache import AssetCache
+from downloader import DownloadError, download
+from http_client import borrowed_client
+from media_validate import ValidationError, validate
+
+WIDTH = 1920
+HEIGHT = 1080
+
+# Overridable so the benchmark stand-ins can replace the real API
+POLLINATIONS_IMAGE_URL = os.environ.get("POLLINATIONS_IMAGE_URL", "https://image.pollinations.ai")
+
+async def generate_image(prompt, output_file, seed=None, client=None):
+    # Reuse PROMPT_SEED when the build exported one so the same prompt maps to
+    # the same image (and a cache hit); otherwise fall back to a fresh seed.
+    if seed is None:
+        seed = os.environ.get("PROMPT_SEED") or int(time.time())
+    identity = {"prompt": prompt, "seed": str(seed), "width": WIDTH, "height": HEIGHT}
+    cache = AssetCache()
     
     try:
+        if cache.fetch("pollinations-image", identity, output_file):
+            print(f"[generate_ai_image] Cache hit; image saved to: {output_file}")
+            return True
+        
+        encoded_prompt = prompt.replace(" ", "%20")
+        url = f"{POLLINATIONS_IMAGE_URL}/prompt/{encoded_prompt}?width={WIDTH}&height={HEIGHT}&nologo=true&seed={seed}"
+        
+        print(f"[generate_ai_image] Requesting image from: {url}")
+        
         # Increased timeout to 60 seconds
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(url, follow_redirects=True)
-            if response.status_code == 200:
-                with open(output_file, "wb") as f:
-                    f.write(response.content)
-                print(f"[generate_ai_image] Image saved to: {output_file}")
-                return True
-            else:
-                print(f"[generate_ai_image] Failed: Status {response.status_code}")
+        async with borrowed_client(client, 60.0) as client:
+            await download(url, output_file, client=client, expect="image")
+        try:
+            await asyncio.to_thread(validate, output_file, "image", cache)
+        except ValidationError:
+            os.remove(output_file)
+            raise
+        cache.store("pollinations-image", identity, output_file)
+        print(f"[generate_ai_image] Image saved to: {output_file}")
+        return True
+    except (DownloadError, ValidationError) as e:
+        print(f"[generate_ai_image] Failed: {e}")
         return False
     except Exception as e:
         print(f"[generate_ai_image] Error: {e}")
         return False
+    finally:
+        cache.flush_stats()
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
@@ -36,11 +61,11 @@ if __name__ == "__main__":
     output_file = sys.argv[2]
     
     try:
-        asyncio.run(generate_image(prompt, output_file))
+        success = asyncio.run(generate_image(prompt, output_file))
     except KeyboardInterrupt:
         print("[generate_ai_image] Interrupted by user.")
         sys.exit(1)
     except Exception as e:
         print(f"[generate_ai_image] Failed with error: {e}")
         sys.exit(1)
-    sys.exit(0)
+    sys.exit(0 if success else 1)
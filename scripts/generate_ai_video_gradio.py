@@ -4,43 +4,67 @@ import os
 import shutil
 from gradio_client import Client
 
+from media_validate import ValidationError, validate
+
 # Space identified as active and high quality
 SPACE_ID = "zai-org/CogVideoX-2B-Space"
 
-def generate_video(prompt, output_file):
-    print(f"[generate_ai_video_gradio] Connecting to Space: {SPACE_ID}")
+# One warm client per Space for the lifetime of the process: Client() fetches
+# and parses the Space's API schema, which is the bulk of connection setup.
+_CLIENTS = {}
+
+def get_client(space_id=SPACE_ID):
+    client = _CLIENTS.get(space_id)
+    if client is None:
+        print(f"[generate_ai_video_gradio] Connecting to Space: {space_id}")
+        client = Client(space_id)
+        _CLIENTS[space_id] = client
+    return client
+
+def generation_kwargs(prompt):
+    # prompt, num_inference_steps, guidance_scale
+    return {
+        "prompt": prompt,
+        "num_inference_steps": 20,    # Lower steps for faster generation
+        "guidance_scale": 6.0,
+        "api_name": "/generate",
+    }
+
+def result_video_path(result):
+    # result is a tuple: (cogvideox_generate_video, _download_video, _download_gif)
+    # cogvideox_generate_video is a dict with 'video' key pointing to the path
+    if result and len(result) > 0:
+        video_info = result[0]
+        if isinstance(video_info, dict) and 'video' in video_info:
+            if os.path.exists(video_info['video']):
+                return video_info['video']
+        # Fallback check for raw path
+        elif isinstance(video_info, str) and os.path.exists(video_info):
+            return video_info
+    return None
+
+def generate_video(prompt, output_file, client=None):
     try:
-        client = Client(SPACE_ID)
+        client = client or get_client()
         
         print(f"[generate_ai_video_gradio] Generating video for prompt: '{prompt}'")
         
-        # prompt, num_inference_steps, guidance_scale
-        result = client.predict(
-            prompt=prompt,
-            num_inference_steps=20,    # Lower steps for faster generation
-            guidance_scale=6.0,
-            api_name="/generate"
-        )
+        result = client.predict(**generation_kwargs(prompt))
         
-        # result is a tuple: (cogvideox_generate_video, _download_video, _download_gif)
-        # cogvideox_generate_video is a dict with 'video' key pointing to the path
-        if result and len(result) > 0:
-            video_info = result[0]
-            if isinstance(video_info, dict) and 'video' in video_info:
-                video_path = video_info['video']
-                if os.path.exists(video_path):
-                    print(f"[generate_ai_video_gradio] Success! Result file: {video_path}")
-                    shutil.copy(video_path, output_file)
-                    print(f"[generate_ai_video_gradio] Saved to: {output_file}")
-                    return True
-            # Fallback check for raw path
-            elif isinstance(video_info, str) and os.path.exists(video_info):
-                shutil.copy(video_info, output_file)
-                return True
+        video_path = result_video_path(result)
+        if video_path:
+            print(f"[generate_ai_video_gradio] Success! Result file: {video_path}")
+            validate(video_path, "video")
+            shutil.copy(video_path, output_file)
+            print(f"[generate_ai_video_gradio] Saved to: {output_file}")
+            return True
         
         print(f"[generate_ai_video_gradio] Error: Unexpected result format: {result}")
         return False
             
+    except ValidationError as e:
+        print(f"[generate_ai_video_gradio] Error: Space returned an unusable video: {e}")
+        return False
     except Exception as e:
         print(f"[generate_ai_video_gradio] Error: {e}")
         return False
@@ -3,10 +3,16 @@ import os
 import sys
 from huggingface_hub import InferenceClient
 
+from downloader import save_bytes_atomic
+from media_validate import ValidationError, validate
+
 # Using a popular model supported by Inference API. 
 # Zeroscope is a good text-to-video candidate.
 MODEL_ID = "damo-vilab/text-to-video-ms-1.7b"
 
+# An endpoint URL (e.g. the benchmark stand-in) instead of the hosted model
+HF_INFERENCE_URL = os.getenv("HF_INFERENCE_URL")
+
 def get_hf_token():
     token = os.getenv("HF_TOKEN")
     if not token:
@@ -18,7 +24,7 @@ def generate_video(prompt, output_file):
     token = get_hf_token()
     
     print(f"[generate_ai_video_hf] Initializing InferenceClient for {MODEL_ID}...")
-    client = InferenceClient(model=MODEL_ID, token=token)
+    client = InferenceClient(model=HF_INFERENCE_URL or MODEL_ID, token=token)
     
     print(f"[generate_ai_video_hf] Generating video for prompt: '{prompt}'")
     
@@ -26,13 +32,16 @@ def generate_video(prompt, output_file):
         # text_to_video is the method for video generation
         # It returns bytes of the video file
         video_bytes = client.text_to_video(prompt)
-        
-        with open(output_file, "wb") as f:
-            f.write(video_bytes)
+        save_bytes_atomic(video_bytes, output_file)
+        validate(output_file, "video")
             
         print(f"[generate_ai_video_hf] Video saved successfully to: {output_file}")
         return True
         
+    except ValidationError as e:
+        print(f"[generate_ai_video_hf] Error: unusable video returned: {e}")
+        os.remove(output_file)
+        return False
     except StopIteration:
         print("[generate_ai_video_hf] Error: No free inference provider found for this model.")
         print("[generate_ai_video_hf] This usually means the model is too heavy for the free tier.")
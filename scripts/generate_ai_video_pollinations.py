@@ -1,18 +1,23 @@
 #!/usr/bin/env python3
 import sys
 import os
-import urllib.request
 import urllib.parse
 import time
 
+from downloader import DownloadError, download_sync
+from media_validate import ValidationError, validate
+
 # Pollinations.ai API for video
 # Model options: 'veo', 'seedance' (as per recent docs)
 MODEL = "veo"
 
+# Overridable so the benchmark stand-ins can replace the real API
+POLLINATIONS_VIDEO_URL = os.environ.get("POLLINATIONS_VIDEO_URL", "https://gen.pollinations.ai")
+
 def generate_video(prompt, output_file):
     # Encode the prompt for URL
     encoded_prompt = urllib.parse.quote(prompt)
-    url = f"https://gen.pollinations.ai/image/{encoded_prompt}?model={MODEL}&width=768&height=432"
+    url = f"{POLLINATIONS_VIDEO_URL}/image/{encoded_prompt}?model={MODEL}&width=768&height=432"
     
     print(f"[generate_ai_video_pollinations] Requesting video from: {url}")
     
@@ -23,31 +28,24 @@ def generate_video(prompt, output_file):
             "User-Agent": "Mozilla/5.0"
         }
         
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as response:
-            content_type = response.headers.get('Content-Type', '')
-            print(f"[generate_ai_video_pollinations] Received Content-Type: {content_type}")
-            
-            # If it's a video or stream
-            content = response.read()
-            with open(output_file, "wb") as f:
-                f.write(content)
-            
-            # Check if file is valid (not just a small error message)
-            if os.path.getsize(output_file) > 1000:
-                print(f"[generate_ai_video_pollinations] Video saved to: {output_file}")
-                return True
-            else:
-                print(f"[generate_ai_video_pollinations] Error: Generated file is too small (likely an error message).")
-                # Try printing the content if it's text
-                try:
-                    print(content.decode('utf-8'))
-                except:
-                    pass
-                return False
+        # An error message instead of a video aborts the download on its first bytes
+        download_sync(url, output_file, headers=headers, timeout=300.0, expect="video")
+        
+        # ...and a truncated or undecodable one fails here, before it reaches a render
+        info = validate(output_file, "video")
+        print(
+            f"[generate_ai_video_pollinations] Video saved to: {output_file} "
+            f"({info.get('codec', info.get('format'))}, {info.get('duration', 0):.1f}s)"
+        )
+        return True
                 
+    except (DownloadError, ValidationError) as e:
+        print(f"[generate_ai_video_pollinations] Error: {e}")
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        return False
     except Exception as e:
-        print(f"[generate_ai_video_gradio] Error: {e}")
+        print(f"[generate_ai_video_pollinations] Error: {e}")
         return False
 
 if __name__ == "__main__":
@@ -17,6 +17,11 @@ SR=48000
 
 echo "[soundscape] theme=${THEME} dur=${DURATION_SECONDS}s"
 
+if [[ "${SOUNDSCAPE_ENGINE:-ffmpeg}" == "python" ]]; then
+  # NumPy synthesizer: renders one seamless cycle and streams it in blocks
+  exec ./venv/bin/python3 ./scripts/soundscape_synth.py "${OUT_MP3}" "${THEME}" "${DURATION_SECONDS}"
+fi
+
 case "${THEME}" in
   rain)
     # Heavy distinct droplets + Deep rolling thunder
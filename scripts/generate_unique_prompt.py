@@ -2,8 +2,11 @@
 import random
 import json
 import sys
+from typing import Optional
 
-def generate_prompt():
+def generate_prompt(seed: Optional[int] = None):
+    # A fixed seed reproduces the same prompt and parameters (incremental builds)
+    rng = random.Random(seed)
     themes = [
         "Thunderstorm with Heavy Rain", "Soft Forest Rain", "Rain on a Window", 
         "Rumbling Thunder in Clouds", "Windy Rain", "Rainy City Night",
@@ -20,10 +23,10 @@ def generate_prompt():
     times = ["at the stroke of midnight", "during a golden dawn", "under a brilliant full moon", "in the absolute pitch black", "at a rainy twilight"]
     adjectives = ["unsettling", "therapeutic", "haunting", "majestic", "eerie", "harmonious", "gritty"]
 
-    theme = random.choice(themes)
-    location = random.choice(locations)
-    time = random.choice(times)
-    adj = random.choice(adjectives)
+    theme = rng.choice(themes)
+    location = rng.choice(locations)
+    time = rng.choice(times)
+    adj = rng.choice(adjectives)
 
     prompt = f"A {adj} {theme} {location} {time}, high quality, realistic, cinematic lighting."
     
@@ -43,16 +46,16 @@ def generate_prompt():
     params = {
         "prompt": prompt,
         "ffmpeg_theme": ffmpeg_theme,
-        "rain_intensity": round(random.uniform(0.1, 0.4), 2),
-        "wind_speed": round(random.uniform(0.05, 0.2), 2),
-        "color_shift": random.choice(["#1a2a3a", "#2a1a3a", "#1a3a2a", "#3a3a3a"]),
-        "random_seed": random.randint(0, 10000)
+        "rain_intensity": round(rng.uniform(0.1, 0.4), 2),
+        "wind_speed": round(rng.uniform(0.05, 0.2), 2),
+        "color_shift": rng.choice(["#1a2a3a", "#2a1a3a", "#1a3a2a", "#3a3a3a"]),
+        "random_seed": rng.randint(0, 10000)
     }
     
     return params
 
 if __name__ == "__main__":
-    data = generate_prompt()
+    data = generate_prompt(int(sys.argv[1]) if len(sys.argv) > 1 else None)
     print(f"export GENERATED_PROMPT='{data['prompt']}'")
     print(f"export COMPUTED_THEME='{data['ffmpeg_theme']}'")
     print(f"export RAIN_INTENSITY='{data['rain_intensity']}'")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Long-lived Gradio worker: keeps one warm Client per Space and drains a queue
+of prompts through the job API (``client.submit``) with bounded concurrency,
+writing each clip to disk as soon as its job finishes.
+
+Jobs are read one per line as ``<output_mp4><TAB><prompt>`` from a queue file
+or, when no file is given, from stdin as they arrive.
+
+Usage: gradio_worker.py [queue_file]
+
+Configuration:
+  GRADIO_SPACE_ID       Space to use (default: the CogVideoX Space)
+  GRADIO_MAX_IN_FLIGHT  concurrent jobs submitted to the Space (default: 2)
+"""
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from generate_ai_video_gradio import SPACE_ID, generation_kwargs, get_client, result_video_path
+
+POLL_INTERVAL = 0.5
+
+
+def read_jobs(lines: Iterable[str]) -> Iterable[Tuple[str, str]]:
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        output_file, sep, prompt = line.partition("\t")
+        if not sep or not prompt.strip():
+            print(f"[gradio_worker] Skipping malformed line: {line!r}")
+            continue
+        yield output_file, prompt
+
+
+class GradioWorker:
+    def __init__(self, space_id: str = SPACE_ID, max_in_flight: int = 2) -> None:
+        self.client = get_client(space_id)
+        self.max_in_flight = max_in_flight
+
+    def _finish(self, job, output_file: str, started: float) -> bool:
+        elapsed = time.monotonic() - started
+        try:
+            video_path = result_video_path(job.result())
+        except Exception as e:
+            print(f"[gradio_worker] Job for {output_file} failed after {elapsed:.1f}s: {e}")
+            return False
+        if not video_path:
+            print(f"[gradio_worker] Job for {output_file} returned no video after {elapsed:.1f}s")
+            return False
+        tmp = f"{output_file}.part"
+        try:
+            shutil.copyfile(video_path, tmp)
+            os.replace(tmp, output_file)
+        except OSError as e:
+            print(f"[gradio_worker] Could not save {output_file}: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+        print(f"[gradio_worker] Saved {output_file} ({elapsed:.1f}s)")
+        return True
+
+    def run(self, jobs: Iterable[Tuple[str, str]]) -> Dict[str, bool]:
+        pending: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue()
+
+        def feed() -> None:
+            for job in jobs:
+                pending.put(job)
+            pending.put(None)
+
+        threading.Thread(target=feed, daemon=True).start()
+
+        results: Dict[str, bool] = {}
+        in_flight = {}
+        exhausted = False
+        while not exhausted or in_flight:
+            while not exhausted and len(in_flight) < self.max_in_flight:
+                try:
+                    # Block only when idle; otherwise just top up the pipeline.
+                    item = pending.get(block=not in_flight)
+                except queue.Empty:
+                    break
+                if item is None:
+                    exhausted = True
+                    break
+                output_file, prompt = item
+                print(f"[gradio_worker] Submitting: {output_file} <- '{prompt}'")
+                try:
+                    job = self.client.submit(**generation_kwargs(prompt))
+                except Exception as e:
+                    print(f"[gradio_worker] Submit failed for {output_file}: {e}")
+                    results[output_file] = False
+                    continue
+                in_flight[job] = (output_file, time.monotonic())
+
+            finished = [job for job in in_flight if job.done()]
+            for job in finished:
+                output_file, started = in_flight.pop(job)
+                results[output_file] = self._finish(job, output_file, started)
+            if not finished and in_flight:
+                time.sleep(POLL_INTERVAL)
+
+        return results
+
+
+if __name__ == "__main__":
+    source = open(sys.argv[1], "r", encoding="utf-8") if len(sys.argv) > 1 else sys.stdin
+    worker = GradioWorker(
+        os.getenv("GRADIO_SPACE_ID", SPACE_ID),
+        int(os.getenv("GRADIO_MAX_IN_FLIGHT", "2")),
+    )
+    with source:
+        results = worker.run(read_jobs(source))
+    print(f"[gradio_worker] {sum(results.values())}/{len(results)} clips generated")
+    sys.exit(0 if all(results.values()) else 1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Shared httpx.AsyncClient plumbing: a connection-pooled client factory and a
+request helper that retries with exponential backoff while honouring
+``Retry-After`` and the ``X-Ratelimit-*`` headers sent by Pexels.
+"""
+import asyncio
+import email.utils
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def make_client(max_connections: int = 16, timeout: float = 60.0) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+@asynccontextmanager
+async def borrowed_client(client: Optional[httpx.AsyncClient], timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    # Use the caller's pooled client if given, otherwise a private one-shot client.
+    if client is not None:
+        yield client
+        return
+    async with httpx.AsyncClient(timeout=timeout) as own:
+        yield own
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+class RateLimitGate:
+    """Pauses every request sharing the gate once the quota is exhausted."""
+
+    def __init__(self) -> None:
+        self.resume_at = 0.0
+
+    async def wait(self) -> None:
+        delay = self.resume_at - time.time()
+        if delay > 0:
+            print(f"[http_client] Rate limit reached; pausing {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def update(self, response: httpx.Response) -> None:
+        remaining = response.headers.get("X-Ratelimit-Remaining")
+        reset = response.headers.get("X-Ratelimit-Reset")
+        if remaining == "0" and reset and reset.isdigit():
+            self.resume_at = max(self.resume_at, float(reset))
+        delay = retry_after_seconds(response)
+        if delay is not None and response.status_code in RETRY_STATUSES:
+            self.resume_at = max(self.resume_at, time.time() + delay)
+
+
+async def request_with_retry(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    gate: Optional[RateLimitGate] = None,
+    retries: int = MAX_RETRIES,
+    **kwargs,
+) -> httpx.Response:
+    attempt = 0
+    while True:
+        if gate is not None:
+            await gate.wait()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            if attempt >= retries:
+                raise
+            reason = str(e) or type(e).__name__
+            delay = None
+        else:
+            if gate is not None:
+                gate.update(response)
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+            reason = f"HTTP {response.status_code}"
+            delay = retry_after_seconds(response)
+
+        attempt += 1
+        if delay is None:
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (attempt - 1))) * random.uniform(0.5, 1.5)
+        print(f"[http_client] {reason} for {url}; retry {attempt}/{retries} in {delay:.1f}s")
+        await asyncio.sleep(delay)
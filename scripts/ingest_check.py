@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Check whether a file can be pushed to YouTube Live with ``-c copy`` and, if
+not, condition it once into a compliant copy.
+
+YouTube ingest expects H.264 (Baseline/Main/High) in yuv420p with a keyframe
+at least every 4 seconds, and AAC audio at 44.1 or 48 kHz, mono or stereo.
+
+Usage: ingest_check.py <video_path> [--condition]
+"""
+import os
+import subprocess
+import sys
+from typing import List, Optional
+
+from media_probe import ProbeError, duration_seconds, first_stream, keyframe_times, parse_rate, probe
+
+ALLOWED_PROFILES = {"Baseline", "Constrained Baseline", "Main", "High"}
+ALLOWED_SAMPLE_RATES = {44100, 48000}
+MAX_KEYFRAME_INTERVAL = 4.0
+MAX_FPS = 60.0
+KEYFRAME_SECONDS = 2
+TARGET_WIDTH = 1920
+TARGET_HEIGHT = 1080
+TARGET_FPS = 30
+
+# Matches the bitrate envelope of the live re-encode path.
+CONDITION_VIDEO_ARGS = [
+    "-vf", (
+        f"scale={TARGET_WIDTH}:{TARGET_HEIGHT}:force_original_aspect_ratio=decrease,"
+        f"pad={TARGET_WIDTH}:{TARGET_HEIGHT}:(ow-iw)/2:(oh-ih)/2,fps={TARGET_FPS}"
+    ),
+    "-c:v", "libx264",
+    "-preset", "medium",
+    "-profile:v", "high",
+    "-pix_fmt", "yuv420p",
+    "-b:v", "2500k",
+    "-maxrate", "2500k",
+    "-bufsize", "5000k",
+    "-force_key_frames", f"expr:gte(t,n_forced*{KEYFRAME_SECONDS})",
+    "-sc_threshold", "0",
+]
+CONDITION_AUDIO_ARGS = ["-c:a", "aac", "-b:a", "128k", "-ar", "44100", "-ac", "2"]
+
+
+def compliance_problems(video_path: str, uniform: bool = False) -> List[str]:
+    """List the reasons ``video_path`` cannot be stream-copied to YouTube.
+
+    ``uniform`` additionally requires the 1920x1080 @ 30 fps geometry that
+    conditioning produces, so clips can be joined without re-encoding.
+    """
+    try:
+        info = probe(video_path)
+    except ProbeError as e:
+        return [str(e)]
+
+    problems = []
+    video = first_stream(info, "video")
+    audio = first_stream(info, "audio")
+
+    if video is None:
+        problems.append("no video stream")
+    else:
+        if video.get("codec_name") != "h264":
+            problems.append(f"video codec {video.get('codec_name')} (need h264)")
+        if video.get("profile") not in ALLOWED_PROFILES:
+            problems.append(f"H.264 profile {video.get('profile')}")
+        if video.get("pix_fmt") != "yuv420p":
+            problems.append(f"pixel format {video.get('pix_fmt')} (need yuv420p)")
+        fps = parse_rate(video.get("avg_frame_rate")) or parse_rate(video.get("r_frame_rate"))
+        if fps > MAX_FPS:
+            problems.append(f"frame rate {fps:.2f} > {MAX_FPS:g}")
+        if uniform and (video.get("width"), video.get("height")) != (TARGET_WIDTH, TARGET_HEIGHT):
+            problems.append(f"resolution {video.get('width')}x{video.get('height')}")
+        if uniform and round(fps, 2) != TARGET_FPS:
+            problems.append(f"frame rate {fps:.2f} (need {TARGET_FPS})")
+        try:
+            keyframes = keyframe_times(video_path)
+        except ProbeError as e:
+            problems.append(str(e))
+            keyframes = []
+        if len(keyframes) < 2:
+            problems.append("could not measure keyframe interval")
+        else:
+            gop = max(b - a for a, b in zip(keyframes, keyframes[1:]))
+            if gop > MAX_KEYFRAME_INTERVAL:
+                problems.append(f"keyframe interval {gop:.2f}s > {MAX_KEYFRAME_INTERVAL:g}s")
+
+    if audio is None:
+        problems.append("no audio stream")
+    else:
+        if audio.get("codec_name") != "aac":
+            problems.append(f"audio codec {audio.get('codec_name')} (need aac)")
+        if int(audio.get("sample_rate") or 0) not in ALLOWED_SAMPLE_RATES:
+            problems.append(f"audio sample rate {audio.get('sample_rate')}")
+        if int(audio.get("channels") or 0) not in (1, 2):
+            problems.append(f"{audio.get('channels')} audio channels")
+        if uniform and (int(audio.get("sample_rate") or 0), int(audio.get("channels") or 0)) != (44100, 2):
+            problems.append("audio is not 44.1 kHz stereo")
+
+    return problems
+
+
+def conditioned_path(video_path: str) -> str:
+    root, _ = os.path.splitext(video_path)
+    return f"{root}.ingest.mp4"
+
+
+def _duration(path: str) -> float:
+    try:
+        return duration_seconds(probe(path))
+    except ProbeError:
+        return 0.0
+
+
+def condition(video_path: str, uniform: bool = False, max_seconds: Optional[float] = None) -> str:
+    """Produce (or reuse) an ingest-ready copy of ``video_path`` and return its path.
+
+    With ``max_seconds`` only that much of the input is encoded: a stream
+    shorter than the file never plays the rest, and conditioning all of a
+    multi-hour file would take far longer than the stream itself.
+    """
+    target = conditioned_path(video_path)
+    source_seconds = _duration(video_path)
+    needed = min(source_seconds, max_seconds) if max_seconds and source_seconds else source_seconds
+    if (
+        os.path.isfile(target)
+        and os.path.getmtime(target) >= os.path.getmtime(video_path)
+        and _duration(target) >= needed - 1.0
+        and not compliance_problems(target, uniform)
+    ):
+        print(f"[ingest_check] Reusing conditioned file: {target}")
+        return target
+
+    limit = ["-t", f"{needed:g}"] if needed and needed < source_seconds else []
+    print(f"[ingest_check] Conditioning {video_path} -> {target}" + (f" (first {needed:g}s)" if limit else ""))
+    tmp = f"{target}.part.mp4"
+    cmd = (
+        ["ffmpeg", "-y", "-v", "error", "-i", video_path]
+        + limit
+        + CONDITION_VIDEO_ARGS
+        + CONDITION_AUDIO_ARGS
+        + ["-movflags", "+faststart", tmp]
+    )
+    subprocess.run(cmd, check=True)
+    os.replace(tmp, target)
+    return target
+
+
+def resolve_passthrough_source(
+    video_path: str, allow_condition: bool = True, uniform: bool = False, max_seconds: Optional[float] = None
+) -> str:
+    """Return a path that can be streamed with ``-c copy``, or "" if none.
+
+    ``max_seconds`` is how much of the file will actually be streamed.
+    """
+    problems = compliance_problems(video_path, uniform)
+    if not problems:
+        print(f"[ingest_check] {video_path} is ingest-ready; stream copy enabled")
+        return video_path
+
+    print(f"[ingest_check] {video_path} is not ingest-ready: {'; '.join(problems)}")
+    if not allow_condition:
+        return ""
+    try:
+        return condition(video_path, uniform, max_seconds)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"[ingest_check] Conditioning failed: {e}")
+        return ""
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: ingest_check.py <video_path> [--condition]")
+        sys.exit(1)
+
+    path = sys.argv[1]
+    if "--condition" in sys.argv[2:]:
+        result = resolve_passthrough_source(path)
+        if not result:
+            sys.exit(1)
+        print(result)
+        sys.exit(0)
+
+    issues = compliance_problems(path)
+    for issue in issues:
+        print(f"[ingest_check] {issue}")
+    sys.exit(1 if issues else 0)
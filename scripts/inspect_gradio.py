@@ -1,16 +1,17 @@
 #!/usr/bin/env python3
 import sys
-from gradio_client import Client
+
+from generate_ai_video_gradio import get_client
 
 SPACE_ID = "ByteDance/AnimateDiff-Lightning"
 
-def inspect_space():
+def inspect_space(space_id=SPACE_ID):
     try:
-        print(f"Inspecting Space: {SPACE_ID}")
-        client = Client(SPACE_ID)
+        print(f"Inspecting Space: {space_id}")
+        client = get_client(space_id)
         client.view_api()
     except Exception as e:
         print(f"Error: {e}")
 
 if __name__ == "__main__":
-    inspect_space()
+    inspect_space(sys.argv[1] if len(sys.argv) > 1 else SPACE_ID)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Fast go-live for stream_to_youtube_live.py (STREAM_FAST_START=1).
+
+The default startup resolves the ingest stream, creates the broadcast and
+binds them one call after another, only then starts ffmpeg, and leaves the
+switch to live to YouTube's ``enableAutoStart``. Here:
+
+* the ingest lookup and the broadcast insert run concurrently, each thread
+  with its own API service (googleapiclient services are not thread-safe);
+* ffmpeg starts pushing as soon as the ingest URL is known, while the
+  broadcast is still being created and bound, so YouTube is already
+  receiving video when the broadcast is ready;
+* the broadcast is created with auto-start and the monitor stream off
+  (``FAST_START_CONTENT_DETAILS``). Without a monitor stream YouTube allows
+  ``ready`` -> ``live`` directly, so there is no ``testing`` hop;
+* a background thread binds the broadcast while it polls the ingest stream
+  until it is ``active``, then transitions the broadcast to ``live`` and
+  polls ``lifeCycleStatus`` until it gets there, all within
+  STREAM_GO_LIVE_TIMEOUT.
+
+Milestones, in seconds since the startup began (ingest_ready, broadcast_created,
+bound, stream_active, live), are written to
+``<metrics_dir>/live_startup.json``. ``live`` is the time to the first live
+frame, and it is also added to the progress reporter's metrics as
+``time_to_live_seconds``.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from ffmpeg_progress import ProgressReporter
+
+FAST_START_CONTENT_DETAILS = {
+    "enableAutoStart": False,
+    "monitorStream": {"enableMonitorStream": False},
+}
+
+
+class GoLiveTimeout(Exception):
+    pass
+
+
+class LiveStartup:
+    def __init__(
+        self,
+        make_service: Callable[[], Any],
+        metrics_dir: str,
+        poll_interval: float = 0.5,
+        timeout: float = 180.0,
+    ) -> None:
+        self.make_service = make_service
+        self.metrics_path = os.path.join(metrics_dir, "live_startup.json")
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.started = time.monotonic()
+        self.milestones: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="live-startup")
+        self._broadcast: Optional[Future] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def service(self) -> Any:
+        """This thread's own API service."""
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self._local.service = self.make_service()
+        return service
+
+    def mark(self, milestone: str) -> None:
+        self.milestones[milestone] = round(time.monotonic() - self.started, 3)
+        print(f"[live_startup] {milestone} at {self.milestones[milestone]:.2f}s", flush=True)
+
+    # -- phase 1: in the caller's thread, before ffmpeg -----------------------------
+
+    def prepare(self, resolve_ingest: Callable[[Any], Dict[str, str]], broadcast_body: Dict[str, Any]) -> Dict[str, str]:
+        """Start creating the broadcast and return the ingest info as soon as it is known."""
+        self._broadcast = self._pool.submit(self._insert_broadcast, broadcast_body)
+        ingest = self._pool.submit(lambda: resolve_ingest(self.service())).result()
+        self.mark("ingest_ready")
+        return ingest
+
+    def _insert_broadcast(self, body: Dict[str, Any]) -> str:
+        response = self.service().liveBroadcasts().insert(part="snippet,status,contentDetails", body=body).execute()
+        self.mark("broadcast_created")
+        return response["id"]
+
+    def broadcast_id(self) -> str:
+        return self._broadcast.result()
+
+    # -- phase 2: in the background, while ffmpeg is pushing ------------------------
+
+    def go_live(
+        self,
+        stream_id: str,
+        reporter: Optional[ProgressReporter] = None,
+        on_failure: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self._thread = threading.Thread(
+            target=self._go_live, args=(stream_id, reporter, on_failure), name="go-live", daemon=True
+        )
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """True once the go-live thread has finished (live or failed)."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self._thread is None or not self._thread.is_alive()
+
+    def _go_live(
+        self,
+        stream_id: str,
+        reporter: Optional[ProgressReporter],
+        on_failure: Optional[Callable[[], None]],
+    ) -> None:
+        deadline = time.monotonic() + self.timeout
+        try:
+            broadcast_id = self.broadcast_id()
+            bound = self._pool.submit(self._bind, broadcast_id, stream_id)
+            youtube = self.service()
+            self._poll(lambda: self._stream_status(youtube, stream_id) == "active", "ingest stream to become active", deadline)
+            self.mark("stream_active")
+            bound.result()
+            self._transition(youtube, broadcast_id, "live", deadline)
+            self.mark("live")
+            if reporter is not None:
+                reporter.extra["time_to_live_seconds"] = self.milestones["live"]
+        except Exception as e:  # reported through self.error; the push keeps its own error handling
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"[live_startup] Error: could not take the broadcast live ({self.error})", flush=True)
+            if on_failure is not None:
+                on_failure()
+        finally:
+            self._pool.shutdown(wait=False)
+            self._write_metrics()
+
+    def _bind(self, broadcast_id: str, stream_id: str) -> None:
+        self.service().liveBroadcasts().bind(part="id,contentDetails", id=broadcast_id, streamId=stream_id).execute()
+        self.mark("bound")
+
+    def _poll(self, ready: Callable[[], bool], what: str, deadline: float) -> None:
+        while not ready():
+            if time.monotonic() >= deadline:
+                raise GoLiveTimeout(f"timed out after {self.timeout:.0f}s waiting for {what}")
+            time.sleep(self.poll_interval)
+
+    @staticmethod
+    def _stream_status(youtube: Any, stream_id: str) -> str:
+        items = youtube.liveStreams().list(part="status", id=stream_id).execute().get("items", [])
+        return items[0]["status"].get("streamStatus", "") if items else ""
+
+    @staticmethod
+    def _lifecycle(youtube: Any, broadcast_id: str) -> str:
+        items = youtube.liveBroadcasts().list(part="status", id=broadcast_id).execute().get("items", [])
+        return items[0]["status"].get("lifeCycleStatus", "") if items else ""
+
+    def _transition(self, youtube: Any, broadcast_id: str, target: str, deadline: float) -> None:
+        try:
+            youtube.liveBroadcasts().transition(broadcastStatus=target, id=broadcast_id, part="status").execute()
+        except Exception:
+            # e.g. redundantTransition when the broadcast got there on its own
+            if self._lifecycle(youtube, broadcast_id) != target:
+                raise
+        self._poll(lambda: self._lifecycle(youtube, broadcast_id) == target, f"broadcast to reach {target}", deadline)
+
+    def _write_metrics(self) -> None:
+        os.makedirs(os.path.dirname(self.metrics_path) or ".", exist_ok=True)
+        tmp = f"{self.metrics_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"milestones": self.milestones, "error": self.error, "wall_time": time.time()}, f, indent=2)
+        os.replace(tmp, self.metrics_path)
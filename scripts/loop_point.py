@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Find a seamless loop inside a stock clip.
+
+The clip is decoded once at thumbnail size (grayscale, ``THUMB_WIDTH`` x
+``THUMB_HEIGHT``) into a frames x pixels array. Squared distances between
+every keyframe and every frame come from matrix products, summed over a
+short window so that motion has to match as well as content, and
+normalised by the clip's typical frame-to-frame distance. The best
+``(start, end)`` pair with both ends on keyframes is chosen, so the loop can
+be cut with stream copy. If even the best pair would visibly jump, a short
+crossfade is recommended instead and the loop is re-encoded with ``xfade``.
+
+Results are cached per clip content hash (ASSET_CACHE_DIR), so each clip is
+analysed only once across runs.
+
+Usage: loop_point.py <input_video> [output_loop]
+
+Configuration:
+  LOOP_MIN_SECONDS    shortest acceptable loop (default: 4)
+  LOOP_MAX_SCORE      normalised seam cost below which a hard cut is used (default: 1.5)
+  LOOP_CROSSFADE      crossfade length in seconds when it is not (default: 1)
+"""
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from asset_cache import AssetCache
+from media_probe import duration_seconds, first_stream, keyframe_times, parse_rate, probe
+
+THUMB_WIDTH = 64
+THUMB_HEIGHT = 36
+MATCH_WINDOW = 5  # frames compared after each candidate seam
+ANALYSIS_VERSION = 1
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def decode_thumbnails(path: str, fps: float) -> np.ndarray:
+    cmd = [
+        "ffmpeg", "-v", "error", "-nostdin", "-i", path,
+        "-an", "-vf", f"fps={fps},scale={THUMB_WIDTH}:{THUMB_HEIGHT},format=gray",
+        "-f", "rawvideo", "pipe:1",
+    ]
+    raw = subprocess.run(cmd, check=True, stdout=subprocess.PIPE).stdout
+    return np.frombuffer(raw, dtype=np.uint8).reshape(-1, THUMB_WIDTH * THUMB_HEIGHT).astype(np.float32) / 255.0
+
+
+def seam_costs(frames: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """cost[i, e]: how unlike frames[e:e+W] are to frames[starts[i]:starts[i]+W]."""
+    norms = (frames ** 2).sum(axis=1)
+    n = frames.shape[0]
+    usable = n - MATCH_WINDOW
+    cost = np.zeros((starts.size, usable), dtype=np.float32)
+    for j in range(MATCH_WINDOW):
+        shifted = norms[starts + j][:, None] + norms[None, j:usable + j] - 2.0 * frames[starts + j] @ frames[j:usable + j].T
+        cost += np.maximum(shifted, 0.0)  # clamp float round-off
+    return cost / MATCH_WINDOW
+
+
+def find_loop(path: str, min_seconds: float, max_score: float, crossfade: float) -> Dict[str, Any]:
+    info = probe(path)
+    stream = first_stream(info, "video") or {}
+    fps = parse_rate(stream.get("avg_frame_rate")) or parse_rate(stream.get("r_frame_rate")) or 30.0
+    duration = duration_seconds(info)
+
+    frames = decode_thumbnails(path, fps)
+    n = frames.shape[0]
+    keyframes = np.array(sorted({int(round(t * fps)) for t in keyframe_times(path, scan_seconds=duration + 1)}))
+    starts = keyframes[keyframes + MATCH_WINDOW < n]
+    if n <= MATCH_WINDOW + 1 or starts.size == 0:
+        raise ValueError(f"{path}: too short to analyse ({n} frames)")
+
+    # Typical motion between consecutive frames sets the scale for "seamless".
+    step = ((frames[1:] - frames[:-1]) ** 2).sum(axis=1)
+    motion = float(np.median(step)) + 1e-6
+    cost = seam_costs(frames, starts) / motion
+
+    min_frames = int(min_seconds * fps)
+    ends = np.arange(cost.shape[1])
+    valid = (ends[None, :] - starts[:, None]) >= min_frames
+    # Hard cuts need the end on a keyframe too, so both cuts are stream-copyable.
+    on_keyframe = np.isin(ends, keyframes)[None, :]
+    hard = np.where(valid & on_keyframe, cost, np.inf)
+    i, e = np.unravel_index(np.argmin(hard), hard.shape)
+    score = float(hard[i, e])
+
+    if not np.isfinite(score) or score > max_score:
+        # Crossfade the frames just past the end into the start instead.
+        fade_frames = int(crossfade * fps)
+        soft = np.where(valid & (ends[None, :] + fade_frames < n), cost, np.inf)
+        i, e = np.unravel_index(np.argmin(soft), soft.shape)
+        score = float(soft[i, e])
+        fade = crossfade
+    else:
+        fade = 0.0
+    if not np.isfinite(score):
+        raise ValueError(f"{path}: no loop of at least {min_seconds}s found")
+
+    return {
+        "start": round(float(starts[i]) / fps, 3),
+        "end": round(float(e) / fps, 3),
+        "score": round(score, 3),
+        "crossfade": fade,
+        "fps": fps,
+    }
+
+
+def analyse(path: str, cache: Optional[AssetCache] = None) -> Dict[str, Any]:
+    cache = cache or AssetCache()
+    params = {
+        "min_seconds": float(os.getenv("LOOP_MIN_SECONDS", "4")),
+        "max_score": float(os.getenv("LOOP_MAX_SCORE", "1.5")),
+        "crossfade": float(os.getenv("LOOP_CROSSFADE", "1")),
+    }
+    identity = {"sha256": file_sha256(path), "version": ANALYSIS_VERSION, **params}
+    result = cache.get_json("loop-point", identity)
+    if result is None:
+        result = find_loop(path, **params)
+        cache.put_json("loop-point", identity, result)
+    else:
+        print(f"[loop_point] Cached analysis for {os.path.basename(path)}")
+    cache.flush_stats()
+    return result
+
+
+def build_loop(path: str, loop: Dict[str, Any], output_file: str) -> None:
+    start, end, fade = loop["start"], loop["end"], loop["crossfade"]
+    if not fade:
+        # Both cut points are keyframes: no re-encode.
+        cmd = [
+            "ffmpeg", "-y", "-v", "error", "-nostdin",
+            "-ss", f"{start:.3f}", "-i", path,
+            "-t", f"{end - start:.3f}",
+            "-map", "0:v:0", "-c", "copy", "-avoid_negative_ts", "make_zero",
+            output_file,
+        ]
+    else:
+        # [start+fade, end) followed by [end, end+fade) fading into [start, start+fade).
+        graph = (
+            "[0:v]split=3[a][t][h];"
+            f"[a]trim=start={start + fade:.3f}:end={end:.3f},setpts=PTS-STARTPTS[body];"
+            f"[t]trim=start={end:.3f}:end={end + fade:.3f},setpts=PTS-STARTPTS[tail];"
+            f"[h]trim=start={start:.3f}:end={start + fade:.3f},setpts=PTS-STARTPTS[head];"
+            f"[tail][head]xfade=transition=fade:duration={fade:.3f}:offset=0[seam];"
+            "[body][seam]concat=n=2:v=1:a=0,format=yuv420p[v]"
+        )
+        cmd = [
+            "ffmpeg", "-y", "-v", "error", "-nostdin", "-i", path,
+            "-filter_complex", graph, "-map", "[v]",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "20",
+            "-force_key_frames", "expr:gte(t,n_forced*2)", "-sc_threshold", "0",
+            output_file,
+        ]
+    subprocess.run(cmd, check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: loop_point.py <input_video> [output_loop]")
+        sys.exit(1)
+
+    loop_info = analyse(sys.argv[1])
+    print(json.dumps(loop_info))
+    if len(sys.argv) > 2:
+        build_loop(sys.argv[1], loop_info, sys.argv[2])
+        kind = f"{loop_info['crossfade']}s crossfade" if loop_info["crossfade"] else "stream copy"
+        print(f"[loop_point] Wrote {loop_info['end'] - loop_info['start']:.2f}s loop ({kind}) to {sys.argv[2]}")
@@ -5,7 +5,7 @@ set -euo pipefail
 # Default: 0.25 hours (15 minutes)
 
 OUTPUT_DIR="output"
-BASE_VIDEO="${OUTPUT_DIR}/base_1h.mp4"
+BASE_VIDEO="${BASE_VIDEO:-${OUTPUT_DIR}/base_1h.mp4}"
 
 TOTAL_HOURS="${1:-0.25}" # Default to 15 minutes
 
@@ -50,16 +50,31 @@ if (( $(echo "${STREAM_LOOP} < 0" | bc -l) )); then
   STREAM_LOOP=0
 fi
 
-OUTPUT_FILE="${OUTPUT_DIR}/cozy_${TOTAL_HOURS//./_}_hour_stream.mp4" # Replace dot for valid filename
+OUTPUT_FILE="${LOOP_OUTPUT_FILE:-${OUTPUT_DIR}/cozy_${TOTAL_HOURS//./_}_hour_stream.mp4}" # Replace dot for valid filename
 
 echo "[loop_video] Creating ${TOTAL_HOURS}-hour video from base: ${BASE_VIDEO}"
 echo "[loop_video] Output: ${OUTPUT_FILE}"
 
+# Optional: repeat the base clip's encoded samples at the container level (no re-encode)
+if [[ "${CONTAINER_LOOP:-0}" == "1" ]]; then
+  ./venv/bin/python3 ./scripts/mp4_assemble.py "${BASE_VIDEO}" "${OUTPUT_FILE}" "${TOTAL_HOURS}"
+  echo "[loop_video] Done. Final video created at: ${OUTPUT_FILE}"
+  exit 0
+fi
+
+# Optional: encode keyframe-aligned chunks in parallel across all cores
+if [[ "${PARALLEL_RENDER:-0}" == "1" ]]; then
+  ./venv/bin/python3 ./scripts/render_chunks.py "${BASE_VIDEO}" "${OUTPUT_FILE}" "${TOTAL_HOURS}"
+  echo "[loop_video] Done. Final video created at: ${OUTPUT_FILE}"
+  exit 0
+fi
+
 ffmpeg -y \
   -stream_loop "${STREAM_LOOP}" -i "${BASE_VIDEO}" \
   -c:v libx264 -preset slow -crf 20 \
   -profile:v high -level 4.1 \
   -pix_fmt yuv420p \
+  -force_key_frames "expr:gte(t,n_forced*2)" -sc_threshold 0 \
   -c:a aac -b:a 128k \
   -movflags +faststart \
   -r 30 \
@@ -16,6 +16,16 @@ fi
 
 DUR=$(ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "$INPUT")
 
+if [ "${LOOP_METHOD:-pingpong}" = "match" ]; then
+    # Cut at the most similar keyframe pair (cached per clip) and repeat it without re-encoding
+    echo "[loop] Source: ${DUR}s, Target: ${TARGET_DURATION}s (Frame match)"
+    ./venv/bin/python3 ./scripts/loop_point.py "$INPUT" "output/temp_match.mp4"
+    ffmpeg -y -stream_loop -1 -i "output/temp_match.mp4" -t "${TARGET_DURATION}" -c copy "$OUTPUT"
+    rm output/temp_match.mp4
+    echo "[loop] Done: $OUTPUT"
+    exit 0
+fi
+
 echo "[loop] Source: ${DUR}s, Target: ${TARGET_DURATION}s (Ping-Pong)"
 
 # Create Forward + Reverse concat
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Thin ffprobe wrappers shared by the streaming and validation scripts.
+"""
+import json
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+
+class ProbeError(Exception):
+    pass
+
+
+def ffprobe_json(path: str, extra_args: Optional[List[str]] = None, timeout: float = 60.0) -> Dict[str, Any]:
+    cmd = ["ffprobe", "-v", "error", "-print_format", "json"] + (extra_args or []) + [path]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise ProbeError(f"ffprobe failed for {path}: {e}") from e
+    if result.returncode != 0:
+        raise ProbeError(f"ffprobe failed for {path}: {result.stderr.strip()}")
+    return json.loads(result.stdout or "{}")
+
+
+def probe(path: str) -> Dict[str, Any]:
+    return ffprobe_json(path, ["-show_format", "-show_streams"])
+
+
+def first_stream(info: Dict[str, Any], codec_type: str) -> Optional[Dict[str, Any]]:
+    return next((s for s in info.get("streams", []) if s.get("codec_type") == codec_type), None)
+
+
+def parse_rate(value: Optional[str]) -> float:
+    # "30000/1001" -> 29.97
+    if not value:
+        return 0.0
+    num, _, den = value.partition("/")
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def duration_seconds(info: Dict[str, Any]) -> float:
+    try:
+        return float(info.get("format", {}).get("duration", 0.0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def keyframe_times(path: str, scan_seconds: float = 60.0) -> List[float]:
+    # Packet flags only, so nothing is decoded.
+    info = ffprobe_json(
+        path,
+        [
+            "-select_streams", "v:0",
+            "-read_intervals", f"%+{scan_seconds}",
+            "-show_entries", "packet=pts_time,flags",
+        ],
+    )
+    times = []
+    for packet in info.get("packets", []):
+        if "K" in packet.get("flags", "") and packet.get("pts_time") not in (None, "N/A"):
+            times.append(float(packet["pts_time"]))
+    return sorted(times)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: media_probe.py <media_file>")
+        sys.exit(1)
+    print(json.dumps(probe(sys.argv[1]), indent=2))
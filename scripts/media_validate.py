@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Checks that a downloaded or generated asset is real, decodable media.
+
+Two levels, both cheap compared with a render that dies on a bad input:
+
+* ``check_head`` sniffs the first bytes (magic numbers). The downloader runs
+  it on the first chunk of a body, so an HTML error page or a JSON error
+  served with status 200 aborts the transfer instead of being saved as
+  ``.mp4``.
+* ``validate`` runs ffprobe (container, codec, resolution, duration) and
+  decodes the first VALIDATE_DECODE_SECONDS of the video stream. For MP4 it
+  also checks that the file reaches the end of the last sample the index
+  points to: a truncated faststart file still probes and decodes its first
+  seconds. Results, good and bad, are cached (AssetCache JSON,
+  "media-validate") by content hash and mtime, so checking the same file
+  again costs one hash.
+
+``validate_many`` probes a batch in parallel. ``validate`` blocks (hashing,
+ffprobe, a trial decode), so coroutines run it with ``asyncio.to_thread``.
+
+Usage: media_validate.py <video|image> <file> [file ...]
+
+Configuration:
+  MEDIA_VALIDATE            full (default) or sniff (magic bytes only)
+  VALIDATE_DECODE_SECONDS   seconds of video decoded per check (default: 2)
+  VALIDATE_WORKERS          parallel probes in validate_many (default: CPU count)
+"""
+import hashlib
+import os
+import shutil
+import struct
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from asset_cache import AssetCache
+from media_probe import ProbeError, duration_seconds, first_stream, probe
+from mp4_assemble import Mp4Error, iter_boxes, parse_track, read_top_level
+
+SNIFF_BYTES = 512  # enough for two MPEG-TS packet sync bytes
+VALIDATION_VERSION = 2
+
+VIDEO_KINDS = {"mp4", "matroska", "avi", "flv", "mpegts", "gif"}
+IMAGE_KINDS = {"jpeg", "png", "webp", "gif"}
+TEXT_KINDS = {"html", "json", "text"}
+
+
+class ValidationError(Exception):
+    pass
+
+
+def sniff(head: bytes) -> Optional[str]:
+    """Format named by the leading bytes, or None if unrecognised."""
+    if head[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide", b"skip"):
+        return "mp4"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "matroska"  # also WebM
+    if head.startswith(b"RIFF") and head[8:12] == b"AVI ":
+        return "avi"
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return "webp"
+    if head.startswith(b"FLV\x01"):
+        return "flv"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head[:1] == head[188:189] == b"\x47":
+        return "mpegts"
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if text[:1] == b"<":
+        return "html"
+    if text[:1] in (b"{", b"["):
+        return "json"
+    try:
+        decoded = text.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.start < len(text) - 3:
+            return None  # binary
+        decoded = text[:e.start].decode("utf-8")  # a character cut off at the end
+    if decoded and all(c.isprintable() or c.isspace() for c in decoded):
+        return "text"
+    return None
+
+
+def check_head(head: bytes, expect: str) -> Optional[str]:
+    """Raise ValidationError if ``head`` cannot start a valid ``expect`` ("video" or "image")."""
+    if not head:
+        raise ValidationError("empty body")
+    kind = sniff(head)
+    if kind in TEXT_KINDS:
+        snippet = head.decode("utf-8", "replace").strip().replace("\n", " ")
+        raise ValidationError(f"got {kind} instead of {expect}: {snippet[:80]!r}")
+    allowed = VIDEO_KINDS if expect == "video" else IMAGE_KINDS
+    if kind is not None and kind not in allowed:
+        raise ValidationError(f"got {kind} data instead of {expect}")
+    return kind
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def mp4_data_end(path: str) -> int:
+    """Offset just past the last sample that the ``moov`` index references."""
+    with open(path, "rb") as f:
+        _, moov = read_top_level(f)
+    end = 0
+    for kind, start, box_end in iter_boxes(moov):
+        if kind != b"trak":
+            continue
+        track = parse_track(moov, start, box_end)
+        first = 0
+        for offset, count in zip(track.chunk_offsets, track.chunk_counts):
+            end = max(end, offset + track.sample_bytes(first, count))
+            first += count
+    return end
+
+
+def inspect(path: str, expect: str, decode_seconds: float) -> Dict[str, Any]:
+    """Probe and trial-decode ``path``; ``error`` is None when it is usable."""
+    try:
+        info = probe(path)
+    except ProbeError as e:
+        return {"error": f"not readable media ({e})"}
+    stream = first_stream(info, "video")
+    if not stream:
+        return {"error": "no video stream" if expect == "video" else "no image stream"}
+    width, height = stream.get("width") or 0, stream.get("height") or 0
+    duration = duration_seconds(info)
+    if not width or not height:
+        return {"error": f"no frame size for codec {stream.get('codec_name')}"}
+    if expect == "video" and duration <= 0:
+        return {"error": "zero duration"}
+    if expect == "video" and "mp4" in info.get("format", {}).get("format_name", ""):
+        try:
+            data_end = mp4_data_end(path)
+        except (Mp4Error, KeyError, struct.error):
+            data_end = 0  # fragmented or an index layout we do not parse; left to ffmpeg
+        size = os.path.getsize(path)
+        if data_end > size:
+            return {"error": f"truncated ({size} of {data_end} bytes)"}
+
+    limit = ["-t", f"{decode_seconds:g}"] if expect == "video" else ["-frames:v", "1"]
+    decode = subprocess.run(
+        ["ffmpeg", "-v", "error", "-xerror", "-nostdin", "-i", path, "-map", "0:v:0", *limit, "-f", "null", "-"],
+        capture_output=True,
+        text=True,
+    )
+    if decode.returncode != 0:
+        reason = (decode.stderr.strip().splitlines() or ["ffmpeg failed"])[-1]
+        return {"error": f"does not decode ({reason})"}
+
+    audio = first_stream(info, "audio")
+    return {
+        "error": None,
+        "format": info.get("format", {}).get("format_name"),
+        "codec": stream.get("codec_name"),
+        "width": width,
+        "height": height,
+        "duration": duration,
+        "audio_codec": audio.get("codec_name") if audio else None,
+    }
+
+
+def check(path: str, expect: str = "video", cache: Optional[AssetCache] = None) -> Dict[str, Any]:
+    """Validation result for ``path`` (``error`` is None when valid), using the cache."""
+    try:
+        with open(path, "rb") as f:
+            kind = check_head(f.read(SNIFF_BYTES), expect)
+    except (OSError, ValidationError) as e:
+        return {"error": str(e)}
+    if os.getenv("MEDIA_VALIDATE", "full") == "sniff":
+        return {"error": None, "format": kind}
+    if not shutil.which("ffprobe"):
+        print("[media_validate] Warning: ffprobe not installed; only the file header was checked", flush=True)
+        return {"error": None, "format": kind}
+
+    decode_seconds = float(os.getenv("VALIDATE_DECODE_SECONDS", "2"))
+    st = os.stat(path)
+    identity = {
+        "version": VALIDATION_VERSION,
+        "sha256": file_sha256(path),
+        "mtime_ns": st.st_mtime_ns,
+        "expect": expect,
+        "decode_seconds": decode_seconds,
+    }
+    cache = cache or AssetCache()
+    result = cache.get_json("media-validate", identity)
+    if result is None:
+        result = inspect(path, expect, decode_seconds)
+        cache.put_json("media-validate", identity, result)
+    return result
+
+
+def validate(path: str, expect: str = "video", cache: Optional[AssetCache] = None) -> Dict[str, Any]:
+    """Like ``check``, but raise ValidationError for an unusable file."""
+    own_cache = cache is None
+    cache = cache or AssetCache()
+    try:
+        result = check(path, expect, cache)
+    finally:
+        if own_cache:
+            cache.flush_stats()
+    if result["error"]:
+        raise ValidationError(f"{os.path.basename(path)}: {result['error']}")
+    return result
+
+
+def validate_many(paths: List[str], expect: str = "video", workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """``check`` results for ``paths``, probed in parallel."""
+    workers = workers or int(os.getenv("VALIDATE_WORKERS", "0")) or os.cpu_count() or 1
+    cache = AssetCache()
+    try:
+        with ThreadPoolExecutor(max_workers=min(workers, max(len(paths), 1))) as pool:
+            results = list(pool.map(lambda path: check(path, expect, cache), paths))
+    finally:
+        cache.flush_stats()
+    return dict(zip(paths, results))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("video", "image"):
+        print("Usage: media_validate.py <video|image> <file> [file ...]")
+        sys.exit(1)
+
+    bad = 0
+    for path, result in validate_many(sys.argv[2:], sys.argv[1]).items():
+        if result["error"]:
+            bad += 1
+            print(f"[media_validate] BAD {path}: {result['error']}")
+        elif "codec" in result:
+            print(
+                f"[media_validate] OK  {path}: {result['codec']} {result['width']}x{result['height']}, "
+                f"{result['duration']:.1f}s"
+            )
+        else:
+            print(f"[media_validate] OK  {path}: {result['format'] or 'unknown'} header")
+    sys.exit(1 if bad else 0)
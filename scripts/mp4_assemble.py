@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+Build a long MP4 from a base clip at the container level, with no decoding.
+
+The base clip's sample tables (stts, ctts, stss, stsc, stsz, stco/co64) are
+repeated N times with the chunk offsets shifted by one copy of the media data
+per repetition. The output is written as ftyp + moov + mdat (faststart), and
+the mdat payload is the base clip's media bytes copied N times with large
+sequential I/O (``copy_file_range`` where the kernel supports it). The cost is
+disk bandwidth only: a 24-hour file takes as long as writing it.
+
+The video track sets the period. At every seam each other track is cut or
+padded to exactly that period in its own timescale: trailing samples that
+would overrun it are dropped from the tables (their bytes stay unreferenced
+in mdat), and the last kept sample is lengthened to fill the remainder.
+Rounding is carried across repetitions, so audio never drifts from video no
+matter how many times the clip repeats.
+
+Usage: mp4_assemble.py <base_mp4> <output_mp4> <total_hours>
+"""
+import math
+import os
+import struct
+import sys
+import time
+from array import array
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+COPY_BLOCK = 16 * 1024 * 1024
+MAX_SEAM_GAP = 0.1  # seconds of padding at a seam before warning
+REBUILT = {b"stts", b"ctts", b"stss", b"stsc", b"stsz", b"stco", b"co64"}
+CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts"}
+
+
+class Mp4Error(ValueError):
+    pass
+
+
+def iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, int, int]]:
+    """(type, payload_start, box_end) for each box in data[start:end]."""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[pos + 8:pos + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise Mp4Error(f"corrupt {kind!r} box at {pos}")
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def box(kind: bytes, *payload: bytes) -> bytes:
+    body = b"".join(payload)
+    return struct.pack(">I4s", 8 + len(body), kind) + body
+
+
+def full_box(kind: bytes, version: int, flags: int, *payload: bytes) -> bytes:
+    return box(kind, struct.pack(">I", (version << 24) | flags), *payload)
+
+
+def be_bytes(values: array) -> bytes:
+    if sys.byteorder == "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def from_be(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values
+
+
+def rle_append(runs: List[List[int]], count: int, value: int) -> None:
+    if count <= 0:
+        return
+    if runs and runs[-1][1] == value:
+        runs[-1][0] += count
+    else:
+        runs.append([count, value])
+
+
+def rle_prefix(runs: List[Tuple[int, int]], n: int) -> List[List[int]]:
+    """The first ``n`` samples of a run-length table."""
+    out: List[List[int]] = []
+    for count, value in runs:
+        if n <= 0:
+            break
+        rle_append(out, min(count, n), value)
+        n -= count
+    return out
+
+
+def set_duration(payload: bytes, duration: int, middle: int) -> bytes:
+    """Rewrite the duration of an mvhd/tkhd/mdhd payload, widening to version 1 if needed.
+
+    ``middle`` is the number of bytes between the timestamps and the duration
+    (the timescale, or tkhd's track id + reserved word).
+    """
+    version = payload[0]
+    times_len = 16 if version == 1 else 8
+    times = payload[4:4 + times_len]
+    mid = payload[4 + times_len:4 + times_len + middle]
+    tail = payload[4 + times_len + middle + (8 if version == 1 else 4):]
+    if version == 0 and duration > 0xFFFFFFFF:
+        version = 1
+        times = struct.pack(">QQ", *struct.unpack(">II", times))
+    return bytes([version]) + payload[1:4] + times + mid + struct.pack(">Q" if version == 1 else ">I", duration) + tail
+
+
+def timescale_of(payload: bytes) -> int:
+    """Timescale field of an mvhd or mdhd payload."""
+    offset = 20 if payload[0] == 1 else 12
+    return struct.unpack(">I", payload[offset:offset + 4])[0]
+
+
+@dataclass
+class Track:
+    handler: bytes
+    timescale: int
+    children: List[Tuple[bytes, bytes]]  # stbl children kept verbatim
+    durations: List[Tuple[int, int]]  # stts runs
+    ctts: Optional[Tuple[int, List[Tuple[int, int]]]]  # version, runs
+    sync: Optional[array]  # 1-based sample numbers, None = all samples are sync
+    sample_size: int  # non-zero when every sample has the same size
+    sizes: array
+    chunk_offsets: array
+    chunk_counts: List[int]
+    chunk_sdi: List[int]
+    edits: List[Tuple[int, int, int]]  # (segment_duration, media_time, rate)
+    groups: List[Tuple[bytes, List[Tuple[int, int]]]]  # sbgp header, runs
+    dependencies: bytes  # sdtp flags, one byte per sample
+    trak: bytes = b""
+    # Filled in by Assembly.plan():
+    keep: int = 0
+    out_sizes: bytes = b""
+    out_stts: bytes = b""
+    out_ctts: bytes = b""
+    out_stss: bytes = b""
+    out_stsc: bytes = b""
+    out_extra: bytes = b""  # sdtp and sbgp
+    out_chunks: Optional[array] = None
+    media_duration: int = 0
+
+    @property
+    def sample_count(self) -> int:
+        return sum(count for count, _ in self.durations)
+
+    @property
+    def total_duration(self) -> int:
+        return sum(count * delta for count, delta in self.durations)
+
+    def sample_bytes(self, first: int, count: int) -> int:
+        if self.sample_size:
+            return self.sample_size * count
+        return sum(self.sizes[first:first + count])
+
+
+def parse_track(moov: bytes, start: int, end: int) -> Track:
+    trak = {kind: (body, box_end) for kind, body, box_end in iter_boxes(moov, start, end)}
+    mdia = {kind: (body, box_end) for kind, body, box_end in iter_boxes(moov, *trak[b"mdia"])}
+    mdhd = moov[slice(*mdia[b"mdhd"])]
+    handler = moov[mdia[b"hdlr"][0] + 8:mdia[b"hdlr"][0] + 12]
+    minf = {kind: (body, box_end) for kind, body, box_end in iter_boxes(moov, *mdia[b"minf"])}
+    stbl_start, stbl_end = minf[b"stbl"]
+
+    children: List[Tuple[bytes, bytes]] = []
+    tables: Dict[bytes, bytes] = {}
+    groups: List[Tuple[bytes, List[Tuple[int, int]]]] = []
+    dependencies = b""
+    for kind, body, box_end in iter_boxes(moov, stbl_start, stbl_end):
+        if kind in REBUILT:
+            tables[kind] = moov[body:box_end]
+        elif kind == b"stz2":
+            raise Mp4Error("compact sample sizes (stz2) are not supported")
+        elif kind == b"sbgp":
+            # Sample-to-group runs, e.g. the AAC roll distance group.
+            prefix = 12 if moov[body] == 1 else 8
+            (n,) = struct.unpack(">I", moov[body + prefix:body + prefix + 4])
+            first = body + prefix + 4
+            groups.append((moov[body:body + prefix], [struct.unpack(">II", moov[p:p + 8]) for p in range(first, first + 8 * n, 8)]))
+        elif kind == b"sdtp":
+            dependencies = moov[body + 4:box_end]
+        elif kind in (b"stsd", b"sgpd"):
+            children.append((kind, moov[body:box_end]))
+        else:
+            # Other per-sample tables cannot be kept consistent.
+            print(f"[mp4_assemble] Dropping {kind.decode(errors='replace')} from {handler.decode(errors='replace')} track")
+
+    def entries(kind: bytes, width: int) -> List[Tuple[int, ...]]:
+        data = tables.get(kind)
+        if not data:
+            return []
+        count = struct.unpack(">I", data[4:8])[0]
+        fmt = ">" + "I" * width
+        return [struct.unpack(fmt, data[8 + i * 4 * width:8 + (i + 1) * 4 * width]) for i in range(count)]
+
+    durations = [(c, d) for c, d in entries(b"stts", 2)]
+    ctts = (tables[b"ctts"][0], [(c, o) for c, o in entries(b"ctts", 2)]) if b"ctts" in tables else None
+    sync = from_be("I", tables[b"stss"][8:]) if b"stss" in tables else None
+
+    stsz = tables[b"stsz"]
+    sample_size, count = struct.unpack(">II", stsz[4:12])
+    sizes = from_be("I", stsz[12:12 + 4 * count]) if sample_size == 0 else array("I")
+
+    if b"co64" in tables:
+        chunk_offsets = from_be("Q", tables[b"co64"][8:])
+    else:
+        chunk_offsets = array("Q", from_be("I", tables[b"stco"][8:]))
+    chunk_counts: List[int] = []
+    chunk_sdi: List[int] = []
+    stsc = entries(b"stsc", 3)
+    for i, (first, per_chunk, sdi) in enumerate(stsc):
+        last = stsc[i + 1][0] if i + 1 < len(stsc) else len(chunk_offsets) + 1
+        chunk_counts += [per_chunk] * (last - first)
+        chunk_sdi += [sdi] * (last - first)
+
+    edits: List[Tuple[int, int, int]] = []
+    if b"edts" in trak:
+        for kind, body, box_end in iter_boxes(moov, *trak[b"edts"]):
+            if kind != b"elst":
+                continue
+            version = moov[body]
+            (n,) = struct.unpack(">I", moov[body + 4:body + 8])
+            fmt, width = (">QqI", 20) if version == 1 else (">IiI", 12)
+            for i in range(n):
+                edits.append(struct.unpack(fmt, moov[body + 8 + i * width:body + 8 + (i + 1) * width]))
+
+    return Track(
+        handler=handler,
+        timescale=timescale_of(mdhd),
+        children=children,
+        durations=durations,
+        ctts=ctts,
+        sync=sync,
+        sample_size=sample_size,
+        sizes=sizes,
+        chunk_offsets=chunk_offsets,
+        chunk_counts=chunk_counts,
+        chunk_sdi=chunk_sdi,
+        edits=edits,
+        groups=groups,
+        dependencies=dependencies,
+        trak=moov[start:end],
+    )
+
+
+def read_top_level(f: BinaryIO) -> Tuple[bytes, bytes]:
+    """(ftyp, moov) of a progressive MP4; fragmented files are rejected."""
+    ftyp = moov = b""
+    size_total = os.fstat(f.fileno()).st_size
+    pos = 0
+    while pos + 8 <= size_total:
+        f.seek(pos)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = size_total - pos
+        if kind == b"ftyp":
+            ftyp = struct.pack(">I4s", size - header + 8, kind) + f.read(size - header)
+        elif kind == b"moov":
+            moov = f.read(size - header)
+        elif kind == b"moof":
+            raise Mp4Error("fragmented MP4 input is not supported")
+        pos += size
+    if not moov:
+        raise Mp4Error("no moov box")
+    return ftyp, moov
+
+
+class Assembly:
+    def __init__(self, base_path: str) -> None:
+        self.base_path = base_path
+        self.repeats = 0
+        with open(base_path, "rb") as f:
+            self.ftyp, self.moov = read_top_level(f)
+
+        self.other: List[Tuple[bytes, bytes]] = []  # moov children kept verbatim
+        self.tracks: List[Track] = []
+        self.mvhd = b""
+        for kind, body, box_end in iter_boxes(self.moov):
+            if kind == b"mvhd":
+                self.mvhd = self.moov[body:box_end]
+            elif kind == b"trak":
+                self.tracks.append(parse_track(self.moov, body, box_end))
+            else:
+                self.other.append((kind, self.moov[body:box_end]))
+        self.movie_timescale = timescale_of(self.mvhd)
+        self.tracks = [t for t in self.tracks if t.sample_count]
+        if not self.tracks:
+            raise Mp4Error("no samples")
+
+        # Byte span of the base clip's media; each repetition is one copy of it.
+        self.span_start = min(min(t.chunk_offsets) for t in self.tracks)
+        span_end = 0
+        for t in self.tracks:
+            first = 0
+            for offset, count in zip(t.chunk_offsets, t.chunk_counts):
+                span_end = max(span_end, offset + t.sample_bytes(first, count))
+                first += count
+        self.span = span_end - self.span_start
+
+        master = next((t for t in self.tracks if t.handler == b"vide"), None)
+        master = master or max(self.tracks, key=lambda t: t.total_duration / t.timescale)
+        self.period = master.total_duration / master.timescale
+
+    def plan(self, repeats: int) -> None:
+        self.repeats = repeats
+        for t in self.tracks:
+            self.plan_track(t)
+
+    def plan_track(self, t: Track) -> None:
+        """Fit one repetition of ``t`` to the period and build its repeated tables."""
+        ts = t.timescale
+        # Every repetition is at least this long in the track's timescale.
+        shortest = math.floor(self.period * ts + 1e-6)
+        # Keep as many samples as fit the shortest repetition; the last one absorbs the rest.
+        elapsed = keep = 0
+        for count, delta in t.durations:
+            fits = min(count, max(0, (shortest - elapsed) // delta)) if delta else count
+            keep += fits
+            elapsed += fits * delta
+            if fits < count:
+                break
+        keep = max(1, keep)
+        head = rle_prefix(t.durations, keep - 1)
+        head_duration = sum(c * d for c, d in head)
+        gap = shortest - sum(c * d for c, d in rle_prefix(t.durations, keep))
+        if gap / ts > MAX_SEAM_GAP:
+            print(f"[mp4_assemble] Warning: {t.handler.decode(errors='replace')} track is {gap / ts:.3f}s short of the video at each seam")
+        dropped = t.sample_count - keep
+        if dropped:
+            print(f"[mp4_assemble] Dropping {dropped} trailing {t.handler.decode(errors='replace')} sample(s) at each seam")
+        t.keep = keep
+
+        stts: List[List[int]] = []
+        for k in range(self.repeats):
+            target = round((k + 1) * self.period * ts) - round(k * self.period * ts)
+            for count, delta in head:
+                rle_append(stts, count, delta)
+            rle_append(stts, 1, target - head_duration)
+        t.media_duration = sum(c * d for c, d in stts)
+        t.out_stts = full_box(b"stts", 0, 0, struct.pack(">I", len(stts)), be_bytes(array("I", [v for run in stts for v in run])))
+
+        if t.ctts is not None:
+            version, runs = t.ctts
+            ctts: List[List[int]] = []
+            one = rle_prefix(runs, keep)
+            for _ in range(self.repeats):
+                for count, offset in one:
+                    rle_append(ctts, count, offset)
+            t.out_ctts = full_box(b"ctts", version, 0, struct.pack(">I", len(ctts)), be_bytes(array("I", [v for run in ctts for v in run])))
+
+        if t.sync is not None:
+            kept = [s for s in t.sync if s <= keep]
+            sync = array("I", [s + k * keep for k in range(self.repeats) for s in kept])
+            t.out_stss = full_box(b"stss", 0, 0, struct.pack(">I", len(sync)), be_bytes(sync))
+
+        extra = []
+        if t.dependencies:
+            extra.append(full_box(b"sdtp", 0, 0, t.dependencies[:keep] * self.repeats))
+        for header, runs in t.groups:
+            grouped: List[List[int]] = []
+            one = rle_prefix(runs, keep)
+            for _ in range(self.repeats):
+                for count, index in one:
+                    rle_append(grouped, count, index)
+            extra.append(box(b"sbgp", header, struct.pack(">I", len(grouped)), be_bytes(array("I", [v for run in grouped for v in run]))))
+        t.out_extra = b"".join(extra)
+
+        if t.sample_size:
+            t.out_sizes = full_box(b"stsz", 0, 0, struct.pack(">II", t.sample_size, keep * self.repeats))
+        else:
+            sizes = t.sizes[:keep] * self.repeats
+            t.out_sizes = full_box(b"stsz", 0, 0, struct.pack(">II", 0, len(sizes)), be_bytes(sizes))
+
+        # Chunks of one repetition, the last one cut short if samples were dropped.
+        counts: List[int] = []
+        remaining = keep
+        for count in t.chunk_counts:
+            if remaining <= 0:
+                break
+            counts.append(min(count, remaining))
+            remaining -= count
+        relative = [offset - self.span_start for offset in t.chunk_offsets[:len(counts)]]
+        t.out_chunks = array("Q", [offset + k * self.span for k in range(self.repeats) for offset in relative])
+        stsc: List[Tuple[int, int, int]] = []
+        chunk = 1
+        for _ in range(self.repeats):
+            for count, sdi in zip(counts, t.chunk_sdi):
+                if not stsc or stsc[-1][1:] != (count, sdi):
+                    stsc.append((chunk, count, sdi))
+                chunk += 1
+        t.out_stsc = full_box(b"stsc", 0, 0, struct.pack(">I", len(stsc)), be_bytes(array("I", [v for e in stsc for v in e])))
+
+    def track_box(self, t: Track, data_start: int, large: bool) -> bytes:
+        offsets = array("Q", [offset + data_start for offset in t.out_chunks])
+        chunk_box = (
+            full_box(b"co64", 0, 0, struct.pack(">I", len(offsets)), be_bytes(offsets))
+            if large
+            else full_box(b"stco", 0, 0, struct.pack(">I", len(offsets)), be_bytes(array("I", offsets)))
+        )
+        stbl = box(
+            b"stbl",
+            *[box(kind, payload) for kind, payload in t.children],
+            t.out_stts, t.out_ctts, t.out_stss, t.out_stsc, t.out_sizes, chunk_box, t.out_extra,
+        )
+        movie_duration = self.presentation_duration(t)
+        return self.rebuild(t.trak, stbl, t.media_duration, movie_duration, self.edit_box(t))
+
+    def presentation_duration(self, t: Track) -> int:
+        empty = sum(d for d, media_time, _ in t.edits if media_time == -1)
+        start = next((media_time for _, media_time, _ in t.edits if media_time >= 0), 0)
+        return empty + round((t.media_duration - start) * self.movie_timescale / t.timescale)
+
+    def edit_box(self, t: Track) -> bytes:
+        if not t.edits:
+            return b""
+        entries = [(d, m, r) for d, m, r in t.edits if m == -1]
+        start, rate = next(((m, r) for _, m, r in t.edits if m >= 0), (0, 0x10000))
+        empty = sum(d for d, _, _ in entries)
+        entries.append((self.presentation_duration(t) - empty, start, rate))
+        large = any(d > 0xFFFFFFFF or m > 0x7FFFFFFF for d, m, _ in entries)
+        fmt = ">QqI" if large else ">IiI"
+        return box(b"edts", full_box(b"elst", 1 if large else 0, 0, struct.pack(">I", len(entries)), *[struct.pack(fmt, *e) for e in entries]))
+
+    def rebuild(self, trak: bytes, stbl: bytes, media_duration: int, movie_duration: int, edts: bytes) -> bytes:
+        """The trak box with new durations, edit list and sample tables."""
+
+        def walk(data: bytes, start: int, end: int) -> bytes:
+            out = []
+            for kind, body, box_end in iter_boxes(data, start, end):
+                payload = data[body:box_end]
+                if kind == b"tkhd":
+                    out.append(box(kind, set_duration(payload, movie_duration, 8)))
+                elif kind == b"mdhd":
+                    out.append(box(kind, set_duration(payload, media_duration, 4)))
+                elif kind == b"edts":
+                    out.append(edts)
+                elif kind == b"stbl":
+                    out.append(stbl)
+                elif kind in CONTAINERS:
+                    out.append(box(kind, walk(data, body, box_end)))
+                else:
+                    out.append(box(kind, payload))
+            return b"".join(out)
+
+        return box(b"trak", walk(trak, 0, len(trak)))
+
+    def build_moov(self, data_start: int, large: bool) -> bytes:
+        traks = [self.track_box(t, data_start, large) for t in self.tracks]
+        duration = max(self.presentation_duration(t) for t in self.tracks)
+        mvhd = box(b"mvhd", set_duration(self.mvhd, duration, 4))
+        return box(b"moov", mvhd, *traks, *[box(kind, payload) for kind, payload in self.other])
+
+    def header(self) -> bytes:
+        """ftyp + moov + mdat header, laid out for the final offsets."""
+        payload = self.span * self.repeats
+        # Offsets do not change box sizes, so the layout can be measured first. Sizing
+        # with co64 errs on the side of 64-bit offsets near the 4 GiB boundary.
+        large = len(self.ftyp) + len(self.build_moov(0, True)) + 16 + payload > 0xFFFFFFFF
+        data_start = len(self.ftyp) + len(self.build_moov(0, large)) + 16
+        moov = self.build_moov(data_start, large)
+        mdat = struct.pack(">I4sQ", 1, b"mdat", 16 + payload)
+        return self.ftyp + moov + mdat
+
+
+def copy_range(src: BinaryIO, dst: BinaryIO, offset: int, length: int) -> None:
+    """Copy src[offset:offset+length] to dst's current position in large sequential blocks."""
+    dst.flush()
+    done = 0
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        try:
+            # In-kernel copy; filesystems with reflinks may not copy at all.
+            while done < length:
+                n = copy_file_range(src.fileno(), dst.fileno(), min(COPY_BLOCK * 4, length - done), offset + done)
+                if n == 0:
+                    raise Mp4Error("unexpected end of base clip")
+                done += n
+        except OSError:
+            pass  # e.g. cross-device on older kernels; buffered copy of the rest
+    dst.seek(0, os.SEEK_END)
+    view = memoryview(bytearray(COPY_BLOCK))
+    src.seek(offset + done)
+    while done < length:
+        n = src.readinto(view[:min(COPY_BLOCK, length - done)])
+        if not n:
+            raise Mp4Error("unexpected end of base clip")
+        dst.write(view[:n])
+        done += n
+
+
+def assemble(base_path: str, output_file: str, total_seconds: float) -> None:
+    started = time.monotonic()
+    assembly = Assembly(base_path)
+    repeats = max(1, round(total_seconds / assembly.period))
+    assembly.plan(repeats)
+    header = assembly.header()
+    print(
+        f"[mp4_assemble] {repeats} x {assembly.period:.3f}s from {base_path} "
+        f"({assembly.span * repeats / 1e9:.2f} GB media, {len(header) / 1e6:.1f} MB header)"
+    )
+
+    tmp_output = f"{output_file}.part.mp4"
+    with open(base_path, "rb") as src, open(tmp_output, "wb") as dst:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        dst.write(header)
+        for _ in range(repeats):
+            copy_range(src, dst, assembly.span_start, assembly.span)
+        dst.seek(0, os.SEEK_END)
+        if dst.tell() != len(header) + assembly.span * repeats:
+            raise Mp4Error("short copy of base clip media")
+    os.replace(tmp_output, output_file)
+
+    elapsed = time.monotonic() - started
+    size = os.path.getsize(output_file)
+    print(
+        f"[mp4_assemble] Wrote {repeats * assembly.period / 3600:.2f}h to {output_file} "
+        f"({size / 1e9:.2f} GB) in {elapsed:.1f}s ({size / 1e6 / max(elapsed, 1e-6):.0f} MB/s)"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Usage: mp4_assemble.py <base_mp4> <output_mp4> <total_hours>")
+        sys.exit(1)
+
+    try:
+        assemble(sys.argv[1], sys.argv[2], float(sys.argv[3]) * 3600)
+    except Mp4Error as e:
+        print(f"[mp4_assemble] {sys.argv[1]}: {e}")
+        sys.exit(1)
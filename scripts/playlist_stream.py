@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Gapless multi-clip playlist feeding one persistent ffmpeg/RTMP session.
+
+Each clip is remuxed (never re-encoded) to MPEG-TS with its timestamps
+shifted by the running playlist offset, and the segments are written back to
+back into the stdin of a single output ffmpeg. The ingest therefore sees one
+continuous stream with monotonically increasing timestamps, while clips can
+be added, removed or reordered by editing the playlist file mid-stream: it is
+re-read whenever it changes, and the edit takes effect after the clips that
+are already prepared.
+
+Clips are prepared (conditioned, in passthrough mode) and probed by a
+lookahead thread while the previous clip plays, so a clip boundary never
+waits on ffprobe or an encode while the ``-re`` ingest starves.
+
+Playlist files list one clip path per line (relative paths resolve against
+the playlist's directory); blank lines and ``#`` comments are ignored.
+"""
+import os
+import queue
+import random
+import subprocess
+import threading
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from media_probe import ProbeError, duration_seconds, probe
+
+PLAYLIST_EXTENSIONS = (".txt", ".m3u")
+COPY_CHUNK = 1024 * 1024
+LOOKAHEAD = 2  # clips prepared ahead of the one playing
+RETRY_SECONDS = 10.0  # back-off after a full pass without a playable clip
+
+
+def is_playlist(path: str) -> bool:
+    return path.lower().endswith(PLAYLIST_EXTENSIONS)
+
+
+class Playlist:
+    def __init__(self, path: str, shuffle: bool = False, seed: Optional[int] = None) -> None:
+        self.path = path
+        self.shuffle = shuffle
+        self.rng = random.Random(seed)
+        self._mtime = -1.0
+        self._clips: List[str] = []
+
+    def clips(self) -> List[str]:
+        mtime = os.path.getmtime(self.path)
+        if mtime != self._mtime:
+            base = os.path.dirname(os.path.abspath(self.path))
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = [line.strip() for line in f]
+            self._clips = [
+                entry if os.path.isabs(entry) else os.path.join(base, entry)
+                for entry in entries
+                if entry and not entry.startswith("#")
+            ]
+            if self._mtime >= 0:
+                print(f"[playlist_stream] Playlist changed; {len(self._clips)} clips")
+            self._mtime = mtime
+        return list(self._clips)
+
+    def __iter__(self) -> Iterator[str]:
+        # Endless. An edit to the file takes effect after the current clip:
+        # playback continues after that clip in the new list (or restarts the
+        # pass if it was removed); each full pass reshuffles when requested.
+        current: Optional[str] = None
+        while True:
+            order = self.clips()
+            version = self._mtime
+            if self.shuffle:
+                self.rng.shuffle(order)
+            start = order.index(current) + 1 if current in order and not self.shuffle else 0
+            played = False
+            for clip in order[start:]:
+                if not os.path.isfile(clip):
+                    print(f"[playlist_stream] Skipping missing clip: {clip}")
+                    continue
+                played = True
+                current = clip
+                yield clip
+                self.clips()
+                if self._mtime != version:
+                    break
+            else:
+                current = None
+                if not played and start == 0:
+                    raise RuntimeError(f"Playlist has no playable clips: {self.path}")
+
+
+def segment_cmd(clip: str, offset: float) -> List[str]:
+    return [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-i", clip,
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c", "copy",
+        "-bsf:v", "h264_mp4toannexb",
+        "-output_ts_offset", f"{offset:.6f}",
+        "-muxdelay", "0", "-muxpreload", "0",
+        "-f", "mpegts", "pipe:1",
+    ]
+
+
+class ClipQueue:
+    """Upcoming clips, prepared and probed ahead of time by one background thread.
+
+    Yields ``(clip, source, length)``. ``prepare`` maps a clip to the file to
+    play ("" to skip it). Results, including failures, are cached per clip
+    and mtime, so later passes neither re-condition nor re-probe.
+    """
+
+    def __init__(
+        self,
+        playlist: Playlist,
+        prepare: Optional[Callable[[str], str]] = None,
+        lookahead: int = LOOKAHEAD,
+        retry_seconds: float = RETRY_SECONDS,
+    ) -> None:
+        self.playlist = playlist
+        self.prepare = prepare
+        self.retry_seconds = retry_seconds
+        self.error: Optional[BaseException] = None
+        self._queue: "queue.Queue[Tuple[str, str, float]]" = queue.Queue(maxsize=lookahead)
+        self._ready: Dict[Tuple[str, int], Optional[Tuple[str, float]]] = {}
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="playlist-lookahead", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._closed.set()
+
+    def get(self, stop: threading.Event) -> Optional[Tuple[str, str, float]]:
+        """The next clip, or None once ``stop`` is set."""
+        while not stop.is_set():
+            try:
+                return self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self.error is not None:
+                    raise RuntimeError(f"Playlist stopped: {self.error}") from self.error
+        return None
+
+    def _run(self) -> None:
+        failures = 0
+        try:
+            for clip in self.playlist:
+                if self._closed.is_set():
+                    return
+                item = self._load(clip)
+                if item is None:
+                    # Every clip exists (Playlist raises otherwise) but none plays:
+                    # wait for the files or the playlist to change instead of spinning.
+                    failures += 1
+                    if failures >= max(len(self.playlist.clips()), 1):
+                        print(f"[playlist_stream] No playable clips; retrying in {self.retry_seconds:g}s")
+                        self._closed.wait(self.retry_seconds)
+                        failures = 0
+                    continue
+                failures = 0
+                while not self._closed.is_set():
+                    try:
+                        self._queue.put((clip, *item), timeout=0.5)
+                        break
+                    except queue.Full:
+                        pass
+        except Exception as e:
+            print(f"[playlist_stream] Error: {e}")
+            self.error = e
+
+    def _load(self, clip: str) -> Optional[Tuple[str, float]]:
+        try:
+            key = (clip, os.stat(clip).st_mtime_ns)
+        except OSError as e:
+            print(f"[playlist_stream] Skipping clip {clip}: {e}")
+            return None
+        item = self._ready.get(key)
+        if key not in self._ready or (item is not None and not os.path.isfile(item[0])):
+            item = self._ready[key] = self._inspect(clip)
+        return item
+
+    def _inspect(self, clip: str) -> Optional[Tuple[str, float]]:
+        source = self.prepare(clip) if self.prepare else clip
+        if not source:
+            return None
+        try:
+            length = duration_seconds(probe(source))
+        except ProbeError as e:
+            print(f"[playlist_stream] Skipping unreadable clip {clip}: {e}")
+            return None
+        if length <= 0:
+            print(f"[playlist_stream] Skipping empty clip {clip}")
+            return None
+        return source, length
+
+
+class PlaylistFeeder:
+    """Writes the playlist as one continuous MPEG-TS byte stream.
+
+    ``clips`` is shared, so that a replacement feeder (after an ffmpeg
+    restart) continues with the next clip instead of the first. Stop and
+    join the previous feeder before starting its replacement, or it can
+    still take (and drop) the next clip.
+    """
+
+    def __init__(self, clips: ClipQueue) -> None:
+        self.clips = clips
+        self.offset = 0.0
+        self.clips_played = 0
+        self._stop = threading.Event()
+        self._started = False
+        self._done = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the feeder has returned; True if it has (or never ran)."""
+        return not self._started or self._done.wait(timeout)
+
+    def __call__(self, sink: BinaryIO) -> None:
+        self._started = True
+        try:
+            self._feed(sink)
+        finally:
+            self._done.set()
+
+    def _feed(self, sink: BinaryIO) -> None:
+        while True:
+            item = self.clips.get(self._stop)
+            if item is None:
+                return
+            clip, source, length = item
+            print(f"[playlist_stream] Now playing: {os.path.basename(clip)} at t={self.offset:.2f}s")
+            process = subprocess.Popen(segment_cmd(source, self.offset), stdout=subprocess.PIPE)
+            try:
+                while not self._stop.is_set():
+                    chunk = process.stdout.read(COPY_CHUNK)
+                    if not chunk:
+                        break
+                    sink.write(chunk)
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                process.wait()
+            # Advance even on failure: part of the clip may already be out, and
+            # timestamps must never step backwards.
+            self.offset += length
+            if process.returncode != 0 and not self._stop.is_set():
+                print(f"[playlist_stream] Remux failed for {clip} (exit {process.returncode}); skipping")
+                continue
+            self.clips_played += 1
+
+
+def build_playlist_cmd(seconds: int, output_url: str, encode_args: List[str]) -> List[str]:
+    return [
+        "ffmpeg",
+        "-re",
+        "-f", "mpegts",
+        "-i", "pipe:0",
+        *encode_args,
+        "-bsf:a", "aac_adtstoasc",
+        "-f", "flv",
+        "-t", str(seconds),
+        output_url,
+    ]
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Batch-fetch stock clips and AI images concurrently over one pooled client.
+
+The manifest is a JSON list of jobs:
+
+  [
+    {"kind": "stock", "query": "rain on a window", "output": "output/clip_01.mp4"},
+    {"kind": "image", "prompt": "cozy cabin at night", "output": "output/bg_01.jpg", "seed": 42}
+  ]
+
+Usage: prefetch.py <manifest.json> [concurrency]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+from downloader import SEGMENTS
+from fetch_stock_video import search_pexels_video
+from generate_ai_image import generate_image
+from http_client import RateLimitGate, make_client
+
+DEFAULT_CONCURRENCY = int(os.environ.get("PREFETCH_CONCURRENCY", 6))
+
+
+async def _run_job(job: Dict[str, Any], client, gate: RateLimitGate, semaphore: asyncio.Semaphore) -> bool:
+    kind = job.get("kind")
+    output = job["output"]
+    async with semaphore:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        if kind == "stock":
+            return await search_pexels_video(job["query"], output, seed=job.get("seed"), client=client, gate=gate)
+        if kind == "image":
+            return await generate_image(job["prompt"], output, seed=job.get("seed"), client=client)
+        print(f"[prefetch] Unknown job kind: {kind!r}")
+        return False
+
+
+async def prefetch(jobs: List[Dict[str, Any]], concurrency: int = DEFAULT_CONCURRENCY) -> List[bool]:
+    semaphore = asyncio.Semaphore(concurrency)
+    gate = RateLimitGate()
+    started = time.monotonic()
+
+    # Segmented downloads open several connections per job.
+    async with make_client(max_connections=concurrency * SEGMENTS) as client:
+        results = await asyncio.gather(*(_run_job(job, client, gate, semaphore) for job in jobs))
+
+    elapsed = time.monotonic() - started
+    print(f"[prefetch] {sum(results)}/{len(jobs)} jobs succeeded in {elapsed:.1f}s (concurrency={concurrency})")
+    for job, ok in zip(jobs, results):
+        if not ok:
+            print(f"[prefetch] FAILED: {job.get('kind')} -> {job.get('output')}")
+    return list(results)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: prefetch.py <manifest.json> [concurrency]")
+        sys.exit(1)
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CONCURRENCY
+
+    results = asyncio.run(prefetch(manifest, concurrency))
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Procedural theme visuals (rain, fireplace, ocean, wind, forest) in NumPy.
+
+Frames are drawn into a reused uint8 buffer with vectorised particle systems
+and piped to ffmpeg as raw RGB. Every motion in a scene is periodic over the
+cycle: particles travel a whole number of screen widths/heights per cycle and
+every oscillation completes a whole number of periods, so frame ``cycle`` is
+identical to frame 0. Only that one cycle is rendered and encoded (starting
+on a keyframe, with 2s keyframes like the rest of the pipeline); the output
+is then built by looping it with stream copy, so an hour of video costs one
+cycle of drawing.
+
+Everything is derived from the generate_unique_prompt parameters and is
+deterministic for a given seed.
+
+Usage: procedural_visuals.py <output_mp4> [theme] [duration_seconds] [background_image]
+
+Configuration (as exported by generate_unique_prompt.py):
+  COMPUTED_THEME, RAIN_INTENSITY, WIND_SPEED, COLOR_SHIFT, PROMPT_SEED
+  VISUALS_CYCLE_SECONDS  length of the rendered cycle, a multiple of 2 (default: 10)
+"""
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Type
+
+import numpy as np
+
+WIDTH = 1920
+HEIGHT = 1080
+FPS = 30
+KEYFRAME_SECONDS = 2
+TAU = 2 * np.pi
+
+
+@dataclass
+class SceneParams:
+    theme: str = "rain"
+    rain_intensity: float = 0.2
+    wind_speed: float = 0.1
+    color_shift: str = "#1a2a3a"
+    seed: int = 0
+
+    @classmethod
+    def from_env(cls, theme: Optional[str] = None) -> "SceneParams":
+        return cls(
+            theme=theme or os.getenv("COMPUTED_THEME", "rain"),
+            rain_intensity=float(os.getenv("RAIN_INTENSITY", "0.2")),
+            wind_speed=float(os.getenv("WIND_SPEED", "0.1")),
+            color_shift=os.getenv("COLOR_SHIFT", "#1a2a3a"),
+            seed=int(os.getenv("PROMPT_SEED", "0")),
+        )
+
+
+def hex_color(value: str) -> np.ndarray:
+    value = value.lstrip("#")
+    return np.array([int(value[i:i + 2], 16) for i in (0, 2, 4)], dtype=np.float32)
+
+
+def gradient_background(color: str) -> np.ndarray:
+    """Vertical gradient around ``color``: darker sky, lighter ground."""
+    rgb = hex_color(color)
+    ramp = np.linspace(0.6, 1.5, HEIGHT, dtype=np.float32)[:, None]
+    column = np.clip(ramp * rgb[None, :], 0, 255).astype(np.uint8)
+    return np.ascontiguousarray(np.broadcast_to(column[:, None, :], (HEIGHT, WIDTH, 3)))
+
+
+def load_background(path: str) -> np.ndarray:
+    """Decode ``path`` with ffmpeg, cover-scaled to the frame size."""
+    cmd = [
+        "ffmpeg", "-v", "error", "-nostdin", "-i", path,
+        "-frames:v", "1",
+        "-vf", f"scale={WIDTH}:{HEIGHT}:force_original_aspect_ratio=increase,crop={WIDTH}:{HEIGHT}",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1",
+    ]
+    raw = subprocess.run(cmd, check=True, stdout=subprocess.PIPE).stdout
+    return np.frombuffer(raw, dtype=np.uint8).reshape(HEIGHT, WIDTH, 3).copy()
+
+
+def blend(frame: np.ndarray, ys: np.ndarray, xs: np.ndarray, color: np.ndarray, alpha: np.ndarray) -> None:
+    """Alpha-blend ``color`` into the given pixels; ``alpha`` is 0..256 per pixel."""
+    a = alpha.astype(np.uint16).reshape(-1, 1)
+    px = frame[ys, xs].astype(np.uint16)
+    frame[ys, xs] = ((px * (256 - a) + color.astype(np.uint16) * a) >> 8).astype(np.uint8)
+
+
+def draw_dots(frame, x, y, size, color, alpha) -> None:
+    offsets = np.arange(size) - size // 2
+    xs = (x.astype(np.int32)[:, None, None] + offsets[None, None, :]) % WIDTH
+    ys = (y.astype(np.int32)[:, None, None] + offsets[None, :, None]) % HEIGHT
+    xs, ys = np.broadcast_arrays(xs, ys)
+    a = np.broadcast_to(np.reshape(alpha, (-1, 1, 1)), xs.shape)
+    blend(frame, ys.ravel(), xs.ravel(), color, a.ravel())
+
+
+def draw_streaks(frame, x, y, dx, dy, length, color, alpha) -> None:
+    t = np.linspace(0.0, 1.0, length, dtype=np.float32)[None, :]
+    xs = (x[:, None] - dx[:, None] * t).astype(np.int32) % WIDTH
+    ys = (y[:, None] - dy[:, None] * t).astype(np.int32) % HEIGHT
+    # Fade toward the tail.
+    a = (alpha[:, None] * (1.0 - 0.7 * t)).astype(np.uint16)
+    blend(frame, ys.ravel(), xs.ravel(), color, a.ravel())
+
+
+class Scene:
+    """Base class; ``cycle`` is the loop length in frames."""
+
+    def __init__(self, params: SceneParams, cycle: int, background: np.ndarray) -> None:
+        self.params = params
+        self.cycle = cycle
+        self.base = background
+        self.rng = np.random.default_rng(params.seed)
+
+    def phase(self, frame: int) -> float:
+        return TAU * frame / self.cycle
+
+    def wrap_velocity(self, laps: np.ndarray, extent: int) -> np.ndarray:
+        """Per-frame speed that covers ``laps`` whole screen extents per cycle."""
+        return laps.astype(np.float32) * extent / self.cycle
+
+    def draw(self, frame: np.ndarray, index: int) -> None:
+        raise NotImplementedError
+
+
+class RainScene(Scene):
+    STREAK = 28
+    COLOR = np.array([200, 210, 225])
+
+    def __init__(self, params, cycle, background):
+        super().__init__(params, cycle, background)
+        count = int(12000 * params.rain_intensity)
+        rng = self.rng
+        self.x0 = rng.uniform(0, WIDTH, count).astype(np.float32)
+        self.y0 = rng.uniform(0, HEIGHT, count).astype(np.float32)
+        laps_y = rng.integers(10, 21, count)
+        laps_x = np.round(laps_y * params.wind_speed * 2).astype(np.int64)
+        self.vx = self.wrap_velocity(laps_x, WIDTH)
+        self.vy = self.wrap_velocity(laps_y, HEIGHT)
+        speed = np.hypot(self.vx, self.vy)
+        self.dx = self.vx / speed * self.STREAK
+        self.dy = self.vy / speed * self.STREAK
+        self.alpha = rng.uniform(50, 120, count).astype(np.float32)
+        # A couple of lightning flashes, a few frames each.
+        starts = rng.choice(cycle - 3, size=2, replace=False)
+        self.flash = {int(s) + k: 45 - 12 * k for s in starts for k in range(3)}
+
+    def draw(self, frame, index):
+        x = (self.x0 + self.vx * index) % WIDTH
+        y = (self.y0 + self.vy * index) % HEIGHT
+        draw_streaks(frame, x, y, self.dx, self.dy, self.STREAK, self.COLOR, self.alpha)
+        boost = self.flash.get(index)
+        if boost:
+            np.minimum(frame.astype(np.uint16) + boost, 255, out=frame, casting="unsafe")
+
+
+class FireplaceScene(Scene):
+    EMBER = np.array([255, 150, 50])
+
+    def __init__(self, params, cycle, background):
+        super().__init__(params, cycle, background)
+        rng = self.rng
+        self.top = HEIGHT // 3
+        yy, xx = np.mgrid[self.top:HEIGHT, 0:WIDTH].astype(np.float32)
+        dist = np.hypot((xx - WIDTH / 2) / (WIDTH * 0.45), (yy - HEIGHT) / (HEIGHT * 0.75))
+        mask = np.clip(1.0 - dist, 0.0, 1.0) ** 1.5
+        self.glow = (mask[..., None] * np.array([110, 55, 15], dtype=np.float32)).astype(np.uint16)
+        # Flicker: a few whole-cycle harmonics.
+        self.harmonics = rng.integers(3, 40, 4)
+        self.harmonic_phase = rng.uniform(0, TAU, 4)
+
+        count = 150
+        self.x0 = rng.normal(WIDTH / 2, WIDTH / 10, count).astype(np.float32)
+        self.y0 = rng.uniform(0, HEIGHT, count).astype(np.float32)
+        self.vy = self.wrap_velocity(-rng.integers(1, 4, count), HEIGHT)
+        self.sway_freq = rng.integers(1, 6, count)
+        self.sway_phase = rng.uniform(0, TAU, count).astype(np.float32)
+
+    def draw(self, frame, index):
+        p = self.phase(index)
+        flicker = 0.8 + 0.05 * np.sin(self.harmonics * p + self.harmonic_phase).sum()
+        region = frame[self.top:]
+        lit = region.astype(np.uint16) + ((self.glow * int(flicker * 256)) >> 8)
+        np.minimum(lit, 255, out=region, casting="unsafe")
+
+        x = self.x0 + 30 * np.sin(self.sway_freq * p + self.sway_phase)
+        y = (self.y0 + self.vy * index) % HEIGHT
+        alpha = 220 * (y / HEIGHT) ** 2
+        draw_dots(frame, x, y, 2, self.EMBER, alpha)
+
+
+class OceanScene(Scene):
+    FOAM = np.array([235, 245, 255])
+
+    def __init__(self, params, cycle, background):
+        super().__init__(params, cycle, background)
+        rng = self.rng
+        self.top = HEIGHT // 2
+        rows = np.arange(HEIGHT - self.top, dtype=np.float32)
+        self.row_phase = rows * TAU / 180.0 * (1 + rows / 400)  # waves bunch up toward the shore
+        self.swell_freq = int(rng.integers(2, 5))
+
+        count = 400
+        self.x0 = rng.uniform(0, WIDTH, count).astype(np.float32)
+        self.y = rng.uniform(self.top, HEIGHT, count).astype(np.float32)
+        self.vx = self.wrap_velocity(rng.choice([-1, 1], count), WIDTH)
+        self.blink_freq = rng.integers(1, 8, count)
+        self.blink_phase = rng.uniform(0, TAU, count).astype(np.float32)
+
+    def draw(self, frame, index):
+        p = self.phase(index)
+        gain = 1.0 + 0.12 * np.sin(self.swell_freq * p - self.row_phase)
+        region = frame[self.top:]
+        # gain * 256 reaches ~287, so bright pixels need more than 16 bits.
+        shaded = (region.astype(np.uint32) * (gain * 256).astype(np.uint32)[:, None, None]) >> 8
+        np.minimum(shaded, 255, out=region, casting="unsafe")
+
+        x = (self.x0 + self.vx * index) % WIDTH
+        alpha = 180 * np.clip(np.sin(self.blink_freq * p + self.blink_phase), 0, 1) ** 3
+        draw_dots(frame, x, self.y, 2, self.FOAM, alpha)
+
+
+class WindScene(Scene):
+    DUST = np.array([210, 200, 180])
+
+    def __init__(self, params, cycle, background):
+        super().__init__(params, cycle, background)
+        rng = self.rng
+        count = 900
+        self.x0 = rng.uniform(0, WIDTH, count).astype(np.float32)
+        self.y0 = rng.uniform(0, HEIGHT, count).astype(np.float32)
+        laps = np.maximum(1, np.round(rng.uniform(20, 60, count) * params.wind_speed)).astype(np.int64)
+        self.vx = self.wrap_velocity(laps, WIDTH)
+        self.bob_freq = rng.integers(1, 10, count)
+        self.bob_phase = rng.uniform(0, TAU, count).astype(np.float32)
+        self.alpha = rng.uniform(40, 110, count).astype(np.float32)
+
+    def draw(self, frame, index):
+        p = self.phase(index)
+        x = (self.x0 + self.vx * index) % WIDTH
+        y = self.y0 + 25 * np.sin(self.bob_freq * p + self.bob_phase)
+        draw_streaks(frame, x, y, np.full_like(x, 8.0), np.zeros_like(x), 6, self.DUST, self.alpha)
+
+
+class ForestScene(Scene):
+    FIREFLY = np.array([210, 255, 120])
+
+    def __init__(self, params, cycle, background):
+        super().__init__(params, cycle, background)
+        rng = self.rng
+        count = 120
+        self.x0 = rng.uniform(0, WIDTH, count).astype(np.float32)
+        self.y0 = rng.uniform(HEIGHT * 0.3, HEIGHT, count).astype(np.float32)
+        self.freq = rng.integers(1, 4, (3, count))
+        self.offset = rng.uniform(0, TAU, (3, count)).astype(np.float32)
+
+    def draw(self, frame, index):
+        p = self.phase(index)
+        x = self.x0 + 60 * np.sin(self.freq[0] * p + self.offset[0])
+        y = self.y0 + 40 * np.sin(self.freq[1] * p + self.offset[1])
+        alpha = 230 * np.clip(np.sin(self.freq[2] * p + self.offset[2]), 0, 1) ** 4
+        draw_dots(frame, x, y, 5, self.FIREFLY, alpha * 0.35)
+        draw_dots(frame, x, y, 2, self.FIREFLY, alpha)
+
+
+SCENES: Dict[str, Type[Scene]] = {
+    "rain": RainScene,
+    "fireplace": FireplaceScene,
+    "ocean": OceanScene,
+    "wind": WindScene,
+    "forest": ForestScene,
+}
+
+
+def render_cycle(params: SceneParams, output_file: str, cycle_seconds: int, background: Optional[np.ndarray] = None) -> None:
+    """Draw one cycle and encode it as a closed-GOP clip that loops seamlessly."""
+    if cycle_seconds % KEYFRAME_SECONDS:
+        raise ValueError(f"cycle length must be a multiple of {KEYFRAME_SECONDS}s")
+    cycle = cycle_seconds * FPS
+    if background is None:
+        background = gradient_background(params.color_shift)
+    scene = SCENES.get(params.theme, RainScene)(params, cycle, background)
+
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{WIDTH}x{HEIGHT}", "-r", str(FPS), "-i", "pipe:0",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "20",
+        "-pix_fmt", "yuv420p",
+        "-force_key_frames", f"expr:gte(t,n_forced*{KEYFRAME_SECONDS})", "-sc_threshold", "0",
+        output_file,
+    ]
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    frame = np.empty_like(background)
+    started = time.monotonic()
+    try:
+        for index in range(cycle):
+            np.copyto(frame, background)
+            scene.draw(frame, index)
+            process.stdin.write(frame.data)
+        process.stdin.close()
+    except BaseException:
+        process.kill()
+        raise
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg exited with code {process.returncode}")
+    elapsed = time.monotonic() - started
+    print(
+        f"[procedural_visuals] {params.theme}: {cycle} frames in {elapsed:.1f}s "
+        f"({cycle / elapsed:.0f} fps, {cycle / elapsed / FPS:.1f}x realtime)"
+    )
+
+
+def loop_cycle(cycle_file: str, output_file: str, duration_seconds: float) -> None:
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-v", "error", "-nostdin",
+            "-stream_loop", "-1", "-i", cycle_file,
+            "-c", "copy", "-t", f"{duration_seconds:.3f}",
+            output_file,
+        ],
+        check=True,
+    )
+
+
+def render(params: SceneParams, output_file: str, duration_seconds: float, background_image: Optional[str] = None) -> None:
+    cycle_seconds = int(os.getenv("VISUALS_CYCLE_SECONDS", "10"))
+    background = load_background(background_image) if background_image else None
+    root, ext = os.path.splitext(output_file)
+    cycle_file = f"{root}.cycle{ext or '.mp4'}"
+    render_cycle(params, cycle_file, cycle_seconds, background)
+    loop_cycle(cycle_file, output_file, duration_seconds)
+    os.remove(cycle_file)
+    print(f"[procedural_visuals] Wrote {duration_seconds:.0f}s of {params.theme} to {output_file}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: procedural_visuals.py <output_mp4> [theme] [duration_seconds] [background_image]")
+        sys.exit(1)
+
+    scene_params = SceneParams.from_env(sys.argv[2] if len(sys.argv) > 2 else None)
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else float(os.getenv("DURATION_SECONDS", "3600"))
+    image = sys.argv[4] if len(sys.argv) > 4 and sys.argv[4] else None
+    render(scene_params, sys.argv[1], duration, image)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Parallel chunked render of a long looped output.
+
+The target timeline is split into chunks whose lengths are whole multiples of
+the GOP, and each chunk is encoded independently (starting on a forced
+keyframe) in a ProcessPoolExecutor sized to the host's cores. Audio is
+encoded once in a single cheap pass so there are no AAC priming gaps at chunk
+seams. The chunks are joined with a stream-copy concat, the result's duration
+is checked against the target, and only chunks that fail verification are
+re-encoded on retry.
+
+Usage: render_chunks.py <base_video> <output_mp4> <total_hours>
+
+Configuration:
+  RENDER_CHUNK_SECONDS  nominal chunk length (default: 300)
+  RENDER_WORKERS        parallel encoders (default: number of cores)
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+from media_probe import ProbeError, duration_seconds, probe
+
+FPS = 30
+GOP_SECONDS = 2
+MAX_ATTEMPTS = 3
+DURATION_TOLERANCE = 0.1  # seconds per chunk
+
+# Same quality settings as loop_video.sh
+VIDEO_ARGS = [
+    "-c:v", "libx264", "-preset", "slow", "-crf", "20",
+    "-profile:v", "high", "-level", "4.1",
+    "-pix_fmt", "yuv420p",
+    "-r", str(FPS),
+    "-force_key_frames", f"expr:gte(t,n_forced*{GOP_SECONDS})",
+    "-sc_threshold", "0",
+]
+
+Chunk = Tuple[int, float, float]  # (index, start, length)
+
+
+def plan_chunks(total_seconds: float, chunk_seconds: float) -> List[Chunk]:
+    chunk_seconds = max(GOP_SECONDS, round(chunk_seconds / GOP_SECONDS) * GOP_SECONDS)
+    chunks = []
+    start = 0.0
+    index = 0
+    while start < total_seconds:
+        length = min(chunk_seconds, total_seconds - start)
+        chunks.append((index, start, length))
+        start += length
+        index += 1
+    return chunks
+
+
+def encode_chunk(base_video: str, base_duration: float, chunk: Chunk, out_path: str, threads: int) -> str:
+    index, start, length = chunk
+    # Seeking a -stream_loop input only works within the first iteration, so
+    # seek to the equivalent position in the base clip.
+    cmd = [
+        "ffmpeg", "-y", "-v", "error", "-nostdin",
+        "-stream_loop", "-1",
+        "-ss", f"{start % base_duration:.3f}",
+        "-i", base_video,
+        "-t", f"{length:.3f}",
+        "-an",
+        *VIDEO_ARGS,
+        "-threads", str(threads),
+        out_path,
+    ]
+    subprocess.run(cmd, check=True)
+    return out_path
+
+
+def chunk_is_valid(path: str, expected: float) -> bool:
+    if not os.path.isfile(path):
+        return False
+    try:
+        actual = duration_seconds(probe(path))
+    except ProbeError:
+        return False
+    return abs(actual - expected) <= DURATION_TOLERANCE
+
+
+def encode_audio(base_video: str, total_seconds: float, out_path: str) -> None:
+    cmd = [
+        "ffmpeg", "-y", "-v", "error", "-nostdin",
+        "-stream_loop", "-1", "-i", base_video,
+        "-t", f"{total_seconds:.3f}",
+        "-vn", "-c:a", "aac", "-b:a", "128k",
+        out_path,
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def render(base_video: str, output_file: str, total_seconds: float, chunk_seconds: float, workers: int) -> bool:
+    base_duration = duration_seconds(probe(base_video))
+    if base_duration <= 0:
+        print(f"[render_chunks] Could not determine duration of {base_video}")
+        return False
+
+    chunks = plan_chunks(total_seconds, chunk_seconds)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    work_dir = tempfile.mkdtemp(prefix="render_chunks_", dir=os.path.dirname(os.path.abspath(output_file)))
+    paths: Dict[int, str] = {index: os.path.join(work_dir, f"chunk_{index:05d}.mp4") for index, _, _ in chunks}
+    print(f"[render_chunks] {len(chunks)} chunks x {chunks[0][2]:.0f}s on {workers} workers ({threads} threads each)")
+
+    started = time.monotonic()
+    try:
+        pending = list(chunks)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            audio_path = os.path.join(work_dir, "audio.m4a")
+            audio_future = pool.submit(encode_audio, base_video, total_seconds, audio_path)
+
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                futures = {
+                    pool.submit(encode_chunk, base_video, base_duration, chunk, paths[chunk[0]], threads): chunk
+                    for chunk in pending
+                }
+                failed = []
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    try:
+                        future.result()
+                    except (subprocess.CalledProcessError, OSError) as e:
+                        print(f"[render_chunks] Chunk {chunk[0]} failed: {e}")
+                    if not chunk_is_valid(paths[chunk[0]], chunk[2]):
+                        failed.append(chunk)
+                if not failed:
+                    break
+                print(f"[render_chunks] Attempt {attempt}: {len(failed)} chunk(s) failed verification")
+                pending = failed
+            else:
+                print("[render_chunks] Giving up: chunks still failing after retries")
+                return False
+
+            audio_future.result()
+
+        list_path = os.path.join(work_dir, "chunks.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for index, _, _ in chunks:
+                f.write(f"file '{paths[index]}'\n")
+
+        tmp_output = f"{output_file}.part.mp4"
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-v", "error", "-nostdin",
+                "-f", "concat", "-safe", "0", "-i", list_path,
+                "-i", audio_path,
+                "-map", "0:v", "-map", "1:a",
+                "-c", "copy",
+                "-movflags", "+faststart",
+                tmp_output,
+            ],
+            check=True,
+        )
+
+        # Continuity: the joined timeline must cover the whole target.
+        joined = duration_seconds(probe(tmp_output))
+        if abs(joined - total_seconds) > DURATION_TOLERANCE * len(chunks):
+            print(f"[render_chunks] Joined duration {joined:.2f}s != target {total_seconds:.2f}s")
+            os.remove(tmp_output)
+            return False
+        os.replace(tmp_output, output_file)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"[render_chunks] Rendered {total_seconds:.0f}s to {output_file} in {time.monotonic() - started:.1f}s")
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Usage: render_chunks.py <base_video> <output_mp4> <total_hours>")
+        sys.exit(1)
+
+    total = float(sys.argv[3]) * 3600
+    workers = max(1, int(os.getenv("RENDER_WORKERS", os.cpu_count() or 1)))
+    chunk_len = float(os.getenv("RENDER_CHUNK_SECONDS", "300"))
+
+    ok = render(sys.argv[1], sys.argv[2], total, chunk_len, workers)
+    sys.exit(0 if ok else 1)
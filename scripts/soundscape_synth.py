@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+NumPy ambient soundscape synthesizer (rain, wind, fireplace, ocean, forest).
+
+Each theme is rendered once as a ``SOUNDSCAPE_CYCLE_SECONDS`` stereo cycle:
+
+- The noise bed is shaped in the frequency domain (colour + band limits)
+  and brought back with an inverse real FFT, so it is circular: the last
+  sample runs straight into the first.
+- Slow modulation (gusts, swells, flicker) uses whole numbers of periods per
+  cycle, and stochastic events (droplets, crackles, pops, chirps, thunder)
+  are written with wrap-around indexing, so an event straddling the end of
+  the cycle finishes at its start.
+
+The cycle therefore repeats without a seam. It is converted to 16-bit PCM
+once and streamed to ffmpeg in fixed ``BLOCK_SECONDS`` blocks until the
+requested duration is reached, so memory depends on the cycle length only,
+not on the output duration.
+
+Usage: soundscape_synth.py <output_audio> <theme> [duration_seconds]
+
+Configuration:
+  DURATION_SECONDS          output length when not given on the command line (default: 3600)
+  RAIN_INTENSITY, WIND_SPEED, PROMPT_SEED   as exported by generate_unique_prompt.py
+  SOUNDSCAPE_CYCLE_SECONDS  length of the rendered cycle (default: 60)
+"""
+import os
+import subprocess
+import sys
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+BLOCK_SECONDS = 1.0
+TAU = 2 * np.pi
+
+
+class Cycle:
+    """A stereo buffer plus helpers that keep everything periodic over it."""
+
+    def __init__(self, seconds: float, seed: int) -> None:
+        self.n = int(seconds * SAMPLE_RATE)
+        self.seconds = self.n / SAMPLE_RATE
+        self.rng = np.random.default_rng(seed)
+        self.t = np.arange(self.n, dtype=np.float32) / SAMPLE_RATE
+        self.out = np.zeros((self.n, 2), dtype=np.float32)
+
+    def noise(self, color: float, low: float, high: float, order: int = 2) -> np.ndarray:
+        """Circular noise with a 1/f**color power spectrum band-limited to [low, high] Hz."""
+        freqs = np.fft.rfftfreq(self.n, 1.0 / SAMPLE_RATE)
+        freqs[0] = freqs[1]
+        shape = freqs ** (-color / 2)
+        shape /= np.sqrt(1 + (low / freqs) ** (2 * order))
+        shape /= np.sqrt(1 + (freqs / high) ** (2 * order))
+        spectrum = self.rng.standard_normal((2, freqs.size)) + 1j * self.rng.standard_normal((2, freqs.size))
+        noise = np.fft.irfft(spectrum * shape, n=self.n).T.astype(np.float32)
+        # Partly correlated channels: wide but not disjointed.
+        noise[:, 1] = 0.6 * noise[:, 0] + 0.8 * noise[:, 1]
+        return noise / (np.sqrt(np.mean(noise ** 2)) + 1e-12)
+
+    def lfo(self, rate_hz: float, phase: float = 0.0) -> np.ndarray:
+        """Sine in [-1, 1] at the nearest rate with a whole number of periods per cycle."""
+        periods = max(1, round(rate_hz * self.seconds))
+        return np.sin(TAU * periods * self.t / self.seconds + phase)
+
+    def events(self, rate_hz: float) -> np.ndarray:
+        """Poisson event start indices over the cycle."""
+        count = self.rng.poisson(rate_hz * self.seconds)
+        return self.rng.integers(0, self.n, count)
+
+    def add_events(self, starts: np.ndarray, kernels: np.ndarray, pan: np.ndarray) -> None:
+        """Mix ``kernels`` (events x samples) in at ``starts``, wrapping past the end."""
+        if starts.size == 0:
+            return
+        idx = (starts[:, None] + np.arange(kernels.shape[1])[None, :]) % self.n
+        gains = np.stack([np.cos(pan * np.pi / 2), np.sin(pan * np.pi / 2)], axis=1)  # equal-power pan
+        for channel in range(2):
+            np.add.at(self.out[:, channel], idx.ravel(), (kernels * gains[:, channel:channel + 1]).ravel())
+
+    def bursts(self, count: int, length_s: float, decay_s: float, highpass: bool = True) -> np.ndarray:
+        """Decaying noise bursts; first difference as a cheap high-pass."""
+        length = int(length_s * SAMPLE_RATE)
+        noise = self.rng.standard_normal((count, length + 1)).astype(np.float32)
+        if highpass:
+            noise = np.diff(noise, axis=1) * 0.5
+        else:
+            noise = noise[:, 1:]
+        env = np.exp(-np.arange(length, dtype=np.float32) / (decay_s * SAMPLE_RATE))
+        return noise * env[None, :]
+
+
+# -- themes --------------------------------------------------------------------
+
+def rain(cycle: Cycle, intensity: float, wind: float) -> None:
+    bed = cycle.noise(color=0.7, low=400, high=9000)
+    cycle.out += 0.25 * bed * (1 + 0.15 * cycle.lfo(0.05))[:, None]
+
+    starts = cycle.events(200 * intensity)
+    drops = cycle.bursts(starts.size, 0.012, 0.002)
+    drops *= cycle.rng.lognormal(-1.2, 0.6, (starts.size, 1)).astype(np.float32)
+    cycle.add_events(starts, drops, cycle.rng.uniform(0, 1, starts.size))
+
+    # Distant thunder: slow-attack brown noise rumble, at most one cycle long
+    # (add_events wraps it around the cycle boundary).
+    length = min(int(8 * SAMPLE_RATE), cycle.n)
+    rumble = cycle.noise(color=2.0, low=20, high=120)[:length, 0]
+    env = np.sin(np.linspace(0, np.pi, length, dtype=np.float32)) ** 3
+    starts = cycle.rng.integers(0, cycle.n, max(1, round(cycle.seconds / 40)))
+    kernels = np.stack([rumble * env * 0.6] * starts.size)
+    cycle.add_events(starts, kernels, np.full(starts.size, 0.5))
+
+
+def wind(cycle: Cycle, intensity: float, wind_speed: float) -> None:
+    bed = cycle.noise(color=1.2, low=50, high=900)
+    howl = cycle.noise(color=0.0, low=300, high=420, order=4)
+    gust = 0.55 + 0.25 * cycle.lfo(0.05) + 0.15 * cycle.lfo(0.13, 1.0) + 0.05 * cycle.lfo(0.31, 2.0)
+    gust *= 1 + wind_speed
+    cycle.out += (0.35 * bed + 0.12 * howl) * gust[:, None]
+
+
+def fireplace(cycle: Cycle, intensity: float, wind: float) -> None:
+    cycle.out += 0.3 * cycle.noise(color=2.0, low=25, high=200)
+
+    starts = cycle.events(35)
+    crackles = cycle.bursts(starts.size, 0.004, 0.0006)
+    crackles *= cycle.rng.pareto(2.5, (starts.size, 1)).astype(np.float32) * 0.4
+    cycle.add_events(starts, crackles, cycle.rng.uniform(0.2, 0.8, starts.size))
+
+    starts = cycle.events(1.5)
+    pops = cycle.bursts(starts.size, 0.06, 0.012, highpass=False)
+    cycle.add_events(starts, pops * 0.5, cycle.rng.uniform(0.3, 0.7, starts.size))
+
+
+def ocean(cycle: Cycle, intensity: float, wind: float) -> None:
+    bed = cycle.noise(color=1.0, low=30, high=1200)
+    wash = cycle.noise(color=0.3, low=1500, high=8000)
+    phase = cycle.rng.uniform(0, TAU)
+    swell = ((1 + cycle.lfo(1 / 8, phase)) / 2) ** 2
+    foam = ((1 + cycle.lfo(1 / 8, phase - 0.6)) / 2) ** 4  # breaks just after the swell peaks
+    cycle.out += 0.15 * bed + 0.45 * bed * swell[:, None] + 0.12 * wash * foam[:, None]
+
+
+def forest(cycle: Cycle, intensity: float, wind: float) -> None:
+    cycle.out += 0.08 * cycle.noise(color=1.0, low=300, high=1500)
+
+    starts = cycle.events(0.6)
+    notes_per_call = 4
+    length = int(0.12 * SAMPLE_RATE)
+    t = np.arange(length, dtype=np.float32) / SAMPLE_RATE
+    env = np.sin(np.pi * t / t[-1]) ** 2
+    for note in range(notes_per_call):
+        base = cycle.rng.uniform(2500, 4500, (starts.size, 1))
+        sweep = cycle.rng.uniform(-1500, 1500, (starts.size, 1))
+        freq = base + sweep * t[None, :] / t[-1]
+        chirp = np.sin(TAU * np.cumsum(freq, axis=1) / SAMPLE_RATE).astype(np.float32) * env * 0.2
+        offset = (note * 0.16 * SAMPLE_RATE + cycle.rng.integers(0, 2000, starts.size)).astype(np.int64)
+        cycle.add_events(starts + offset, chirp, cycle.rng.uniform(0.1, 0.9, starts.size))
+
+
+THEMES: Dict[str, Callable[[Cycle, float, float], None]] = {
+    "rain": rain,
+    "wind": wind,
+    "fireplace": fireplace,
+    "ocean": ocean,
+    "forest": forest,
+}
+
+
+def render_cycle(theme: str, seconds: float, seed: int, intensity: float, wind_speed: float) -> np.ndarray:
+    """Interleaved int16 stereo samples of one seamless cycle."""
+    cycle = Cycle(seconds, seed)
+    THEMES.get(theme, rain)(cycle, intensity, wind_speed)
+    # Soft clip is memoryless, so the cycle stays circular.
+    peak = np.percentile(np.abs(cycle.out), 99.9) + 1e-9
+    mixed = np.tanh(cycle.out * (0.7 / peak))
+    return (mixed * 32000).astype(np.int16)
+
+
+def stream_cycle(pcm: np.ndarray, duration_seconds: float, output_file: str) -> None:
+    """Repeat ``pcm`` into ffmpeg in fixed-size blocks until ``duration_seconds``."""
+    total = int(duration_seconds * SAMPLE_RATE)
+    block = int(BLOCK_SECONDS * SAMPLE_RATE)
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "2", "-i", "pipe:0",
+        *(["-c:a", "libmp3lame", "-q:a", "4"] if output_file.endswith(".mp3") else []),
+        output_file,
+    ]
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    try:
+        written = 0
+        position = 0
+        while written < total:
+            count = min(block, total - written, len(pcm) - position)
+            process.stdin.write(pcm[position:position + count].data)
+            written += count
+            position = (position + count) % len(pcm)
+        process.stdin.close()
+    except BaseException:
+        process.kill()
+        raise
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg exited with code {process.returncode}")
+
+
+def synthesize(theme: str, output_file: str, duration_seconds: float) -> None:
+    cycle_seconds = min(float(os.getenv("SOUNDSCAPE_CYCLE_SECONDS", "60")), duration_seconds)
+    started = time.monotonic()
+    pcm = render_cycle(
+        theme,
+        cycle_seconds,
+        seed=int(os.getenv("PROMPT_SEED", "0")),
+        intensity=float(os.getenv("RAIN_INTENSITY", "0.2")),
+        wind_speed=float(os.getenv("WIND_SPEED", "0.1")),
+    )
+    print(f"[soundscape_synth] {theme}: {cycle_seconds:.0f}s cycle rendered in {time.monotonic() - started:.2f}s")
+    stream_cycle(pcm, duration_seconds, output_file)
+    print(f"[soundscape_synth] Wrote {duration_seconds:.0f}s to {output_file} in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: soundscape_synth.py <output_audio> <theme> [duration_seconds]")
+        sys.exit(1)
+
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else float(os.getenv("DURATION_SECONDS", "3600"))
+    synthesize(sys.argv[2], sys.argv[1], duration)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Fast path for still-image backgrounds (e.g. generate_ai_image output).
+
+Instead of encoding the same picture at 30 fps for the whole duration, one
+short segment is encoded from the image with ``-tune stillimage`` and a long
+GOP (by default a single keyframe per segment). It can carry a gentle
+Ken Burns pan/zoom whose path returns to its start at the end of the
+segment. The output of any length is then assembled by repeating that
+segment with stream copy next to the looped audio track; nothing is encoded
+again. The segment length is snapped so a whole number of segments fits
+one pass of the audio, so video and audio seams coincide.
+
+Usage: still_render.py <image> <audio> <output_mp4> [duration_seconds]
+
+Configuration:
+  STILL_SEGMENT_SECONDS  target segment length (default: 60)
+  STILL_GOP_SECONDS      keyframe interval; 2 for live ingest (default: segment length)
+  STILL_MOTION           none | kenburns (default: none)
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from media_probe import ProbeError, duration_seconds, first_stream, probe
+
+WIDTH = 1920
+HEIGHT = 1080
+FPS = 30
+
+
+def segment_length(audio_seconds: float, target: float) -> float:
+    """Length near ``target`` that divides ``audio_seconds`` into whole segments."""
+    if audio_seconds <= 0:
+        return target
+    count = max(1, round(audio_seconds / target))
+    frames = max(1, round(audio_seconds / count * FPS))
+    return frames / FPS
+
+
+def motion_filter(motion: str, frames: int) -> str:
+    cover = f"scale={WIDTH}:{HEIGHT}:force_original_aspect_ratio=increase,crop={WIDTH}:{HEIGHT}"
+    if motion != "kenburns":
+        return f"{cover},format=yuv420p"
+    # One full sine period per segment, so the last frame leads back into the first.
+    # Upscaling first keeps zoompan's integer crop offsets from visibly stepping.
+    phase = f"2*PI*on/{frames}"
+    return (
+        f"{cover},scale={WIDTH * 4}:{HEIGHT * 4},"
+        f"zoompan=z='1.06+0.04*sin({phase})'"
+        f":x='iw/2-(iw/zoom/2)+{WIDTH * 0.08}*sin({phase})'"
+        f":y='ih/2-(ih/zoom/2)+{HEIGHT * 0.06}*cos({phase})'"
+        f":d=1:s={WIDTH}x{HEIGHT}:fps={FPS},format=yuv420p"
+    )
+
+
+def encode_segment(image: str, output_file: str, seconds: float, gop_seconds: float, motion: str) -> None:
+    frames = round(seconds * FPS)
+    cmd = [
+        "ffmpeg", "-y", "-v", "error", "-nostdin",
+        "-loop", "1", "-framerate", str(FPS), "-i", image,
+        "-frames:v", str(frames),
+        "-vf", motion_filter(motion, frames),
+        "-c:v", "libx264", "-preset", "slow", "-crf", "20",
+        "-tune", "stillimage" if motion == "none" else "film",
+        "-profile:v", "high", "-level", "4.1",
+        "-g", str(max(1, round(gop_seconds * FPS))), "-keyint_min", str(max(1, round(gop_seconds * FPS))),
+        "-sc_threshold", "0", "-bf", "2",
+        "-r", str(FPS),
+        output_file,
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def encode_audio_once(audio: str, output_file: str) -> str:
+    """AAC copy of one pass of the soundtrack (stream-copied if already AAC)."""
+    try:
+        stream = first_stream(probe(audio), "audio") or {}
+    except ProbeError:
+        stream = {}
+    codec_args = ["-c:a", "copy"] if stream.get("codec_name") == "aac" else ["-c:a", "aac", "-b:a", "128k"]
+    subprocess.run(
+        ["ffmpeg", "-y", "-v", "error", "-nostdin", "-i", audio, "-vn", *codec_args, output_file],
+        check=True,
+    )
+    return output_file
+
+
+def render(image: str, audio: str, output_file: str, duration: float = 0.0) -> None:
+    started = time.monotonic()
+    audio_seconds = duration_seconds(probe(audio))
+    duration = duration or audio_seconds
+    seconds = segment_length(audio_seconds, float(os.getenv("STILL_SEGMENT_SECONDS", "60")))
+    gop = float(os.getenv("STILL_GOP_SECONDS", "0")) or seconds
+    motion = os.getenv("STILL_MOTION", "none")
+
+    work = tempfile.mkdtemp(prefix="still_", dir=os.path.dirname(os.path.abspath(output_file)))
+    try:
+        segment = os.path.join(work, "segment.mp4")
+        encode_segment(image, segment, seconds, gop, motion)
+        track = encode_audio_once(audio, os.path.join(work, "audio.m4a"))
+        print(f"[still_render] Encoded {seconds:.2f}s segment ({motion}) in {time.monotonic() - started:.1f}s")
+
+        tmp_output = f"{output_file}.part.mp4"
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-v", "error", "-nostdin",
+                "-stream_loop", "-1", "-i", segment,
+                "-stream_loop", "-1", "-i", track,
+                "-map", "0:v:0", "-map", "1:a:0",
+                "-c", "copy",
+                "-t", f"{duration:.3f}",
+                "-movflags", "+faststart",
+                tmp_output,
+            ],
+            check=True,
+        )
+        os.replace(tmp_output, output_file)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    size_mb = os.path.getsize(output_file) / 1e6
+    print(
+        f"[still_render] Wrote {duration:.0f}s to {output_file} "
+        f"({size_mb:.1f} MB) in {time.monotonic() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Usage: still_render.py <image> <audio> <output_mp4> [duration_seconds]")
+        sys.exit(1)
+
+    target = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+    render(sys.argv[1], sys.argv[2], sys.argv[3], target)
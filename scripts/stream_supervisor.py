@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Self-healing supervisor for the live ffmpeg push.
+
+If ffmpeg exits before the requested duration, or stops making progress for
+``stall_timeout`` seconds, it is restarted against the same ingest URL with
+exponential backoff. Each restart resumes from the current offset in the
+looped content (``-ss``) and only streams the time still remaining, so
+viewers neither restart the content nor see a new broadcast.
+
+Every incident is logged to ``<metrics_dir>/stream_incidents.jsonl`` with its
+reconnect time (restart until ffmpeg reports progress again) and total
+downtime (failure detected until progress resumes); running totals are added
+to the progress reporter's Prometheus metrics.
+"""
+import json
+import os
+import subprocess
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from ffmpeg_progress import ProgressReporter, Snapshot
+from ffmpeg_runner import Feeder, run_ffmpeg
+
+# (content offset seconds, remaining seconds) -> (ffmpeg command, optional stdin feeder)
+AttemptFactory = Callable[[float, float], Tuple[List[str], Optional[Feeder]]]
+
+END_TOLERANCE = 2.0
+HEALTHY_RUN_SECONDS = 300.0
+
+
+class StreamSupervisor:
+    def __init__(
+        self,
+        make_attempt: AttemptFactory,
+        duration_seconds: float,
+        reporter: ProgressReporter,
+        loop_period: Optional[float] = None,
+        stall_timeout: float = 30.0,
+        max_restarts: int = 50,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ) -> None:
+        self.make_attempt = make_attempt
+        self.duration_seconds = duration_seconds
+        self.reporter = reporter
+        self.loop_period = loop_period
+        self.stall_timeout = stall_timeout
+        self.max_restarts = max_restarts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.incidents_path = os.path.join(os.path.dirname(reporter.jsonl_path), "stream_incidents.jsonl")
+
+        self.streamed = 0.0  # content seconds delivered by finished attempts
+        self.restarts = 0
+        self.total_downtime = 0.0
+        self._attempt_out_time = 0.0
+        self._last_advance = 0.0
+        self._process: Optional[subprocess.Popen] = None
+        self._stalled = False
+        self._incident: Optional[dict] = None
+        self._stopping = False
+
+    # -- progress / watchdog ---------------------------------------------------
+
+    def _on_progress(self, snapshot: Snapshot) -> None:
+        if snapshot["out_time_seconds"] > self._attempt_out_time:
+            self._attempt_out_time = snapshot["out_time_seconds"]
+            self._last_advance = time.monotonic()
+            if self._incident is not None:
+                self._close_incident()
+        # Report position across restarts, not per-process.
+        self.reporter(dict(snapshot, out_time_seconds=self.streamed + self._attempt_out_time))
+
+    def _watchdog(self, stop: threading.Event) -> None:
+        while not stop.wait(1.0):
+            process = self._process
+            if process is None or process.poll() is not None:
+                continue
+            if time.monotonic() - self._last_advance > self.stall_timeout:
+                print(
+                    f"[stream_supervisor] No output progress for {self.stall_timeout:.0f}s; restarting ffmpeg",
+                    flush=True,
+                )
+                self._stalled = True
+                process.kill()
+
+    # -- incidents -------------------------------------------------------------
+
+    def _open_incident(self, reason: str) -> None:
+        now = time.monotonic()
+        self._incident = {"reason": reason, "detected": now, "wall_time": time.time(), "restarted": None}
+
+    def _close_incident(self) -> None:
+        incident, self._incident = self._incident, None
+        now = time.monotonic()
+        downtime = now - incident["detected"]
+        reconnect = now - incident["restarted"] if incident["restarted"] else downtime
+        self.total_downtime += downtime
+        record = {
+            "time": incident["wall_time"],
+            "reason": incident["reason"],
+            "restart": self.restarts,
+            "resume_offset_seconds": round(self.streamed, 3),
+            "reconnect_seconds": round(reconnect, 3),
+            "downtime_seconds": round(downtime, 3),
+        }
+        with open(self.incidents_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        self.reporter.extra.update(
+            {
+                "restarts_total": self.restarts,
+                "last_reconnect_seconds": reconnect,
+                "last_downtime_seconds": downtime,
+                "downtime_seconds_total": self.total_downtime,
+            }
+        )
+        print(
+            f"[stream_supervisor] Recovered: reconnect {reconnect:.1f}s, downtime {downtime:.1f}s",
+            flush=True,
+        )
+
+    def stop(self) -> None:
+        """End the stream early, without a restart (e.g. the broadcast never went live)."""
+        self._stopping = True
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+    def _on_start(self, process: subprocess.Popen) -> None:
+        self._process = process
+        if self._stopping:
+            process.terminate()
+
+    # -- main loop -------------------------------------------------------------
+
+    def run(self) -> int:
+        stop = threading.Event()
+        watchdog = threading.Thread(target=self._watchdog, args=(stop,), name="stream-watchdog", daemon=True)
+        watchdog.start()
+        consecutive_failures = 0
+        returncode = 0
+        try:
+            while True:
+                remaining = self.duration_seconds - self.streamed
+                if remaining <= END_TOLERANCE:
+                    return 0
+                if self._stopping:
+                    print("[stream_supervisor] Stopped", flush=True)
+                    return 1
+
+                offset = self.streamed % self.loop_period if self.loop_period else 0.0
+                cmd, feeder = self.make_attempt(offset, remaining)
+                if self._incident is not None:
+                    self._incident["restarted"] = time.monotonic()
+                    print(
+                        f"[stream_supervisor] Restart {self.restarts}: resuming at {offset:.1f}s, "
+                        f"{remaining:.0f}s remaining",
+                        flush=True,
+                    )
+
+                self._attempt_out_time = 0.0
+                self._last_advance = time.monotonic()
+                self._stalled = False
+                started = time.monotonic()
+                returncode = run_ffmpeg(
+                    cmd,
+                    feeder=feeder,
+                    progress=self._on_progress,
+                    on_start=self._on_start,
+                )
+                self._process = None
+                self.streamed += self._attempt_out_time
+                if self._stopping:
+                    print("[stream_supervisor] Stopped", flush=True)
+                    return 1
+
+                if returncode == 0 and not self._stalled and self.duration_seconds - self.streamed <= END_TOLERANCE:
+                    return 0
+
+                reason = "stall" if self._stalled else f"exit code {returncode}"
+                print(
+                    f"[stream_supervisor] ffmpeg stopped ({reason}) at {self.streamed:.1f}s of "
+                    f"{self.duration_seconds:.0f}s",
+                    flush=True,
+                )
+                if self._incident is None:
+                    self._open_incident(reason)
+
+                if self.restarts >= self.max_restarts:
+                    print(f"[stream_supervisor] Giving up after {self.restarts} restarts", flush=True)
+                    return returncode or 1
+
+                # Back off on repeated quick failures; a long healthy run resets it.
+                consecutive_failures = 1 if time.monotonic() - started > HEALTHY_RUN_SECONDS else consecutive_failures + 1
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (consecutive_failures - 1)))
+                self.restarts += 1
+                self.reporter.extra["restarts_total"] = self.restarts
+                time.sleep(delay)
+        finally:
+            stop.set()
+            watchdog.join(timeout=2)
+            self.reporter.flush()
@@ -1,17 +1,51 @@
 #!/usr/bin/env python3
 """
 Create a YouTube Live broadcast and stream video content via RTMP.
+
+With STREAM_BACKUP_INGEST=1 and/or STREAM_EXTRA_URLS (comma-separated RTMP
+URLs) the content is encoded once and fanned out to every destination through
+fanout_relay.py, each with its own pusher, restarts and metrics.
+
+With STREAM_FAST_START=1 the startup is handled by live_startup.py: API calls
+run concurrently, ffmpeg starts as soon as the ingest URL is known, and the
+broadcast is transitioned straight to live explicitly.
 """
+import contextlib
 import datetime
+import math
 import os
-import subprocess
 import sys
 import time
-from typing import List
-
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from typing import List, Optional
+
+from encoder_autotune import tune
+from fanout_relay import FanoutRelay, destination_urls
+from ffmpeg_progress import ProgressReporter
+from ingest_check import resolve_passthrough_source
+from live_startup import FAST_START_CONTENT_DETAILS, LiveStartup
+from media_probe import ProbeError, duration_seconds as media_duration, probe
+from playlist_stream import ClipQueue, Playlist, PlaylistFeeder, build_playlist_cmd, is_playlist
+from stream_supervisor import StreamSupervisor
+from youtube_client import get_ingest_stream, youtube_service
+
+# Live re-encode settings; skipped entirely in passthrough mode.
+ENCODE_ARGS = [
+    "-c:v", "libx264",
+    "-preset", "veryfast",  # Fast encoding for live streaming
+    "-tune", "zerolatency",
+    "-b:v", "2500k",  # Bitrate for 1080p
+    "-maxrate", "2500k",
+    "-bufsize", "5000k",
+    "-g", "60",  # Keyframe interval (2 seconds at 30fps)
+    "-c:a", "aac",
+    "-b:a", "128k",
+    "-ar", "44100",
+]
+
+# Clips in a playlist may differ in size; normalise before the encoder.
+PLAYLIST_FILTER_ARGS = [
+    "-vf", "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2,fps=30",
+]
 
 
 def get_env(name: str, required: bool = True, default: str = "") -> str:
@@ -21,9 +55,35 @@ def get_env(name: str, required: bool = True, default: str = "") -> str:
     return value
 
 
+def env_flag(name: str, default: str = "") -> bool:
+    return os.getenv(name, default).strip().lower() in {"1", "true", "yes", "on"}
+
+
+def build_ffmpeg_cmd(
+    video_path: str,
+    duration_seconds: int,
+    output_url: str,
+    copy: bool = False,
+    start_offset: float = 0.0,
+    encode_args: Optional[List[str]] = None,
+) -> List[str]:
+    # Loop the video file and stream it continuously
+    return [
+        "ffmpeg",
+        "-re",  # Read input at native frame rate
+        "-stream_loop", "-1",  # Loop input infinitely
+        *(["-ss", f"{start_offset:.3f}"] if start_offset > 0 else []),  # Resume point after a restart
+        "-i", video_path,
+        *(["-c", "copy"] if copy else encode_args or ENCODE_ARGS),
+        "-f", "flv",  # FLV format for RTMP
+        "-t", str(duration_seconds),  # Limit to duration_hours
+        output_url,
+    ]
+
+
 def main() -> None:
     if len(sys.argv) < 2:
-        raise SystemExit("Usage: stream_to_youtube_live.py <video_path> [duration_hours]")
+        raise SystemExit("Usage: stream_to_youtube_live.py <video_path|playlist.txt> [duration_hours]")
 
     video_path = sys.argv[1]
     if not os.path.isfile(video_path):
@@ -61,47 +121,29 @@ def main() -> None:
             "(must be public, unlisted, or private)"
         )
 
-    print("[stream_to_youtube_live] Preparing credentials...")
-    creds = Credentials(
-        None,
-        refresh_token=refresh_token,
-        token_uri="https://oauth2.googleapis.com/token",
-        client_id=client_id,
-        client_secret=client_secret,
-        # Need full YouTube scope for live streaming
-        scopes=["https://www.googleapis.com/auth/youtube"],
-    )
-
-    creds.refresh(Request())
-    youtube = build("youtube", "v3", credentials=creds)
-
-    print("[stream_to_youtube_live] Creating live stream...")
-    # Step 1: Create a live stream
-    stream_body = {
-        "snippet": {
-            "title": f"Stream for {title}",
-        },
-        "cdn": {
-            "format": "1080p",
-            "ingestionType": "rtmp",
-        },
-    }
-
-    stream_response = youtube.liveStreams().insert(
-        part="snippet,cdn",
-        body=stream_body,
-    ).execute()
-
-    stream_id = stream_response["id"]
-    rtmp_url = stream_response["cdn"]["ingestionInfo"]["ingestionAddress"]
-    stream_key = stream_response["cdn"]["ingestionInfo"]["streamName"]
-    full_rtmp_url = f"{rtmp_url}/{stream_key}"
+    # Passthrough: push the file with -c copy when it already meets YouTube's
+    # ingest requirements, conditioning it once if it does not.
+    stream_source = video_path
+    copy = False
+    playlist = is_playlist(video_path)
+    if playlist:
+        # Clips are checked (and conditioned) ahead of playback by the lookahead thread.
+        copy = env_flag("STREAM_PASSTHROUGH")
+    elif env_flag("STREAM_PASSTHROUGH"):
+        source = resolve_passthrough_source(
+            video_path, allow_condition=env_flag("STREAM_CONDITION", "1"), max_seconds=duration_seconds
+        )
+        if source:
+            stream_source, copy = source, True
+        else:
+            print("[stream_to_youtube_live] Passthrough unavailable; falling back to live re-encode")
 
-    print(f"[stream_to_youtube_live] Stream created. Stream ID: {stream_id}")
-    print(f"[stream_to_youtube_live] RTMP URL: {full_rtmp_url}")
+    # Pick the slowest x264 preset this host can sustain (cached per host and input).
+    live_args = PLAYLIST_FILTER_ARGS + ENCODE_ARGS if playlist else ENCODE_ARGS
+    if not copy and env_flag("STREAM_AUTOTUNE"):
+        sample = Playlist(video_path).clips()[0] if playlist else stream_source
+        live_args = tune(sample, live_args)
 
-    print("[stream_to_youtube_live] Creating live broadcast...")
-    # Step 2: Create a live broadcast
     broadcast_body = {
         "snippet": {
             "title": title,
@@ -117,83 +159,163 @@ def main() -> None:
             "enableAutoStop": True,
         },
     }
+    metrics_dir = os.getenv("STREAM_METRICS_DIR", os.path.join("output", "metrics"))
 
-    broadcast_response = youtube.liveBroadcasts().insert(
-        part="snippet,status,contentDetails",
-        body=broadcast_body,
-    ).execute()
-
-    broadcast_id = broadcast_response["id"]
-    print(f"[stream_to_youtube_live] Broadcast created. Broadcast ID: {broadcast_id}")
+    def make_service():
+        # Need full YouTube scope for live streaming
+        return youtube_service(["https://www.googleapis.com/auth/youtube"], client_id, client_secret, refresh_token)
+
+    startup = None
+    if env_flag("STREAM_FAST_START"):
+        # Ingest lookup and broadcast insert run concurrently, ffmpeg starts as
+        # soon as the ingest URL is known, and live_startup takes the broadcast
+        # live itself instead of waiting for enableAutoStart.
+        broadcast_body["contentDetails"].update(FAST_START_CONTENT_DETAILS)
+        startup = LiveStartup(
+            make_service,
+            metrics_dir,
+            poll_interval=float(os.getenv("STREAM_GO_LIVE_POLL", "0.5")),
+            timeout=float(os.getenv("STREAM_GO_LIVE_TIMEOUT", "180")),
+        )
+        print("[stream_to_youtube_live] Resolving ingest stream and creating the broadcast concurrently...")
+        ingest = startup.prepare(get_ingest_stream, broadcast_body)
+    else:
+        print("[stream_to_youtube_live] Preparing credentials...")
+        youtube = make_service()
+
+        # Step 1: Reuse the channel's ingest stream (created on first run only)
+        print("[stream_to_youtube_live] Resolving ingest stream...")
+        ingest = get_ingest_stream(youtube)
+    stream_id = ingest["id"]
+    full_rtmp_url = ingest["rtmp_url"]
+
+    print(f"[stream_to_youtube_live] Stream ID: {stream_id}")
+    print(f"[stream_to_youtube_live] RTMP URL: {full_rtmp_url}")
 
-    # Step 3: Bind stream to broadcast
-    print("[stream_to_youtube_live] Binding stream to broadcast...")
-    youtube.liveBroadcasts().bind(
-        part="id,contentDetails",
-        id=broadcast_id,
-        streamId=stream_id,
-    ).execute()
+    backup_url = ingest.get("backup_rtmp_url", "") if env_flag("STREAM_BACKUP_INGEST") else ""
+    if env_flag("STREAM_BACKUP_INGEST") and not backup_url:
+        print("[stream_to_youtube_live] No backup ingest address offered for this stream")
+    destinations = destination_urls(full_rtmp_url, backup_url, os.getenv("STREAM_EXTRA_URLS", ""))
+
+    if startup is None:
+        print("[stream_to_youtube_live] Creating live broadcast...")
+        # Step 2: Create a live broadcast
+        broadcast_response = youtube.liveBroadcasts().insert(
+            part="snippet,status,contentDetails",
+            body=broadcast_body,
+        ).execute()
+
+        broadcast_id = broadcast_response["id"]
+        print(f"[stream_to_youtube_live] Broadcast created. Broadcast ID: {broadcast_id}")
+
+        # Step 3: Bind stream to broadcast
+        print("[stream_to_youtube_live] Binding stream to broadcast...")
+        youtube.liveBroadcasts().bind(
+            part="id,contentDetails",
+            id=broadcast_id,
+            streamId=stream_id,
+        ).execute()
 
     print("[stream_to_youtube_live] Starting FFmpeg stream...")
     print(f"[stream_to_youtube_live] Streaming for {duration_hours} hours ({duration_seconds} seconds)")
 
-    # Step 4: Stream video via FFmpeg to RTMP
-    # Loop the video file and stream it continuously
-    ffmpeg_cmd = [
-        "ffmpeg",
-        "-re",  # Read input at native frame rate
-        "-stream_loop", "-1",  # Loop input infinitely
-        "-i", video_path,
-        "-c:v", "libx264",
-        "-preset", "veryfast",  # Fast encoding for live streaming
-        "-tune", "zerolatency",
-        "-b:v", "2500k",  # Bitrate for 1080p
-        "-maxrate", "2500k",
-        "-bufsize", "5000k",
-        "-g", "60",  # Keyframe interval (2 seconds at 30fps)
-        "-c:a", "aac",
-        "-b:a", "128k",
-        "-ar", "44100",
-        "-f", "flv",  # FLV format for RTMP
-        "-t", str(duration_seconds),  # Limit to duration_hours
-        full_rtmp_url,
-    ]
-
-    print(f"[stream_to_youtube_live] FFmpeg command: {' '.join(ffmpeg_cmd)}")
-    print("[stream_to_youtube_live] Streaming started. Check your YouTube channel!")
-
-    try:
-        # Run FFmpeg and stream
-        process = subprocess.Popen(
-            ffmpeg_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            bufsize=1,
+    # Step 4: Stream video via FFmpeg to RTMP, restarting it on failure
+    metrics_interval = float(os.getenv("STREAM_METRICS_INTERVAL", "10"))
+    stall_timeout = float(os.getenv("STREAM_STALL_TIMEOUT", "30"))
+    relay = None
+    if len(destinations) > 1:
+        # One encoder, one pusher per destination.
+        relay = FanoutRelay(
+            destinations,
+            metrics_dir,
+            buffer_seconds=float(os.getenv("STREAM_RELAY_BUFFER_SECONDS", "10")),
+            stall_timeout=stall_timeout,
+            interval=metrics_interval,
         )
+        full_rtmp_url = relay.url
+    feeders: List[PlaylistFeeder] = []
+    loop_period = None
+    if playlist:
+        allow_condition = env_flag("STREAM_CONDITION", "1")
+        prepare = (lambda clip: resolve_passthrough_source(clip, allow_condition, uniform=True)) if copy else None
+        clips = ClipQueue(Playlist(video_path, shuffle=env_flag("STREAM_PLAYLIST_SHUFFLE")), prepare=prepare)
+        encode_args = ["-c", "copy"] if copy else live_args
+    else:
+        try:
+            loop_period = media_duration(probe(stream_source)) or None
+        except ProbeError as e:
+            print(f"[stream_to_youtube_live] Could not probe loop length ({e}); restarts resume at 0s")
+
+    def make_attempt(offset: float, remaining: float):
+        seconds = int(math.ceil(remaining))
+        if playlist:
+            if feeders:
+                previous = feeders[-1]
+                previous.stop()
+                if not previous.join(timeout=10):
+                    print("[stream_to_youtube_live] Previous playlist feeder did not stop in time")
+            feeder = PlaylistFeeder(clips)
+            feeders.append(feeder)
+            return build_playlist_cmd(seconds, full_rtmp_url, encode_args), feeder
+        return build_ffmpeg_cmd(
+            stream_source, seconds, full_rtmp_url, copy=copy, start_offset=offset, encode_args=live_args
+        ), None
+
+    if playlist:
+        first_cmd = build_playlist_cmd(duration_seconds, full_rtmp_url, encode_args)
+    else:
+        first_cmd = build_ffmpeg_cmd(stream_source, duration_seconds, full_rtmp_url, copy=copy, encode_args=live_args)
+    print(f"[stream_to_youtube_live] FFmpeg command: {' '.join(first_cmd)}")
+    print("[stream_to_youtube_live] Streaming started. Check your YouTube channel!")
 
-        # Monitor FFmpeg output
-        for line in process.stdout:
-            print(f"[ffmpeg] {line.rstrip()}", flush=True)
-
-        process.wait()
+    reporter = ProgressReporter(metrics_dir, interval=metrics_interval)
+    supervisor = StreamSupervisor(
+        make_attempt,
+        duration_seconds,
+        reporter,
+        loop_period=loop_period,
+        stall_timeout=stall_timeout,
+        max_restarts=int(os.getenv("STREAM_MAX_RESTARTS", "50")),
+    )
+    if startup is not None:
+        # Bind, wait for the ingest to turn active, then ready -> live; stop
+        # pushing if the broadcast cannot be taken live.
+        startup.go_live(stream_id, reporter, on_failure=supervisor.stop)
 
-        if process.returncode != 0:
-            print(f"[stream_to_youtube_live] FFmpeg exited with code {process.returncode}")
+    try:
+        with relay or contextlib.nullcontext():
+            returncode = supervisor.run()
+        if returncode != 0:
+            print(f"[stream_to_youtube_live] FFmpeg exited with code {returncode}")
         else:
             print("[stream_to_youtube_live] Stream completed successfully")
-
+        if supervisor.restarts:
+            print(
+                f"[stream_to_youtube_live] Recovered from {supervisor.restarts} interruption(s); "
+                f"total downtime {supervisor.total_downtime:.1f}s"
+            )
+        for destination in relay.destinations if relay else []:
+            print(
+                f"[stream_to_youtube_live] {destination.name}: {destination.bytes_sent / 1e6:.0f} MB sent, "
+                f"{destination.restarts} pusher restart(s), {destination.dropped_tags} tag(s) dropped"
+            )
     except KeyboardInterrupt:
         print("[stream_to_youtube_live] Stream interrupted by user")
-        process.terminate()
-        process.wait()
     except Exception as e:
         print(f"[stream_to_youtube_live] Error during streaming: {e}")
-        if process.poll() is None:
-            process.terminate()
-            process.wait()
         raise
-
+    finally:
+        for feeder in feeders:
+            feeder.stop()
+        if playlist:
+            clips.close()
+
+    if startup is not None:
+        startup.wait(timeout=5)
+        if startup.error:
+            raise SystemExit(f"[stream_to_youtube_live] Fast start failed: {startup.error}")
+        broadcast_id = startup.broadcast_id()
+        print(f"[stream_to_youtube_live] Time to live: {startup.milestones.get('live', 0):.1f}s")
     print(f"[stream_to_youtube_live] Live stream finished. Broadcast ID: {broadcast_id}")
     print(f"[stream_to_youtube_live] View at: https://www.youtube.com/watch?v={broadcast_id}")
 
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the asset, upload and streaming scripts.
+
+Only the standard library is imported until a subcommand actually runs, so
+``--help`` and argument errors return without loading httpx, the Google
+client libraries, gradio_client or huggingface_hub. The chosen script then
+runs exactly as if it had been started on its own (same arguments, output
+and exit code).
+
+``ty1.py daemon`` keeps a warm process: it imports every subcommand's
+module (and with it the heavy libraries) once, then listens on a Unix socket
+and forks a child per job, so each job starts with everything imported.
+Jobs run with the client's working directory and environment and stream
+their output back. With TY1_DAEMON=1 the other subcommands are sent to the
+daemon when it is running and run in-process otherwise.
+
+Usage:
+  ty1.py fetch <query> <output_mp4>         Pexels stock clip (fetch_stock_video.py)
+  ty1.py image <prompt> <output_image>      AI background (generate_ai_image.py)
+  ty1.py video <prompt> <output_mp4>        AI clip, racing backends (video_backends.py)
+  ty1.py prompt [seed]                      prompt and theme exports (generate_unique_prompt.py)
+  ty1.py stream <video|playlist> [hours]    YouTube Live (stream_to_youtube_live.py)
+  ty1.py upload <video> [...]               YouTube upload (upload_to_youtube.py)
+  ty1.py daemon                             serve jobs from a warm process
+
+Configuration:
+  TY1_DAEMON   1 to hand subcommands to a running daemon
+  TY1_SOCKET   daemon socket (default: <tmp>/ty1-<uid>.sock)
+"""
+import argparse
+import os
+import sys
+import tempfile
+from typing import List, Optional
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+EXIT_MARKER = b"\0ty1-exit "
+
+# subcommand -> (module, help)
+COMMANDS = {
+    "fetch": ("fetch_stock_video", "download a Pexels stock clip"),
+    "image": ("generate_ai_image", "generate the AI background image"),
+    "video": ("video_backends", "generate an AI clip, racing the configured backends"),
+    "prompt": ("generate_unique_prompt", "print the prompt and theme as shell exports"),
+    "stream": ("stream_to_youtube_live", "stream a video or playlist to YouTube Live"),
+    "upload": ("upload_to_youtube", "upload videos to YouTube"),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="ty1.py", description="Cozy stream toolkit.")
+    sub = parser.add_subparsers(dest="command", required=True, metavar="command")
+    for name, (_, help_text) in COMMANDS.items():
+        command = sub.add_parser(name, help=help_text)
+        if name == "fetch":
+            command.add_argument("query")
+            command.add_argument("output")
+        elif name in ("image", "video"):
+            command.add_argument("prompt")
+            command.add_argument("output")
+        elif name == "prompt":
+            command.add_argument("seed", nargs="?", type=int)
+        elif name == "stream":
+            command.add_argument("video", help="video file or playlist (.txt/.m3u)")
+            command.add_argument("hours", nargs="?", type=float)
+        elif name == "upload":
+            command.add_argument("videos", nargs="+")
+    sub.add_parser("daemon", help="keep modules warm and run jobs sent over a local socket")
+    return parser
+
+
+def script_argv(args: argparse.Namespace) -> List[str]:
+    """The argument list the underlying script expects."""
+    if args.command == "fetch":
+        return [args.query, args.output]
+    if args.command in ("image", "video"):
+        return [args.prompt, args.output]
+    if args.command == "prompt":
+        return [] if args.seed is None else [str(args.seed)]
+    if args.command == "stream":
+        return [args.video] + ([] if args.hours is None else [f"{args.hours:g}"])
+    return list(args.videos)
+
+
+def run_command(command: str, argv: List[str]) -> int:
+    """Run a subcommand's script as ``__main__`` in this process; returns its exit code."""
+    import runpy
+
+    module = COMMANDS[command][0]
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    sys.argv = [os.path.join(SCRIPTS_DIR, f"{module}.py"), *argv]
+    try:
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    return 0
+
+
+def socket_path() -> str:
+    return os.getenv("TY1_SOCKET") or os.path.join(tempfile.gettempdir(), f"ty1-{os.getuid()}.sock")
+
+
+# -- daemon ----------------------------------------------------------------------
+
+def _serve_job(conn, job: dict) -> None:
+    """Child side of a job: wire stdio to the connection and run the command."""
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(conn.fileno(), 1)
+    os.dup2(conn.fileno(), 2)
+    code = 1
+    try:
+        os.chdir(job["cwd"])
+        os.environ.clear()
+        os.environ.update(job["env"])
+        code = run_command(job["command"], job["argv"])
+    except BaseException as e:  # report anything, the parent must never see this job's exception
+        print(f"[ty1] {type(e).__name__}: {e}", file=sys.stderr)
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code & 0xFF)
+
+
+def _handle(conn) -> None:
+    """Intermediate child: read the job, fork the worker, report its exit code."""
+    import json
+
+    with conn.makefile("rb") as reader:
+        job = json.loads(reader.readline())
+    pid = os.fork()
+    if pid == 0:
+        _serve_job(conn, job)
+    _, status = os.waitpid(pid, 0)
+    code = os.waitstatus_to_exitcode(status)
+    try:
+        conn.sendall(EXIT_MARKER + str(code).encode() + b"\n")
+    except OSError:
+        pass  # client went away
+    os._exit(0)
+
+
+def _stop(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def serve() -> None:
+    import signal
+    import socket
+
+    for name, (module, _) in COMMANDS.items():
+        try:
+            __import__(module)
+        except Exception as e:  # e.g. optional client libraries not installed here
+            print(f"[ty1] {name}: not preloaded ({type(e).__name__}: {e})", flush=True)
+    path = socket_path()
+    if os.path.exists(path):
+        os.remove(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)  # owner-only: jobs run with the caller's environment
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    server.listen(16)
+    server.settimeout(1.0)
+    signal.signal(signal.SIGTERM, _stop)
+    print(f"[ty1] Daemon ready on {path} (pid {os.getpid()})", flush=True)
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                conn = None
+            if conn is not None:
+                conn.settimeout(None)
+                if os.fork() == 0:
+                    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                    server.close()
+                    _handle(conn)
+                conn.close()
+            while True:  # reap finished jobs
+                try:
+                    pid, _ = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    break
+    except KeyboardInterrupt:
+        print("[ty1] Daemon stopped", flush=True)
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def submit(command: str, argv: List[str]) -> Optional[int]:
+    """Run the job on the daemon; None when no daemon is listening."""
+    import json
+    import socket
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path())
+    except OSError:
+        client.close()
+        return None
+    job = {"command": command, "argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+    with client:
+        client.sendall(json.dumps(job).encode() + b"\n")
+        out = sys.stdout.buffer
+        pending = b""
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            # Hold back a tail long enough to contain the exit marker.
+            pending += chunk
+            if len(pending) > 64:
+                out.write(pending[:-64])
+                out.flush()
+                pending = pending[-64:]
+    at = pending.rfind(EXIT_MARKER)
+    out.write(pending[:at] if at >= 0 else pending)
+    out.flush()
+    if at >= 0:
+        return int(pending[at + len(EXIT_MARKER):].strip())
+    return 1  # daemon died mid-job
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "daemon":
+        serve()
+        return 0
+    forwarded = script_argv(args)
+    if os.getenv("TY1_DAEMON", "0") == "1":
+        code = submit(args.command, forwarded)
+        if code is not None:
+            return code
+        print("[ty1] No daemon listening; running in-process", file=sys.stderr)
+    return run_command(args.command, forwarded)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Resumable, chunked YouTube uploads that survive a process restart.
+
+Each file is sent in ``chunk_size`` pieces. After every chunk the session
+URI and confirmed byte offset are checkpointed to
+``<state_dir>/<key>.json`` (``key`` covers the file's path, size and mtime,
+so an edited file never resumes a stale session). On the next run the saved
+session is asked how many bytes it already has and the upload continues from
+there; a session YouTube no longer knows about is discarded and restarted.
+
+``UploadQueue`` uploads several files with bounded parallelism. googleapiclient
+services are not thread-safe, so every worker thread builds its own.
+
+Configuration:
+  YT_UPLOAD_CHUNK_MB    chunk size in MiB, rounded to 256 KiB (default: 32)
+  YT_UPLOAD_PARALLEL    concurrent uploads in a queue (default: 2)
+  YT_UPLOAD_STATE_DIR   checkpoint directory (default: cache/uploads)
+"""
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload, MediaUpload
+
+CHUNK_ALIGN = 256 * 1024  # resumable uploads require multiples of 256 KiB
+DEFAULT_CHUNK_MB = 32
+RETRY_STATUSES = {500, 502, 503, 504}
+EXPIRED_STATUSES = {404, 410}
+MAX_RETRIES = 8
+
+
+def chunk_size_from_env() -> int:
+    size = int(float(os.getenv("YT_UPLOAD_CHUNK_MB", DEFAULT_CHUNK_MB)) * 1024 * 1024)
+    return max(CHUNK_ALIGN, size // CHUNK_ALIGN * CHUNK_ALIGN)
+
+
+def state_dir_from_env() -> str:
+    return os.getenv("YT_UPLOAD_STATE_DIR", os.path.join("cache", "uploads"))
+
+
+def _state_path(state_dir: str, video_path: str) -> str:
+    st = os.stat(video_path)
+    identity = f"{os.path.abspath(video_path)}\0{st.st_size}\0{st.st_mtime_ns}"
+    return os.path.join(state_dir, hashlib.sha256(identity.encode("utf-8")).hexdigest()[:24] + ".json")
+
+
+def _load_state(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(path: str, state: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _sync_offset(request) -> Optional[Dict[str, Any]]:
+    """Ask the upload session how many bytes it has and continue from there.
+
+    Sends the empty ``PUT`` with ``Content-Range: bytes */<size>`` from the
+    resumable upload protocol. Returns the finished video resource if the
+    session turns out to be complete already.
+    """
+    size = request.resumable.size()
+    resp, content = request.http.request(
+        request.resumable_uri,
+        method="PUT",
+        body=b"",
+        headers={"Content-Length": "0", "Content-Range": f"bytes */{size if size is not None else '*'}"},
+    )
+    if resp.status in (200, 201):
+        return json.loads(content)
+    if resp.status != 308:
+        raise HttpError(resp, content, uri=request.resumable_uri)
+    received = resp.get("range")  # "bytes=0-<last byte>", absent when nothing arrived
+    request.resumable_progress = int(received.rsplit("-", 1)[1]) + 1 if received else 0
+    return None
+
+
+@dataclass
+class UploadResult:
+    video_path: str
+    video_id: str
+    bytes_sent: int
+    seconds: float
+    resumed_from: int
+
+    @property
+    def throughput_mbps(self) -> float:
+        return self.bytes_sent * 8 / 1_000_000 / self.seconds if self.seconds > 0 else 0.0
+
+
+def upload_video(
+    youtube,
+    video_path: str,
+    body: Dict[str, Any],
+    chunk_size: Optional[int] = None,
+    state_dir: Optional[str] = None,
+    media: Optional[MediaUpload] = None,
+) -> UploadResult:
+    """Upload ``video_path`` with ``videos.insert``, resuming a checkpointed session if any.
+
+    A ``media`` object replaces the file reader, e.g. for a file that is
+    still being written; such uploads are not checkpointed.
+    """
+    chunk_size = chunk_size or chunk_size_from_env()
+    state_path = None if media else _state_path(state_dir or state_dir_from_env(), video_path)
+    state = _load_state(state_path) if state_path else {}
+    name = os.path.basename(video_path)
+
+    def new_request():
+        media_body = media or MediaFileUpload(video_path, chunksize=chunk_size, resumable=True)
+        return youtube.videos().insert(part="snippet,status", body=body, media_body=media_body)
+
+    request = new_request()
+    resumed_from = 0
+    resuming = sync = bool(state.get("resumable_uri"))
+    if resuming:
+        request.resumable_uri = state["resumable_uri"]
+
+    started = time.monotonic()
+    retries = 0
+    response = None
+    while response is None:
+        try:
+            if sync:
+                # Ask the session for its confirmed offset before sending.
+                response = _sync_offset(request)
+                sync = False
+                if resuming:
+                    resuming = False
+                    resumed_from = request.resumable_progress
+                    print(f"[upload_manager] {name}: resuming saved session at {resumed_from / 1e6:.1f} MB")
+                if response is not None:
+                    break
+            status, response = request.next_chunk()
+        except HttpError as e:
+            code = e.resp.status
+            if code in EXPIRED_STATUSES and state.get("resumable_uri"):
+                print(f"[upload_manager] {name}: saved session expired (HTTP {code}); starting over")
+                state = {}
+                resumed_from = 0
+                resuming = sync = False
+                request = new_request()
+                continue
+            if code not in RETRY_STATUSES or retries >= MAX_RETRIES:
+                raise
+            retries += 1
+            sync = bool(request.resumable_uri)
+        except (OSError, ConnectionError) as e:
+            if retries >= MAX_RETRIES:
+                raise
+            retries += 1
+            print(f"[upload_manager] {name}: {e}")
+            sync = bool(request.resumable_uri)  # re-sync the offset before resending
+        else:
+            retries = 0
+            if status and state_path:
+                # Checkpoint after every confirmed chunk.
+                state = {"resumable_uri": request.resumable_uri, "offset": status.resumable_progress}
+                _save_state(state_path, state)
+            if status and status.total_size:
+                print(f"[upload_manager] {name}: {int(status.progress() * 100)}%", flush=True)
+            elif status:
+                print(f"[upload_manager] {name}: {status.resumable_progress / 1e6:.1f} MB sent", flush=True)
+            continue
+
+        delay = min(60.0, 2 ** retries) + random.uniform(0, 1)
+        print(f"[upload_manager] {name}: retry {retries}/{MAX_RETRIES} in {delay:.1f}s")
+        time.sleep(delay)
+
+    if state_path and os.path.exists(state_path):
+        os.remove(state_path)
+    seconds = time.monotonic() - started
+    size = os.path.getsize(video_path)
+    result = UploadResult(video_path, response.get("id"), size - resumed_from, seconds, resumed_from)
+    print(
+        f"[upload_manager] {name}: done, video ID {result.video_id} "
+        f"({result.bytes_sent / 1e6:.1f} MB in {seconds:.1f}s, {result.throughput_mbps:.1f} Mbit/s)"
+    )
+    return result
+
+
+class UploadQueue:
+    """Uploads several files with at most ``max_parallel`` in flight."""
+
+    def __init__(self, make_service: Callable[[], Any], max_parallel: Optional[int] = None) -> None:
+        self.make_service = make_service
+        self.max_parallel = max_parallel or int(os.getenv("YT_UPLOAD_PARALLEL", "2"))
+        self._local = threading.local()
+
+    def _service(self):
+        if not hasattr(self._local, "service"):
+            self._local.service = self.make_service()
+        return self._local.service
+
+    def _upload(self, video_path: str, body: Dict[str, Any]) -> UploadResult:
+        return upload_video(self._service(), video_path, body)
+
+    def run(self, jobs: List[Tuple[str, Dict[str, Any]]]) -> Tuple[List[UploadResult], List[str]]:
+        """Upload ``(video_path, body)`` jobs; returns results and the paths that failed."""
+        results: List[UploadResult] = []
+        failed: List[str] = []
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="upload") as pool:
+            futures = {pool.submit(self._upload, path, body): path for path, body in jobs}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"[upload_manager] {os.path.basename(path)}: failed: {e}")
+                    failed.append(path)
+
+        elapsed = time.monotonic() - started
+        total = sum(r.bytes_sent for r in results)
+        if elapsed > 0:
+            print(
+                f"[upload_manager] {len(results)}/{len(jobs)} uploaded, {total / 1e6:.1f} MB in {elapsed:.1f}s "
+                f"({total * 8 / 1_000_000 / elapsed:.1f} Mbit/s aggregate, {self.max_parallel} parallel)"
+            )
+        return results, failed
@@ -2,12 +2,10 @@
 import datetime
 import os
 import sys
-from typing import List
+from typing import Any, Callable, Dict, List
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from upload_manager import UploadQueue
+from youtube_client import youtube_service
 
 
 def get_env(name: str, required: bool = True, default: str = "") -> str:
@@ -17,18 +15,11 @@ def get_env(name: str, required: bool = True, default: str = "") -> str:
     return value
 
 
-def main() -> None:
-    if len(sys.argv) < 2:
-        raise SystemExit("Usage: upload_to_youtube.py <video_path>")
-
-    video_path = sys.argv[1]
-    if not os.path.isfile(video_path):
-        raise SystemExit(f"[upload_to_youtube] Video file not found: {video_path}")
+UPLOAD_SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
 
-    client_id = get_env("YOUTUBE_CLIENT_ID")
-    client_secret = get_env("YOUTUBE_CLIENT_SECRET")
-    refresh_token = get_env("YOUTUBE_REFRESH_TOKEN")
 
+def video_bodies(count: int = 1) -> List[Dict[str, Any]]:
+    """``videos.insert`` bodies built from the YT_* metadata templates."""
     # Metadata templates
     now = datetime.datetime.utcnow()
     date_str = now.strftime("%Y-%m-%d %H:%M UTC")
@@ -52,52 +43,62 @@ def main() -> None:
             "(must be public, unlisted, or private)"
         )
 
-    print("[upload_to_youtube] Preparing credentials...")
-    creds = Credentials(
-        None,
-        refresh_token=refresh_token,
-        token_uri="https://oauth2.googleapis.com/token",
-        client_id=client_id,
-        client_secret=client_secret,
-        scopes=["https://www.googleapis.com/auth/youtube.upload"],
-    )
+    bodies = []
+    for index in range(1, count + 1):
+        bodies.append(
+            {
+                "snippet": {
+                    "title": title if count == 1 else f"{title} (Part {index})",
+                    "description": description,
+                    "tags": tags,
+                    # 10 = Music, 22 = People & Blogs, etc. Adjust if you like.
+                    "categoryId": "10",
+                },
+                "status": {
+                    "privacyStatus": privacy_status,
+                    "selfDeclaredMadeForKids": False,
+                },
+            }
+        )
+    return bodies
 
-    creds.refresh(Request())
-    youtube = build("youtube", "v3", credentials=creds)
-
-    body = {
-        "snippet": {
-            "title": title,
-            "description": description,
-            "tags": tags,
-            # 10 = Music, 22 = People & Blogs, etc. Adjust if you like.
-            "categoryId": "10",
-        },
-        "status": {
-            "privacyStatus": privacy_status,
-            "selfDeclaredMadeForKids": False,
-        },
-    }
-
-    print(f"[upload_to_youtube] Uploading '{video_path}' with title: {title}")
-
-    media = MediaFileUpload(video_path, chunksize=-1, resumable=True)
-    request = youtube.videos().insert(
-        part="snippet,status",
-        body=body,
-        media_body=media,
-    )
 
-    response = None
-    while response is None:
-        status, response = request.next_chunk()
-        if status:
-            print(f"[upload_to_youtube] Upload progress: {int(status.progress() * 100)}%", flush=True)
+def service_factory() -> Callable[[], Any]:
+    """Returns a callable building an upload-scoped service from the environment."""
+    client_id = get_env("YOUTUBE_CLIENT_ID")
+    client_secret = get_env("YOUTUBE_CLIENT_SECRET")
+    refresh_token = get_env("YOUTUBE_REFRESH_TOKEN")
+
+    def make_service():
+        return youtube_service(UPLOAD_SCOPES, client_id, client_secret, refresh_token)
+
+    return make_service
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        raise SystemExit("Usage: upload_to_youtube.py <video_path> [<video_path> ...]")
+
+    video_paths = sys.argv[1:]
+    for video_path in video_paths:
+        if not os.path.isfile(video_path):
+            raise SystemExit(f"[upload_to_youtube] Video file not found: {video_path}")
+
+    make_service = service_factory()
+    bodies = video_bodies(len(video_paths))
 
-    video_id = response.get("id")
-    print(f"[upload_to_youtube] Upload complete. Video ID: {video_id}")
+    print("[upload_to_youtube] Preparing credentials...")
+    jobs = []
+    for video_path, body in zip(video_paths, bodies):
+        print(f"[upload_to_youtube] Queued '{video_path}' with title: {body['snippet']['title']}")
+        jobs.append((video_path, body))
+
+    results, failed = UploadQueue(make_service).run(jobs)
+    for result in results:
+        print(f"[upload_to_youtube] Upload complete. Video ID: {result.video_id}")
+    if failed:
+        raise SystemExit(f"[upload_to_youtube] {len(failed)} upload(s) failed; rerun to resume them")
 
 
 if __name__ == "__main__":
     main()
-
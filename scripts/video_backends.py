@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Unified interface over the text-to-video backends, with race/hedge modes.
+
+Each backend runs its existing CLI (generate_ai_video_hf.py,
+generate_ai_video_gradio.py, generate_ai_video_pollinations.py) in its own
+process group, so a hung generator can be killed outright once another
+backend has produced a valid clip. Per-backend latency (EWMA) and success
+rate are persisted and used to order the backends on the next run.
+
+Usage: video_backends.py <prompt> <output_mp4>
+
+Configuration:
+  VIDEO_BACKENDS        comma-separated backend order/filter (default: all)
+  VIDEO_HEDGE_AFTER     seconds before starting the next backend; 0 races
+                        all backends at once (default: 90)
+  VIDEO_TIMEOUT         overall deadline in seconds (default: 900)
+  VIDEO_BACKEND_STATS   stats file (default: cache/video_backend_stats.json)
+"""
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from media_validate import ValidationError, validate
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STATS_PATH = os.getenv("VIDEO_BACKEND_STATS", os.path.join("cache", "video_backend_stats.json"))
+EWMA_ALPHA = 0.3
+
+
+@dataclass
+class Backend:
+    name: str
+    script: str
+
+    def command(self, prompt: str, output_file: str) -> List[str]:
+        return [sys.executable, os.path.join(SCRIPTS_DIR, self.script), prompt, output_file]
+
+    async def generate(self, prompt: str, output_file: str) -> bool:
+        process = await asyncio.create_subprocess_exec(
+            *self.command(prompt, output_file), start_new_session=True
+        )
+        try:
+            returncode = await process.wait()
+        except asyncio.CancelledError:
+            _kill_group(process)
+            await process.wait()
+            raise
+        # Validation blocks (ffprobe, a trial decode); keep the race's timers running.
+        return returncode == 0 and await asyncio.to_thread(is_valid_output, output_file)
+
+
+BACKENDS: Dict[str, Backend] = {
+    "hf": Backend("hf", "generate_ai_video_hf.py"),
+    "gradio": Backend("gradio", "generate_ai_video_gradio.py"),
+    "pollinations": Backend("pollinations", "generate_ai_video_pollinations.py"),
+}
+
+
+def _kill_group(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def is_valid_output(path: str) -> bool:
+    try:
+        validate(path, "video")
+    except ValidationError as e:
+        print(f"[video_backends] Rejecting output: {e}")
+        return False
+    return True
+
+
+class BackendStats:
+    def __init__(self, path: str = STATS_PATH) -> None:
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.data: Dict[str, Dict[str, float]] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.data = {}
+
+    def _entry(self, name: str) -> Dict[str, float]:
+        return self.data.setdefault(name, {"attempts": 0, "successes": 0, "latency_ewma": 0.0})
+
+    def record(self, name: str, ok: bool, latency: float) -> None:
+        entry = self._entry(name)
+        entry["attempts"] += 1
+        if ok:
+            entry["successes"] += 1
+            previous = entry["latency_ewma"]
+            entry["latency_ewma"] = latency if not previous else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * previous
+            )
+
+    def expected_cost(self, name: str) -> float:
+        # Expected seconds per successful clip; untried backends sort first so
+        # they get measured at least once.
+        entry = self.data.get(name)
+        if not entry or not entry["attempts"]:
+            return 0.0
+        success_rate = (entry["successes"] + 1) / (entry["attempts"] + 2)
+        latency = entry["latency_ewma"] or 600.0
+        return latency / success_rate
+
+    def rank(self, backends: List[Backend]) -> List[Backend]:
+        return sorted(backends, key=lambda b: self.expected_cost(b.name))
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+async def race(
+    prompt: str,
+    output_file: str,
+    backends: List[Backend],
+    hedge_after: float = 90.0,
+    timeout: Optional[float] = 900.0,
+    stats: Optional[BackendStats] = None,
+) -> Optional[str]:
+    """Run ``prompt`` on the ranked backends and keep the first valid clip.
+
+    The best-ranked backend starts immediately; the next one starts after
+    ``hedge_after`` seconds without a winner, or as soon as a running backend
+    fails. ``hedge_after=0`` starts every backend at once. Returns the winning
+    backend name, or None if all failed or the deadline passed.
+    """
+    stats = stats or BackendStats()
+    pending_backends = stats.rank(backends)
+    running: Dict[asyncio.Task, Tuple[Backend, str, float]] = {}
+    deadline = time.monotonic() + timeout if timeout else None
+    winner: Optional[str] = None
+
+    def launch() -> None:
+        backend = pending_backends.pop(0)
+        tmp_output = f"{output_file}.{backend.name}.tmp.mp4"
+        print(f"[video_backends] Starting backend: {backend.name}")
+        task = asyncio.ensure_future(backend.generate(prompt, tmp_output))
+        running[task] = (backend, tmp_output, time.monotonic())
+
+    launch()
+    if hedge_after <= 0:
+        while pending_backends:
+            launch()
+
+    try:
+        while running and winner is None:
+            wait_for = hedge_after if pending_backends and hedge_after > 0 else None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print("[video_backends] Deadline reached without a valid clip")
+                    break
+                wait_for = remaining if wait_for is None else min(wait_for, remaining)
+
+            done, _ = await asyncio.wait(running, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if pending_backends:
+                    print(f"[video_backends] No result after {hedge_after:g}s; hedging")
+                    launch()
+                continue
+
+            failed = False
+            for task in done:
+                backend, tmp_output, started = running.pop(task)
+                latency = time.monotonic() - started
+                ok = not task.cancelled() and task.exception() is None and task.result()
+                stats.record(backend.name, ok, latency)
+                if ok and winner is None:
+                    os.replace(tmp_output, output_file)
+                    winner = backend.name
+                    print(f"[video_backends] {backend.name} won in {latency:.1f}s -> {output_file}")
+                else:
+                    failed = True
+                    print(f"[video_backends] {backend.name} failed after {latency:.1f}s")
+                    if os.path.exists(tmp_output):
+                        os.remove(tmp_output)
+            # A failed backend is replaced immediately rather than after the hedge delay.
+            if winner is None and failed and pending_backends:
+                launch()
+    finally:
+        for task, (backend, tmp_output, _) in running.items():
+            print(f"[video_backends] Cancelling {backend.name}")
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        for _, tmp_output, _ in running.values():
+            if os.path.exists(tmp_output):
+                os.remove(tmp_output)
+        stats.save()
+
+    return winner
+
+
+def selected_backends() -> List[Backend]:
+    names = [n.strip() for n in os.getenv("VIDEO_BACKENDS", ",".join(BACKENDS)).split(",") if n.strip()]
+    unknown = [n for n in names if n not in BACKENDS]
+    if unknown:
+        raise SystemExit(f"[video_backends] Unknown backend(s): {', '.join(unknown)}")
+    return [BACKENDS[n] for n in names]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: video_backends.py <prompt> <output_mp4>")
+        sys.exit(1)
+
+    winner = asyncio.run(
+        race(
+            sys.argv[1],
+            sys.argv[2],
+            selected_backends(),
+            hedge_after=float(os.getenv("VIDEO_HEDGE_AFTER", "90")),
+            timeout=float(os.getenv("VIDEO_TIMEOUT", "900")),
+        )
+    )
+    sys.exit(0 if winner else 1)
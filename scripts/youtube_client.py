@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Shared, fast-starting YouTube Data API client.
+
+Startup normally costs an OAuth token round trip, a discovery-document fetch
+and parse, and (for live) a new ``liveStreams.insert``. This module avoids
+all three where it can:
+
+- The discovery document comes from the copy bundled with
+  google-api-python-client, or from ``<cache_dir>/youtube.v3.json``; it is
+  only fetched over the network when neither exists, and is then cached.
+- Access tokens are persisted (mode 0600) per client id and scope set and
+  reused until shortly before they expire; the refresh token is never
+  written to disk.
+- Live streaming uses one reusable ingest stream whose id is remembered in
+  ``<cache_dir>/ingest_stream.json``. On a cold cache it is looked up by
+  title among the channel's streams, and only created if none exists, so
+  the stream key stays the same across runs.
+
+Configuration:
+  YOUTUBE_CACHE_DIR           cache directory (default: cache/youtube)
+  YT_INGEST_STREAM_TITLE      title of the reusable ingest stream
+                              (default: Cozy live ingest)
+"""
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build_from_document
+
+TOKEN_URI = "https://oauth2.googleapis.com/token"
+DISCOVERY_URL = "https://www.googleapis.com/discovery/v1/apis/youtube/v3/rest"
+TOKEN_EXPIRY_MARGIN = datetime.timedelta(minutes=5)
+DEFAULT_INGEST_TITLE = "Cozy live ingest"
+
+
+def cache_dir() -> str:
+    return os.getenv("YOUTUBE_CACHE_DIR", os.path.join("cache", "youtube"))
+
+
+def _read_json(path: str) -> Optional[Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: Any, mode: Optional[int] = None) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        if mode is not None:
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+# -- discovery -----------------------------------------------------------------
+
+def discovery_document() -> str:
+    try:
+        from googleapiclient.discovery_cache import get_static_doc
+
+        doc = get_static_doc("youtube", "v3")
+        if doc:
+            return doc
+    except ImportError:
+        pass  # older client without bundled documents
+
+    path = os.path.join(cache_dir(), "youtube.v3.json")
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    print("[youtube_client] Fetching discovery document...")
+    with urllib.request.urlopen(DISCOVERY_URL, timeout=30) as response:
+        doc = response.read().decode("utf-8")
+    _write_json(path, json.loads(doc))  # parse first: never cache an error page
+    return doc
+
+
+# -- credentials ---------------------------------------------------------------
+
+def _token_path(client_id: str, scopes: List[str]) -> str:
+    key = hashlib.sha256("\0".join([client_id, *sorted(scopes)]).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir(), f"token-{key}.json")
+
+
+def get_credentials(client_id: str, client_secret: str, refresh_token: str, scopes: List[str]) -> Credentials:
+    """Return credentials with a usable access token, refreshing only if needed."""
+    path = _token_path(client_id, scopes)
+    cached = _read_json(path) or {}
+    token = cached.get("token")
+    expiry = None
+    if cached.get("expiry"):
+        expiry = datetime.datetime.fromisoformat(cached["expiry"])
+
+    creds = Credentials(
+        token,
+        refresh_token=refresh_token,
+        token_uri=TOKEN_URI,
+        client_id=client_id,
+        client_secret=client_secret,
+        scopes=scopes,
+        expiry=expiry,
+    )
+    # google-auth keeps expiry as naive UTC.
+    if token and expiry and expiry - TOKEN_EXPIRY_MARGIN > datetime.datetime.utcnow():
+        print("[youtube_client] Reusing cached access token")
+        return creds
+
+    creds.refresh(Request())
+    _write_json(
+        path,
+        {"token": creds.token, "expiry": creds.expiry.isoformat() if creds.expiry else None},
+        mode=0o600,
+    )
+    return creds
+
+
+def youtube_service(scopes: List[str], client_id: str, client_secret: str, refresh_token: str):
+    creds = get_credentials(client_id, client_secret, refresh_token, scopes)
+    return build_from_document(discovery_document(), credentials=creds)
+
+
+# -- reusable ingest stream ----------------------------------------------------
+
+def _ingest_info(stream: Dict[str, Any]) -> Dict[str, str]:
+    ingestion = stream["cdn"]["ingestionInfo"]
+    info = {
+        "id": stream["id"],
+        "rtmp_url": f"{ingestion['ingestionAddress']}/{ingestion['streamName']}",
+    }
+    if ingestion.get("backupIngestionAddress"):
+        info["backup_rtmp_url"] = f"{ingestion['backupIngestionAddress']}/{ingestion['streamName']}"
+    return info
+
+
+def get_ingest_stream(youtube, title: Optional[str] = None) -> Dict[str, str]:
+    """Return ``{"id", "rtmp_url"}`` (plus ``"backup_rtmp_url"`` when YouTube offers one)
+    for the channel's reusable ingest stream."""
+    title = title or os.getenv("YT_INGEST_STREAM_TITLE", DEFAULT_INGEST_TITLE)
+    state_path = os.path.join(cache_dir(), "ingest_stream.json")
+    state = _read_json(state_path) or {}
+
+    if state.get("id"):
+        items = youtube.liveStreams().list(part="id,cdn", id=state["id"]).execute().get("items", [])
+        if items:
+            print(f"[youtube_client] Reusing ingest stream {state['id']}")
+            return _ingest_info(items[0])
+
+    request = youtube.liveStreams().list(part="id,snippet,cdn,contentDetails", mine=True, maxResults=50)
+    while request is not None:
+        response = request.execute()
+        for stream in response.get("items", []):
+            if stream["snippet"].get("title") == title and stream.get("contentDetails", {}).get("isReusable"):
+                print(f"[youtube_client] Found reusable ingest stream {stream['id']}")
+                _write_json(state_path, {"id": stream["id"]})
+                return _ingest_info(stream)
+        request = youtube.liveStreams().list_next(request, response)
+
+    print("[youtube_client] Creating reusable ingest stream...")
+    stream = youtube.liveStreams().insert(
+        part="snippet,cdn,contentDetails",
+        body={
+            "snippet": {"title": title},
+            "cdn": {
+                "format": "1080p",
+                "ingestionType": "rtmp",
+            },
+            "contentDetails": {"isReusable": True},
+        },
+    ).execute()
+    _write_json(state_path, {"id": stream["id"]})
+    return _ingest_info(stream)
@@ -0,0 +1,107 @@
+import json
+import threading
+
+from ffmpeg_progress import ProgressReporter
+from live_startup import FAST_START_CONTENT_DETAILS, LiveStartup
+from standins import FakeYouTubeLive
+
+LATENCY = 0.05
+TRANSITION = 0.1
+
+
+def resolve_ingest(youtube):
+    stream = youtube.liveStreams().list(part="id,cdn", id=FakeYouTubeLive.STREAM_ID).execute()["items"][0]
+    return {"id": stream["id"], "rtmp_url": stream["cdn"]["ingestionInfo"]["ingestionAddress"]}
+
+
+def start(tmp_path, api, details=FAST_START_CONTENT_DETAILS, timeout=5.0):
+    startup = LiveStartup(lambda: api, str(tmp_path), poll_interval=0.02, timeout=timeout)
+    body = {"snippet": {"title": "test"}, "contentDetails": dict(details)}
+    return startup, startup.prepare(resolve_ingest, body)
+
+
+def calls(api, name):
+    return [entry for entry in api.log if entry[0] == name]
+
+
+def saved_metrics(tmp_path):
+    with open(tmp_path / "live_startup.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_goes_live_straight_from_ready(tmp_path):
+    pushing = threading.Event()
+    api = FakeYouTubeLive("tcp://sink", pushing.is_set, latency=LATENCY, transition_seconds=TRANSITION)
+    reporter = ProgressReporter(str(tmp_path))
+    failed = threading.Event()
+
+    startup, ingest = start(tmp_path, api)
+    assert ingest == {"id": FakeYouTubeLive.STREAM_ID, "rtmp_url": "tcp://sink"}
+    pushing.set()  # ffmpeg starts as soon as the ingest is known
+    startup.go_live(ingest["id"], reporter, on_failure=failed.set)
+    assert startup.wait(timeout=5)
+    assert startup.error is None and not failed.is_set()
+
+    # The ingest lookup and the broadcast insert overlap.
+    (_, insert_start, insert_end), = calls(api, "liveBroadcasts.insert")
+    _, lookup_start, lookup_end = calls(api, "liveStreams.list")[0]
+    assert insert_start < lookup_end and lookup_start < insert_end
+    # bind after insert; a single transition after bind and an active stream.
+    (_, bind_start, bind_end), = calls(api, "liveBroadcasts.bind")
+    (_, transition_start, _), = calls(api, "liveBroadcasts.transition")
+    assert bind_start >= insert_end
+    assert transition_start >= bind_end
+    active_polls = [end for _, _, end in calls(api, "liveStreams.list")[1:] if end <= transition_start]
+    assert active_polls
+
+    milestones = startup.milestones
+    assert set(milestones) == {"ingest_ready", "broadcast_created", "bound", "stream_active", "live"}
+    assert max(milestones["bound"], milestones["stream_active"]) <= milestones["live"]
+    assert api.broadcasts[startup.broadcast_id()]["status"] == "live"
+    assert reporter.extra["time_to_live_seconds"] == milestones["live"]
+    saved = saved_metrics(tmp_path)
+    assert saved["milestones"] == milestones and saved["error"] is None
+
+
+def test_timeout_stops_the_push(tmp_path):
+    api = FakeYouTubeLive("tcp://sink", lambda: False, latency=0.01)
+    failed = threading.Event()
+
+    startup, ingest = start(tmp_path, api, timeout=0.3)
+    startup.go_live(ingest["id"], on_failure=failed.set)
+    assert startup.wait(timeout=5)
+
+    assert failed.is_set()
+    assert startup.error.startswith("GoLiveTimeout")
+    assert "live" not in startup.milestones
+    assert not calls(api, "liveBroadcasts.transition")
+    assert saved_metrics(tmp_path)["error"] == startup.error
+
+
+def test_redundant_transition_is_tolerated(tmp_path):
+    # Auto-start gets there first; the explicit transition is then redundant.
+    api = FakeYouTubeLive("tcp://sink", lambda: True, latency=LATENCY, auto_start_seconds=0)
+    details = dict(FAST_START_CONTENT_DETAILS, enableAutoStart=True)
+
+    startup, ingest = start(tmp_path, api, details)
+    startup.go_live(ingest["id"])
+    assert startup.wait(timeout=5)
+
+    assert startup.error is None
+    assert "live" in startup.milestones
+    assert len(calls(api, "liveBroadcasts.transition")) == 1
+    broadcast = api.broadcasts[startup.broadcast_id()]
+    assert broadcast["status"] == "live"
+    assert broadcast["live_at"] == api._active_since  # auto-start, not our transition
+
+
+def test_ready_to_live_needs_the_monitor_stream_off(tmp_path):
+    api = FakeYouTubeLive("tcp://sink", lambda: True, latency=0.01)
+    failed = threading.Event()
+
+    startup, ingest = start(tmp_path, api, {"enableAutoStart": False})
+    startup.go_live(ingest["id"], on_failure=failed.set)
+    assert startup.wait(timeout=5)
+
+    assert failed.is_set()
+    assert "invalidTransition" in startup.error
@@ -0,0 +1,13 @@
+import numpy as np
+
+from procedural_visuals import HEIGHT, WIDTH, OceanScene, SceneParams
+
+
+def test_ocean_swell_never_darkens_a_bright_background():
+    background = np.full((HEIGHT, WIDTH, 3), 240, dtype=np.uint8)
+    scene = OceanScene(SceneParams(theme="ocean", seed=1), 300, background)
+    floor = (240 * int(0.88 * 256)) >> 8  # the darkest swell gain, in the same fixed point
+    for index in (0, 37, 75, 150, 299):
+        frame = background.copy()
+        scene.draw(frame, index)
+        assert frame[scene.top:].min() >= floor